@@ -1,15 +1,16 @@
 import datetime as dt
 import json
-import os
 import sys
 
+import respy as rp
+
 
 def main():
     """Evaluate the criterion function multiple times for a scalability report.
 
-    The criterion function is evaluated ``maxfun``-times. The number of threads used is
-    limited by environment variables. **respy** has to be imported after the environment
-    variables are set as Numpy, Numba and others load them at import time.
+    The criterion function is evaluated ``maxfun``-times. The number of threads used by
+    Numba and BLAS is limited at runtime with the option
+    ``"parallelization_n_threads"``.
 
     """
     model = sys.argv[1]
@@ -23,18 +24,12 @@ def main():
         "number higher than zero."
     )
 
-    # Set number of threads
-    os.environ["NUMBA_NUM_THREADS"] = f"{n_threads}"
-    os.environ["MKL_NUM_THREADS"] = f"{n_threads}"
-    os.environ["OMP_NUM_THREADS"] = f"{n_threads}"
-    os.environ["NUMEXPR_NUM_THREADS"] = f"{n_threads}"
-
-    # Late import of respy to ensure that environment variables are read by Numpy, etc..
-    import respy as rp
-
     # Get model
     params, options = rp.get_example_model(model, with_data=False)
 
+    # Set number of threads
+    options["parallelization_n_threads"] = None if n_threads == -1 else n_threads
+
     # Simulate the data
     simulate = rp.get_simulate_func(params, options)
     df = simulate(params)
@@ -44,7 +44,6 @@ extensions = [
 ]
 
 autodoc_mock_imports = [
-    "chaospy",
     "estimagic",
     "hypothesis",
     "joblib",
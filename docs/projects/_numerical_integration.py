@@ -4,6 +4,9 @@ from matplotlib import ticker
 
 # Initialize methods for comparison of integration
 METHODS = ["random", "halton", "sobol"]
+# Quadrature rules are set with options["solution_integration"] and their number of
+# nodes with options["solution_quadrature_level"] instead of options["solution_draws"].
+QUADRATURE_RULES = ["gauss_hermite", "smolyak"]
 TUITION_SUBSIDIES = [0, 500]
 
 
@@ -52,6 +55,8 @@ def get_label(method):
     label = method.capitalize()
     if label == "Random":
         label = "random"
+    elif label == "Gauss_hermite":
+        label = "Gauss-Hermite"
 
     return label
 
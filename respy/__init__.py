@@ -14,12 +14,16 @@ import pytest
 from respy.config import ROOT_DIR
 from respy.interface import get_example_model  # noqa: F401
 from respy.interface import get_parameter_constraints  # noqa: F401
+from respy.gradient import get_log_like_gradient_func  # noqa: F401
 from respy.likelihood import get_log_like_func  # noqa: F401
 from respy.method_of_simulated_moments import get_diag_weighting_matrix  # noqa: F401
 from respy.method_of_simulated_moments import get_flat_moments  # noqa: F401
 from respy.method_of_simulated_moments import get_moment_errors_func  # noqa: F401
+from respy.multi_fidelity import get_multi_fidelity_criterion_func  # noqa: F401
 from respy.simulate import get_simulate_func  # noqa: F401
 from respy.solve import get_solve_func  # noqa: F401
+from respy.solve import load_solution  # noqa: F401
+from respy.solve import save_solution  # noqa: F401
 from respy.tests.random_model import add_noise_to_params  # noqa: F401
 
 
@@ -27,9 +31,13 @@ __all__ = [
     "get_example_model",
     "get_parameter_constraints",
     "get_solve_func",
+    "save_solution",
+    "load_solution",
     "get_simulate_func",
     "get_log_like_func",
+    "get_log_like_gradient_func",
     "get_moment_errors_func",
+    "get_multi_fidelity_criterion_func",
     "get_diag_weighting_matrix",
     "get_flat_moments",
     "add_noise_to_params",
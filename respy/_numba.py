@@ -1,4 +1,10 @@
 """Special functions for using numba."""
+import functools
+import importlib
+import json
+import re
+import threading
+import time
 import warnings
 
 import numba as nb
@@ -7,6 +13,8 @@ from numba import NumbaDeprecationWarning
 from numba import types
 from numba.extending import intrinsic
 
+from respy.config import KERNEL_THRESHOLDS_PATH
+
 # Fix for transition to Numba 0.50. cgutils was moved from numba.cgutils to
 # numba.core.cgutils.
 try:
@@ -92,3 +100,209 @@ def sum_over_numba_boolean_unituple(tuple_):
 
     """
     return np.sum(np.array([1 for i in tuple_ if i]))
+
+
+MIN_LOOP_LENGTH_FOR_PARALLEL_TARGET = 256
+"""int : Smaller inputs are always processed with the ``"cpu"`` target.
+
+Larger inputs are processed with the ``"parallel"`` target if they exceed the threshold
+of the kernel which is calibrated once per machine, see
+:func:`guvectorize_with_target_selection`.
+
+"""
+
+_KERNEL_THRESHOLDS = {}
+_KERNEL_THRESHOLDS_LOCK = threading.Lock()
+
+
+def guvectorize_with_target_selection(signatures, layout, **kwargs):
+    """Compile a generalized ufunc for the ``"cpu"`` and the ``"parallel"`` target.
+
+    The ``"parallel"`` target is only faster than the ``"cpu"`` target if the loop over
+    the non-core dimensions is long enough to outweigh the costs of distributing the
+    work to threads. Thus, each call is dispatched by the length of the loop.
+
+    The threshold is calibrated with the first call whose loop is longer than
+    :data:`MIN_LOOP_LENGTH_FOR_PARALLEL_TARGET` by timing both targets on increasing
+    subsets of the inputs. The thresholds are cached in
+    :data:`~respy.config.KERNEL_THRESHOLDS_PATH` per kernel, data types of the inputs
+    and number of threads.
+
+    If Numba may only use a single thread, e.g., within a worker of
+    :func:`~respy.parallelization.execution_backend`, the ``"cpu"`` target is used. See
+    :func:`~respy.parallelization.limit_threads` to set the number of threads.
+
+    Parameters
+    ----------
+    signatures : list of str
+        Signatures passed to :func:`numba.guvectorize`.
+    layout : str
+        Layout passed to :func:`numba.guvectorize`.
+    **kwargs
+        Additional keyword arguments passed to :func:`numba.guvectorize`.
+
+    """
+
+    def decorator_guvectorize_with_target_selection(func):
+        return _TargetSelectingGufunc(func, signatures, layout, kwargs)
+
+    return decorator_guvectorize_with_target_selection
+
+
+class _TargetSelectingGufunc:
+    """Generalized ufunc which selects the compilation target by the size of inputs."""
+
+    def __init__(self, func, signatures, layout, kwargs):
+        functools.update_wrapper(self, func)
+        self.signatures = signatures
+        self.layout = layout
+        self.kwargs = kwargs
+        self.name = f"{func.__module__}.{func.__qualname__}"
+
+        inputs = layout.split("->")[0]
+        self.core_ndims = [
+            len([dim for dim in core.split(",") if dim.strip()])
+            for core in re.findall(r"\(([^)]*)\)", inputs)
+        ]
+        self._ufuncs = {}
+        self._lock = threading.Lock()
+
+    def __reduce__(self):
+        """Pickle the kernel by reference to compile it again in other processes."""
+        return _import_kernel, (self.__module__, self.__qualname__)
+
+    def __call__(self, *args, **kwargs):
+        target = self.select_target(*args[: len(self.core_ndims)])
+        return self.get_ufunc(target)(*args, **kwargs)
+
+    def get_ufunc(self, target):
+        """Get the generalized ufunc compiled for the target."""
+        with self._lock:
+            if target not in self._ufuncs:
+                self._ufuncs[target] = nb.guvectorize(
+                    self.signatures, self.layout, target=target, **self.kwargs
+                )(self.__wrapped__)
+
+        return self._ufuncs[target]
+
+    def select_target(self, *inputs):
+        """Select the target for the inputs."""
+        loop_shape = self._get_loop_shape(inputs)
+        loop_length = int(np.prod(loop_shape))
+
+        if (
+            loop_length < MIN_LOOP_LENGTH_FOR_PARALLEL_TARGET
+            or nb.get_num_threads() == 1
+        ):
+            target = "cpu"
+        else:
+            threshold = self._get_threshold(inputs, loop_shape)
+            target = (
+                "parallel"
+                if threshold is not None and loop_length >= threshold
+                else "cpu"
+            )
+
+        return target
+
+    def _get_loop_shape(self, inputs):
+        loop_shapes = [
+            np.shape(input_)[: np.ndim(input_) - core_ndim]
+            for input_, core_ndim in zip(inputs, self.core_ndims)
+        ]
+        return np.broadcast_shapes(*loop_shapes)
+
+    def _get_threshold(self, inputs, loop_shape):
+        """Get the threshold from the cache or calibrate it with the inputs.
+
+        If the ``"parallel"`` target has not been faster for any subset of inputs, the
+        threshold is unknown and recalibrated with inputs which are at least four times
+        larger.
+
+        """
+        dtypes = ",".join(np.asarray(input_).dtype.name for input_ in inputs)
+        key = f"{self.name}|{dtypes}|{nb.get_num_threads()}"
+        loop_length = int(np.prod(loop_shape))
+
+        with _KERNEL_THRESHOLDS_LOCK:
+            if not _KERNEL_THRESHOLDS:
+                _KERNEL_THRESHOLDS.update(_load_kernel_thresholds())
+            entry = _KERNEL_THRESHOLDS.get(key)
+
+        if entry is None or (
+            entry["threshold"] is None and loop_length >= 4 * entry["calibrated_up_to"]
+        ):
+            entry = {
+                "threshold": self._calibrate_threshold(inputs, loop_shape),
+                "calibrated_up_to": loop_length,
+            }
+            with _KERNEL_THRESHOLDS_LOCK:
+                _KERNEL_THRESHOLDS[key] = entry
+                _dump_kernel_thresholds(_KERNEL_THRESHOLDS)
+
+        return entry["threshold"]
+
+    def _calibrate_threshold(self, inputs, loop_shape):
+        """Find the smallest loop length for which the parallel target is faster.
+
+        The inputs are sliced along the first loop dimension. Both targets compute the
+        same values such that the results do not depend on the calibration.
+
+        """
+        n_rows = loop_shape[0]
+        n_elements_per_row = int(np.prod(loop_shape[1:]))
+        n_rows_subset = max(
+            MIN_LOOP_LENGTH_FOR_PARALLEL_TARGET // n_elements_per_row, 1
+        )
+
+        threshold = None
+        while threshold is None and n_rows_subset <= n_rows:
+            subset = [
+                input_[:n_rows_subset]
+                if np.ndim(input_) - core_ndim == len(loop_shape)
+                and np.shape(input_)[0] == n_rows
+                else input_
+                for input_, core_ndim in zip(inputs, self.core_ndims)
+            ]
+            durations = {
+                target: _time_function(self.get_ufunc(target), subset)
+                for target in ["cpu", "parallel"]
+            }
+            if durations["parallel"] < durations["cpu"]:
+                threshold = n_rows_subset * n_elements_per_row
+            n_rows_subset *= 2
+
+        return threshold
+
+
+def _import_kernel(module, qualname):
+    return getattr(importlib.import_module(module), qualname)
+
+
+def _time_function(func, args, n_repetitions=3):
+    """Return the fastest of multiple runs after a warm-up run."""
+    func(*args)
+    durations = []
+    for _ in range(n_repetitions):
+        start = time.perf_counter()
+        func(*args)
+        durations.append(time.perf_counter() - start)
+
+    return min(durations)
+
+
+def _load_kernel_thresholds():
+    try:
+        thresholds = json.loads(KERNEL_THRESHOLDS_PATH.read_text())
+    except (OSError, ValueError):
+        thresholds = {}
+
+    return thresholds
+
+
+def _dump_kernel_thresholds(thresholds):
+    try:
+        KERNEL_THRESHOLDS_PATH.parent.mkdir(parents=True, exist_ok=True)
+        KERNEL_THRESHOLDS_PATH.write_text(json.dumps(thresholds, indent=4))
+    except OSError:
+        pass
@@ -1,8 +1,8 @@
 """Everything related to conditional draws for the maximum likelihood estimation."""
 import numpy as np
 from estimagic.optimization.utilities import robust_cholesky
-from numba import guvectorize
 
+from respy._numba import guvectorize_with_target_selection
 from respy.config import MAX_FLOAT
 from respy.config import MAX_LOG_FLOAT
 
@@ -85,7 +85,7 @@ def create_draws_and_log_prob_wages(
     return draws, log_prob_wages
 
 
-@guvectorize(
+@guvectorize_with_target_selection(
     ["f8, f8, f8[:, :], u2, f8[:], f8[:], f8[:]"],
     "(), (), (n_choices, n_choices), (), (n_wages) -> (n_choices), ()",
     nopython=True,
@@ -274,8 +274,11 @@ def update_cholcov(shocks_cholesky, n_wages):
     return updated_chols
 
 
-@guvectorize(
-    ["f8[:, :], f8[:], f8[:, :, :], u2, f8, f8[:, :]"],
+@guvectorize_with_target_selection(
+    [
+        "f4[:, :], f8[:], f8[:, :, :], u2, f8, f4[:, :]",
+        "f8[:, :], f8[:], f8[:, :, :], u2, f8, f8[:, :]",
+    ],
     "(n_draws, n_choices), (n_choices), (n_wages_plus_one, n_choices, n_choices), (), "
     "() -> (n_draws, n_choices)",
     nopython=True,
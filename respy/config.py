@@ -1,4 +1,5 @@
 """General configuration for respy."""
+import os
 from pathlib import Path
 
 import numpy as np
@@ -11,6 +12,19 @@ ROOT_DIR = Path(__file__).parent
 TEST_DIR = ROOT_DIR / "tests"
 TEST_RESOURCES_DIR = ROOT_DIR / "tests" / "resources"
 
+KERNEL_THRESHOLDS_PATH = Path(
+    os.environ.get(
+        "RESPY_KERNEL_THRESHOLDS_PATH",
+        Path.home() / ".cache" / "respy" / "kernel_thresholds.json",
+    )
+)
+"""pathlib.Path : File with the calibrated thresholds for the parallel target.
+
+The thresholds are machine-specific. Set the environment variable
+``RESPY_KERNEL_THRESHOLDS_PATH`` to use another location.
+
+"""
+
 # Set maximum numbers to 1e200 and log(1e200) = 460.
 MAX_FLOAT = 1e200
 MIN_FLOAT = -MAX_FLOAT
@@ -47,6 +61,60 @@ TOL_REGRESSION_TESTS = 1e-10
 
 SEED_STARTUP_ITERATION_GAP = 1_000_000
 
+SOBOL_N_BITS = 30
+"""int : Number of bits of the direction numbers of the Sobol sequence."""
+SOBOL_PARAMETERS = (
+    (1, (1,)),
+    (3, (1,)),
+    (7, (1, 1)),
+    (11, (1, 3, 7)),
+    (13, (1, 1, 5)),
+    (19, (1, 3, 1, 1)),
+    (25, (1, 1, 3, 7)),
+    (37, (1, 3, 3, 9, 9)),
+    (59, (1, 3, 7, 13, 3)),
+    (47, (1, 1, 5, 11, 27)),
+    (61, (1, 3, 5, 1, 15)),
+    (55, (1, 1, 7, 3, 29)),
+    (41, (1, 3, 7, 7, 21)),
+    (67, (1, 1, 1, 9, 23, 37)),
+    (97, (1, 3, 3, 5, 19, 33)),
+    (91, (1, 1, 3, 13, 11, 7)),
+    (109, (1, 1, 7, 13, 25, 5)),
+    (103, (1, 3, 5, 11, 7, 11)),
+    (115, (1, 1, 1, 3, 13, 39)),
+    (131, (1, 3, 1, 15, 17, 63, 13)),
+    (193, (1, 1, 5, 5, 1, 27, 33)),
+    (137, (1, 3, 3, 3, 25, 17, 115)),
+    (145, (1, 1, 3, 15, 29, 15, 41)),
+    (143, (1, 3, 1, 7, 3, 23, 79)),
+    (241, (1, 3, 7, 9, 31, 29, 17)),
+    (157, (1, 1, 5, 13, 11, 3, 29)),
+    (185, (1, 3, 1, 9, 5, 21, 119)),
+    (167, (1, 1, 3, 1, 23, 13, 75)),
+    (229, (1, 3, 3, 11, 27, 31, 73)),
+    (171, (1, 1, 7, 7, 19, 25, 105)),
+    (213, (1, 3, 5, 5, 21, 9, 7)),
+    (191, (1, 1, 1, 15, 5, 49, 59)),
+    (253, (1, 1, 1, 1, 1, 33, 65)),
+    (203, (1, 3, 5, 15, 17, 19, 21)),
+    (211, (1, 1, 7, 11, 13, 29, 3)),
+    (239, (1, 3, 7, 5, 7, 11, 113)),
+    (247, (1, 1, 5, 3, 15, 19, 61)),
+    (285, (1, 3, 1, 1, 9, 27, 89, 7)),
+    (369, (1, 1, 3, 7, 31, 15, 45, 23)),
+    (299, (1, 3, 3, 9, 9, 25, 107, 39)),
+)
+"""tuple : Primitive polynomial and initial direction numbers of each Sobol dimension.
+
+The polynomials are in binary representation. The parameters are taken from Bratley, P.,
+& Fox, B. L. (1988). Algorithm 659: Implementing Sobol's quasirandom sequence generator.
+*ACM Transactions on Mathematical Software (TOMS)*, 14(1), 88-100.
+
+"""
+QMC_CHUNK_SIZE = 2 ** 16
+"""int : Number of points of scrambled quasi-random sequences generated at once."""
+
 DEFAULT_OPTIONS = {
     "estimation_draws": 200,
     "estimation_seed": 1,
@@ -59,6 +127,24 @@ DEFAULT_OPTIONS = {
     "core_state_space_filters": [],
     "negative_choice_set": {},
     "monte_carlo_sequence": "sobol",
+    "monte_carlo_antithetic": False,
+    "monte_carlo_scramble": False,
+    "solution_integration": "monte_carlo",
+    "solution_quadrature_level": 3,
+    "solution_closed_form_emax": False,
+    "solution_emax_tolerance": None,
+    "solution_emax_block_size": 100,
+    "solution_control_variate": False,
+    "solution_pipelining": False,
+    "solution_time_budget": None,
+    "solution_period_kernel": False,
+    "floating_point_dtype": "float64",
+    "parallelization_backend": "serial",
+    "parallelization_n_jobs": 1,
+    "parallelization_n_threads": None,
+    "parallelization_scheduler_address": None,
+    "dense_key_batch_size": 1_000,
+    "memoization_maxsize": 0,
     "cache_compression": "snappy",
 }
 
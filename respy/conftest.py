@@ -6,6 +6,7 @@ import pandas as pd
 import pytest
 
 import respy as rp
+import respy._numba
 
 
 @pytest.fixture(autouse=True)
@@ -14,6 +15,18 @@ def _fresh_directory(tmp_path):
     os.chdir(tmp_path)
 
 
+@pytest.fixture(autouse=True, scope="session")
+def _temporary_kernel_thresholds(tmp_path_factory):
+    """Calibrate the thresholds of kernels without touching the user's cache."""
+    with pytest.MonkeyPatch.context() as monkeypatch:
+        monkeypatch.setattr(
+            respy._numba,
+            "KERNEL_THRESHOLDS_PATH",
+            tmp_path_factory.mktemp("kernel_thresholds") / "kernel_thresholds.json",
+        )
+        yield
+
+
 @pytest.fixture(autouse=True)
 def _patch_doctest_namespace(doctest_namespace):
     """Patch the namespace for doctests.
@@ -0,0 +1,746 @@
+"""Everything related to the analytic gradient of the log likelihood."""
+from functools import partial
+
+import numpy as np
+import pandas as pd
+from scipy import special
+
+from respy._numba import guvectorize_with_target_selection
+from respy.conditional_draws import create_draws_and_log_prob_wages
+from respy.config import MAX_FLOAT
+from respy.config import MAX_LOG_FLOAT
+from respy.likelihood import _compute_log_type_probabilities
+from respy.likelihood import _logsumexp
+from respy.likelihood import _map_choice_codes_to_indices_of_valid_choice_set
+from respy.likelihood import get_log_like_func
+from respy.parallelization import parallelize_across_dense_dimensions
+from respy.parallelization import use_execution_backend_from_options
+from respy.pre_processing.model_processing import process_params_and_options
+from respy.pre_processing.process_covariates import identify_necessary_covariates
+from respy.shared import aggregate_keane_wolpin_utility
+from respy.shared import compute_covariates
+from respy.shared import load_objects
+from respy.shared import select_valid_choices
+from respy.shared import subset_cholesky_factor_to_choice_set
+from respy.shared import transform_base_draws_of_choice_sets
+from respy.solve import _is_period_interpolated
+
+NUMERICAL_DERIVATIVE_CATEGORIES = [
+    "delta",
+    "beta",
+    "shocks_sdcorr",
+    "shocks_cov",
+    "shocks_chol",
+    "meas_error",
+]
+"""list: Parameter categories whose derivatives are computed numerically.
+
+The conditional draws in the likelihood depend on the Cholesky factors of the
+conditional covariance matrices which are computed with QR decompositions or robust
+Cholesky decompositions. Instead of differentiating these decompositions, the
+derivatives of the parameters of shocks, measurement errors and discounting are
+computed with central differences.
+
+"""
+
+
+def get_log_like_gradient_func(params, options, df, solution=None):
+    """Get the gradient of the criterion function for maximum likelihood estimation.
+
+    The returned function computes the gradient of the mean log likelihood returned by
+    :func:`~respy.likelihood.get_log_like_func` with ``return_scalar=True``.
+
+    The derivatives with respect to the parameters of wages, non-pecuniary rewards,
+    including type shifts, and type probabilities are computed analytically. For this,
+    the derivatives are propagated forward through the rewards and the expected value
+    functions during the backward induction and through the smoothed choice
+    probabilities and wage densities of the likelihood. The costs are a constant
+    multiple of a single evaluation of the likelihood instead of two evaluations per
+    parameter for central differences.
+
+    Derivatives with respect to the parameters in
+    :data:`NUMERICAL_DERIVATIVE_CATEGORIES` are computed with central differences. All
+    other parameters, e.g., initial experiences, lagged choices and observables, do not
+    enter the likelihood and their derivatives are zero.
+
+    Parameters
+    ----------
+    params : pandas.DataFrame
+        DataFrame containing model parameters.
+    options : dict
+        Dictionary containing model options.
+    df : pandas.DataFrame
+        The model is fit to this dataset.
+    solution : :class:`~respy.state_space.StateSpace`, default None
+        A solved state space, e.g., from :func:`~respy.solve.load_solution`, which is
+        re-used instead of solving the model again for the same parameters.
+
+    Returns
+    -------
+    gradient_function : :func:`log_like_gradient`
+        Gradient function where all arguments except the parameter vector are set.
+
+    Raises
+    ------
+    NotImplementedError
+        If the model has exogenous processes, uses interpolation, the closed-form
+        solution of the expected value functions or an adaptive number of draws.
+
+    Examples
+    --------
+    >>> import respy as rp
+    >>> params, options, data = rp.get_example_model("robinson_crusoe_basic")
+    >>> log_like_gradient = rp.get_log_like_gradient_func(params, options, data)
+    >>> gradient = log_like_gradient(params)
+    >>> gradient.index.equals(params.index)
+    True
+
+    """
+    # The gradient is computed per dense key and period. Thus, the observations of
+    # small dense keys are not batched.
+    log_like = get_log_like_func(
+        params, {**options, "dense_key_batch_size": 0}, df, solution=solution
+    )
+    solve = log_like.keywords["solve"]
+    state_space = solve.keywords["state_space"]
+
+    optim_paras, options = process_params_and_options(params, options)
+
+    if optim_paras["exogenous_processes"]:
+        raise NotImplementedError(
+            "The analytic gradient is not available for models with exogenous "
+            "processes."
+        )
+    if (
+        options["solution_closed_form_emax"]
+        or options["solution_emax_tolerance"] is not None
+        or options["solution_control_variate"]
+    ):
+        raise NotImplementedError(
+            "The analytic gradient is only available for the expected value functions "
+            "computed with a fixed number of draws."
+        )
+    if any(
+        _is_period_interpolated(state_space, period, options)
+        for period in range(options["n_periods"])
+    ):
+        raise NotImplementedError(
+            "The analytic gradient is not available for models with interpolation."
+        )
+
+    gradient_function = partial(
+        log_like_gradient,
+        df=log_like.keywords["df"],
+        base_draws_est=log_like.keywords["base_draws_est"],
+        solve=solve,
+        type_covariates=log_like.keywords["type_covariates"],
+        options=log_like.keywords["options"],
+        log_like=log_like,
+    )
+
+    return gradient_function
+
+
+@use_execution_backend_from_options
+def log_like_gradient(
+    params, df, base_draws_est, solve, type_covariates, options, log_like
+):
+    """Gradient of the criterion function for the likelihood maximization.
+
+    Parameters
+    ----------
+    params : pandas.DataFrame or pandas.Series
+        Parameter vector.
+    df : pandas.DataFrame
+        The DataFrame contains choices, log wages, the indices of the states for the
+        different types.
+    base_draws_est : dict
+        Maps dense keys to the draws to simulate the likelihood of observations.
+    solve : :func:`~respy.solve.solve`
+        Function which solves the model with new parameters.
+    type_covariates : pandas.DataFrame or None
+        If the model includes types, this is a :class:`pandas.DataFrame` containing the
+        covariates to compute the type probabilities.
+    options : dict
+        Contains model options.
+    log_like : :func:`~respy.likelihood.log_like`
+        Criterion function which is used for the numerical derivatives.
+
+    Returns
+    -------
+    gradient : pandas.Series
+        Derivatives of the mean log likelihood with the same index as ``params``.
+
+    """
+    optim_paras, options = process_params_and_options(params, options)
+
+    state_space = solve(params)
+
+    values = params["value"] if isinstance(params, pd.DataFrame) else params
+    gradient = pd.Series(0.0, index=values.index, name="gradient")
+
+    categories = values.index.get_level_values("category")
+    is_reward_parameter = categories.isin(
+        [f"wage_{choice}" for choice in optim_paras["choices_w_wage"]]
+        + [f"nonpec_{choice}" for choice in optim_paras["choices"]]
+    )
+    directions = list(values.index[is_reward_parameter])
+
+    loglikes, tangents = _compute_tangents_with_backward_induction(
+        state_space, df, base_draws_est, directions, optim_paras, options
+    )
+
+    identifiers = df.index.get_level_values("identifier").to_numpy()
+    types = df["type"].to_numpy() if optim_paras["n_types"] >= 2 else np.zeros(len(df))
+    per_individual_loglikes = (
+        pd.Series(loglikes).groupby([identifiers, types]).sum().unstack().to_numpy()
+    )
+    per_individual_tangents = (
+        pd.DataFrame(tangents).groupby([identifiers, types]).sum().to_numpy()
+    ).reshape(*per_individual_loglikes.shape, len(directions))
+
+    if optim_paras["n_types"] >= 2:
+        # The type covariates contain the first observation of each individual once
+        # for every type.
+        type_covariates = type_covariates.loc[
+            ~type_covariates.index.duplicated()
+        ].sort_index()
+        log_type_probabilities = _compute_log_type_probabilities(
+            type_covariates.copy(), optim_paras, options
+        )
+        weighted_loglikes = per_individual_loglikes + log_type_probabilities.to_numpy()
+        type_weights = special.softmax(weighted_loglikes, axis=1)
+        type_probabilities = np.exp(log_type_probabilities.to_numpy())
+
+        gradient.loc[directions] = np.einsum(
+            "it,itk->k", type_weights, per_individual_tangents
+        ) / len(type_weights)
+
+        for type_ in range(1, optim_paras["n_types"]):
+            relevant_covariates = identify_necessary_covariates(
+                optim_paras["type_prob"][type_].index, options["covariates_all"]
+            )
+            covariates = compute_covariates(
+                type_covariates.assign(type=type_), relevant_covariates
+            )
+            # The derivative of the log likelihood of an individual with respect to a
+            # type coefficient is the covariate times the difference between the
+            # posterior and the prior probability of the type.
+            difference = type_weights[:, type_] - type_probabilities[:, type_]
+            for covariate in optim_paras["type_prob"][type_].index:
+                gradient.loc[(f"type_{type_}", covariate)] = np.mean(
+                    covariates[covariate].to_numpy() * difference
+                )
+    else:
+        gradient.loc[directions] = per_individual_tangents[:, 0].mean(axis=0)
+
+    is_numerical = categories.isin(NUMERICAL_DERIVATIVE_CATEGORIES)
+    for label in values.index[is_numerical]:
+        gradient.loc[label] = _compute_central_difference(params, label, log_like)
+
+    return gradient
+
+
+def _compute_tangents_with_backward_induction(
+    state_space, df, base_draws_est, directions, optim_paras, options
+):
+    """Compute the derivatives of the log likelihood contributions of all observations.
+
+    The derivatives of the expected value functions with respect to the parameters in
+    ``directions`` are propagated backwards through the periods like the expected value
+    functions. In each period, the derivatives of the continuation values are also used
+    to compute the derivatives of the log likelihood contributions of the observations
+    in this period.
+
+    Returns
+    -------
+    loglikes : numpy.ndarray
+        Array with shape (n_observations,) containing the log likelihood contributions
+        of the rows in ``df``.
+    tangents : numpy.ndarray
+        Array with shape (n_observations, n_directions) containing the derivatives of
+        the log likelihood contributions.
+
+    """
+    n_directions = len(directions)
+
+    draws_emax_risk = transform_base_draws_of_choice_sets(
+        state_space.base_draws_sol,
+        state_space.dense_key_to_complex,
+        optim_paras["shocks_cholesky"],
+        optim_paras,
+    )
+
+    expected_value_function_tangents = {
+        dense_key: np.zeros((len(indices), n_directions))
+        for dense_key, indices in state_space.dense_key_to_core_indices.items()
+    }
+
+    df = df.assign(row=np.arange(len(df)))
+    dense_key_to_df = {key: group for key, group in df.groupby("dense_key")}
+
+    loglikes = np.zeros(len(df))
+    tangents = np.zeros((len(df), n_directions))
+
+    for period in reversed(range(options["n_periods"])):
+        dense_keys_in_period = state_space.get_dense_keys_from_period(period)
+        dense_key_to_complex = {
+            key: state_space.dense_key_to_complex[key] for key in dense_keys_in_period
+        }
+
+        continuation_values = state_space.get_continuation_values(
+            period, dense_keys_in_period
+        )
+        if optim_paras["delta"] == 0:
+            continuation_value_tangents = {
+                key: np.broadcast_to(0.0, (len(value), n_directions, value.shape[1]))
+                for key, value in continuation_values.items()
+            }
+        else:
+            continuation_value_tangents = state_space.get_continuation_values(
+                period, dense_keys_in_period, expected_value_function_tangents
+            )
+
+        period_dense_key_to_df = {
+            key: dense_key_to_df[key]
+            for key in dense_keys_in_period
+            if key in dense_key_to_df
+        }
+        if period_dense_key_to_df:
+            period_loglikes, period_tangents = _compute_log_likelihood_and_tangents(
+                period_dense_key_to_df,
+                base_draws_est,
+                dense_key_to_complex,
+                state_space.wages,
+                state_space.nonpecs,
+                continuation_values,
+                continuation_value_tangents,
+                state_space.dense_key_to_choice_set,
+                directions,
+                optim_paras,
+                options,
+            )
+            for key, value in period_loglikes.items():
+                rows = dense_key_to_df[key]["row"].to_numpy()
+                loglikes[rows] = value
+                tangents[rows] = period_tangents[key]
+
+        if optim_paras["delta"] != 0 and n_directions:
+            period_expected_value_function_tangents = (
+                _compute_tangents_of_expected_value_functions(
+                    dense_key_to_complex,
+                    state_space.wages,
+                    state_space.nonpecs,
+                    continuation_values,
+                    continuation_value_tangents,
+                    draws_emax_risk,
+                    state_space.weights_sol,
+                    state_space.dense_key_to_choice_set,
+                    directions,
+                    optim_paras,
+                    options,
+                )
+            )
+            for key, value in period_expected_value_function_tangents.items():
+                expected_value_function_tangents[key][:] = value
+
+    return loglikes, tangents
+
+
+def _estimate_cost_of_tangents_of_expected_value_functions(
+    complex_, wages, nonpecs, continuation_values, continuation_value_tangents, *args
+):
+    """Estimate the cost with the size of the tangents of the continuation values."""
+    return continuation_value_tangents.size
+
+
+@parallelize_across_dense_dimensions(
+    cost=_estimate_cost_of_tangents_of_expected_value_functions
+)
+def _compute_tangents_of_expected_value_functions(
+    complex_,
+    wages,
+    nonpecs,
+    continuation_values,
+    continuation_value_tangents,
+    draws,
+    weights,
+    choice_set,
+    directions,
+    optim_paras,
+    options,
+):
+    """Compute the derivatives of the expected value functions of a dense key.
+
+    The expected value function is the weighted mean of the maximum value function over
+    the draws. Its derivative is the weighted mean of the derivative of the maximal
+    value function of each draw which is the sum of the derivatives of the wage, the
+    non-pecuniary reward and the discounted continuation value of the maximal choice.
+
+    Returns
+    -------
+    tangents : numpy.ndarray
+        Array with shape (n_states, n_directions).
+
+    """
+    states = load_objects("states", complex_, options)
+    wages = wages.astype(np.float64, copy=False)
+
+    maximum_weights, maximum_draw_weights = _calculate_weights_of_maximal_choices(
+        wages,
+        nonpecs.astype(np.float64, copy=False),
+        continuation_values.astype(np.float64, copy=False),
+        draws,
+        weights,
+        optim_paras["delta"],
+    )
+
+    tangents = optim_paras["delta"] * np.einsum(
+        "nj,nkj->nk", maximum_weights, continuation_value_tangents
+    )
+    tangents += _compute_tangents_of_rewards(
+        states,
+        maximum_draw_weights * wages,
+        maximum_weights,
+        choice_set,
+        directions,
+        optim_paras,
+    )
+
+    return tangents
+
+
+@parallelize_across_dense_dimensions
+def _compute_log_likelihood_and_tangents(
+    df,
+    base_draws_est,
+    complex_,
+    wages,
+    nonpecs,
+    continuation_values,
+    continuation_value_tangents,
+    choice_set,
+    directions,
+    optim_paras,
+    options,
+):
+    """Compute the log likelihood contributions and their derivatives of a dense key.
+
+    The wage and choice log likelihoods are computed like in
+    :func:`~respy.likelihood._compute_wage_and_choice_log_likelihood_contributions`.
+    The derivative of the smoothed log probability of the observed choice is expressed
+    with the sensitivities of the log probability with respect to the flow utilities
+    of each choice. The observed wage affects the derivatives through the log wage
+    density and the means of the conditional draws.
+
+    Returns
+    -------
+    loglikes : numpy.ndarray
+        Array with shape (n_observations,).
+    tangents : numpy.ndarray
+        Array with shape (n_observations, n_directions).
+
+    """
+    n_wages = len(select_valid_choices(optim_paras["choices_w_wage"], choice_set))
+
+    indices = df["core_index"].to_numpy()
+
+    selected_wages = wages[indices].astype(np.float64)
+    log_wages_observed = df["log_wage"].to_numpy()
+
+    choices = _map_choice_codes_to_indices_of_valid_choice_set(
+        df["choice"].to_numpy(), choice_set
+    )
+
+    shocks_cholesky = subset_cholesky_factor_to_choice_set(
+        optim_paras["shocks_cholesky"], choice_set
+    )
+
+    draws, wage_loglikes = create_draws_and_log_prob_wages(
+        log_wages_observed,
+        selected_wages,
+        base_draws_est,
+        choices,
+        shocks_cholesky,
+        n_wages,
+        optim_paras["meas_error"],
+        optim_paras["has_meas_error"],
+    )
+
+    n_observations, n_choices = selected_wages.shape
+    draws = draws.reshape(n_observations, -1, n_choices).astype(np.float64)
+
+    (
+        choice_loglikes,
+        sensitivities,
+        draw_sensitivities,
+        unclipped_draw_sensitivities,
+    ) = _simulate_sensitivities_of_log_probability_of_observed_choice(
+        selected_wages,
+        nonpecs[indices].astype(np.float64),
+        continuation_values[indices].astype(np.float64),
+        draws,
+        optim_paras["beta_delta"],
+        choices,
+        options["estimation_tau"],
+        n_wages,
+        np.exp(MAX_LOG_FLOAT),
+    )
+
+    # Changes of the systematic log wage of the observed choice shift the observed
+    # shock which enters the wage density and the means of the conditional draws. The
+    # draws of choices with wages are exponentiated and clipped.
+    observed_wages = np.choose(choices, selected_wages.T)
+    is_wage_observed = (
+        np.isfinite(log_wages_observed)
+        & (choices < n_wages)
+        & (observed_wages > 1 / MAX_FLOAT)
+        & (observed_wages < MAX_FLOAT)
+    )
+    rows = np.flatnonzero(is_wage_observed)
+    observed_choices = choices[rows]
+
+    cov = shocks_cholesky @ shocks_cholesky.T
+    meas_sds = np.asarray(optim_paras["meas_error"])
+    sigma_squared = (
+        cov[observed_choices, observed_choices] + meas_sds[observed_choices] ** 2
+    )
+    shocks = log_wages_observed[rows] - np.log(selected_wages[rows, observed_choices])
+
+    mean_sensitivities = np.where(
+        np.arange(n_choices) < n_wages,
+        selected_wages * unclipped_draw_sensitivities,
+        sensitivities,
+    )
+    log_wage_sensitivities = (
+        shocks - (cov[observed_choices] * mean_sensitivities[rows]).sum(axis=1)
+    ) / sigma_squared
+
+    wage_weights = draw_sensitivities * selected_wages
+    wage_weights[rows, observed_choices] += log_wage_sensitivities
+
+    states = load_objects("states", complex_, options).iloc[indices]
+
+    tangents = optim_paras["beta_delta"] * np.einsum(
+        "nj,nkj->nk", sensitivities, continuation_value_tangents[indices]
+    )
+    tangents += _compute_tangents_of_rewards(
+        states, wage_weights, sensitivities, choice_set, directions, optim_paras
+    )
+
+    loglikes = choice_loglikes + wage_loglikes
+
+    return loglikes, tangents
+
+
+def _compute_tangents_of_rewards(
+    states, wage_weights, nonpec_weights, choice_set, directions, optim_paras
+):
+    """Compute the weighted derivatives of the rewards.
+
+    Each parameter in ``directions`` is the coefficient of a covariate in the log wage
+    or in the non-pecuniary reward of a single choice. Thus, the derivative of the wage
+    is the wage times the covariate and the derivative of the non-pecuniary reward is
+    the covariate. For efficiency, ``wage_weights`` already contain the wages.
+
+    Parameters
+    ----------
+    states : pandas.DataFrame
+        States with the covariates.
+    wage_weights : numpy.ndarray
+        Array with shape (n_states, n_choices) containing the weights of the log wages.
+    nonpec_weights : numpy.ndarray
+        Array with shape (n_states, n_choices) containing the weights of the
+        non-pecuniary rewards.
+    choice_set : tuple
+        Boolean indicators for the available choices.
+    directions : list
+        List of parameter labels.
+    optim_paras : dict
+
+    Returns
+    -------
+    tangents : numpy.ndarray
+        Array with shape (n_states, n_directions).
+
+    """
+    choices = select_valid_choices(optim_paras["choices"], choice_set)
+
+    tangents = np.zeros((len(states), len(directions)))
+    for i, (category, name) in enumerate(directions):
+        kind, choice = category.split("_", 1)
+        if choice in choices:
+            weights = wage_weights if kind == "wage" else nonpec_weights
+            tangents[:, i] = weights[:, choices.index(choice)] * states[name].to_numpy()
+
+    return tangents
+
+
+def _compute_central_difference(params, label, log_like):
+    """Compute the derivative of the log likelihood with central differences."""
+    values = params["value"] if isinstance(params, pd.DataFrame) else params
+    step = np.finfo(float).eps ** (1 / 3) * max(abs(values.loc[label]), 0.1)
+
+    function_values = []
+    for sign in [1, -1]:
+        params_ = params.copy()
+        if isinstance(params, pd.DataFrame):
+            params_.loc[label, "value"] += sign * step
+        else:
+            params_.loc[label] += sign * step
+        function_values.append(log_like(params_))
+
+    return (function_values[0] - function_values[1]) / (2 * step)
+
+
+@guvectorize_with_target_selection(
+    ["f8[:], f8[:], f8[:], f8[:, :], f8[:], f8, f8[:], f8[:]"],
+    "(n_choices), (n_choices), (n_choices), (n_draws, n_choices), (n_draws), () "
+    "-> (n_choices), (n_choices)",
+    nopython=True,
+)
+def _calculate_weights_of_maximal_choices(
+    wages,
+    nonpecs,
+    continuation_values,
+    draws,
+    weights,
+    delta,
+    maximum_weights,
+    maximum_draw_weights,
+):
+    """Calculate the weights of draws for which a choice has the maximum value.
+
+    Like in :func:`~respy.shared.calculate_expected_value_functions`, the maximum is
+    bounded from below by zero. Draws for which no value function is positive do not
+    contribute to the weights.
+
+    Returns
+    -------
+    maximum_weights : numpy.ndarray
+        Array with shape (n_choices,) containing the normalized sum of weights of draws
+        for which the choice is maximal.
+    maximum_draw_weights : numpy.ndarray
+        Array with shape (n_choices,) containing the normalized sum of weights times
+        draws for which the choice is maximal.
+
+    """
+    n_draws, n_choices = draws.shape
+
+    for j in range(n_choices):
+        maximum_weights[j] = 0
+        maximum_draw_weights[j] = 0
+    sum_weights = 0
+
+    for i in range(n_draws):
+        max_value_functions = 0
+        max_choice = -1
+
+        for j in range(n_choices):
+            value_function, _ = aggregate_keane_wolpin_utility(
+                wages[j], nonpecs[j], continuation_values[j], draws[i, j], delta
+            )
+
+            if value_function > max_value_functions:
+                max_value_functions = value_function
+                max_choice = j
+
+        if max_choice >= 0:
+            maximum_weights[max_choice] += weights[i]
+            maximum_draw_weights[max_choice] += weights[i] * draws[i, max_choice]
+        sum_weights += weights[i]
+
+    for j in range(n_choices):
+        maximum_weights[j] /= sum_weights
+        maximum_draw_weights[j] /= sum_weights
+
+
+@guvectorize_with_target_selection(
+    ["f8[:], f8[:], f8[:], f8[:, :], f8, i8, f8, i8, f8, f8[:], f8[:], f8[:], f8[:]"],
+    "(n_choices), (n_choices), (n_choices), (n_draws, n_choices), (), (), (), (), () "
+    "-> (), (n_choices), (n_choices), (n_choices)",
+    nopython=True,
+)
+def _simulate_sensitivities_of_log_probability_of_observed_choice(
+    wages,
+    nonpec,
+    continuation_values,
+    draws,
+    delta,
+    choice,
+    tau,
+    n_wages,
+    max_draw,
+    smoothed_log_probability,
+    sensitivities,
+    draw_sensitivities,
+    unclipped_draw_sensitivities,
+):
+    r"""Simulate the log probability of the observed choice and its sensitivities.
+
+    The smoothed log probability is computed like in
+    :func:`~respy.likelihood._simulate_log_probability_of_individuals_observed_choice`.
+    The derivative of the log probability of draw :math:`i` with respect to the value
+    function of choice :math:`j` is :math:`(1_{j = c} - p_{ij}) / \tau` where :math:`c`
+    is the observed choice and :math:`p_{ij}` the smoothed choice probability. The
+    derivative of the log of the mean probability weights the draws with their share
+    in the mean probability.
+
+    Returns
+    -------
+    smoothed_log_probability : float
+        Simulated smoothed log probability of the observed choice.
+    sensitivities : numpy.ndarray
+        Array with shape (n_choices,) containing the derivatives with respect to the
+        value functions.
+    draw_sensitivities : numpy.ndarray
+        Array with shape (n_choices,) containing the derivatives with respect to the
+        value functions weighted with the draws.
+    unclipped_draw_sensitivities : numpy.ndarray
+        Same as ``draw_sensitivities``, but only for choices with wages and draws which
+        are not clipped.
+
+    """
+    n_draws, n_choices = draws.shape
+
+    smoothed_log_probabilities = np.empty(n_draws)
+    smoothed_value_functions = np.empty(n_choices)
+
+    for i in range(n_draws):
+        for j in range(n_choices):
+            value_function, _ = aggregate_keane_wolpin_utility(
+                wages[j], nonpec[j], continuation_values[j], draws[i, j], delta
+            )
+            smoothed_value_functions[j] = value_function / tau
+
+        smoothed_log_probabilities[i] = smoothed_value_functions[choice] - _logsumexp(
+            smoothed_value_functions
+        )
+
+    log_sum_probabilities = _logsumexp(smoothed_log_probabilities)
+    smoothed_log_probability[0] = log_sum_probabilities - np.log(n_draws)
+
+    for j in range(n_choices):
+        sensitivities[j] = 0
+        draw_sensitivities[j] = 0
+        unclipped_draw_sensitivities[j] = 0
+
+    for i in range(n_draws):
+        weight = np.exp(smoothed_log_probabilities[i] - log_sum_probabilities)
+
+        for j in range(n_choices):
+            value_function, _ = aggregate_keane_wolpin_utility(
+                wages[j], nonpec[j], continuation_values[j], draws[i, j], delta
+            )
+            smoothed_value_functions[j] = value_function / tau
+        log_sum_values = _logsumexp(smoothed_value_functions)
+
+        for j in range(n_choices):
+            probability = np.exp(smoothed_value_functions[j] - log_sum_values)
+            indicator = 1 if j == choice else 0
+            sensitivity = weight * (indicator - probability) / tau
+
+            sensitivities[j] += sensitivity
+            draw_sensitivities[j] += sensitivity * draws[i, j]
+            if j < n_wages and draws[i, j] < max_draw:
+                unclipped_draw_sensitivities[j] += sensitivity * draws[i, j]
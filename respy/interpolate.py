@@ -4,15 +4,16 @@ import warnings
 import numba as nb
 import numpy as np
 
-from respy.config import MAX_LOG_FLOAT
 from respy.parallelization import parallelize_across_dense_dimensions
 from respy.shared import calculate_expected_value_functions
 from respy.shared import calculate_value_functions_and_flow_utilities
+from respy.shared import compute_expected_shocks
 
 
 def kw_94_interpolation(
     state_space,
     period_draws_emax_risk,
+    period_weights,
     period,
     optim_paras,
     options,
@@ -112,6 +113,7 @@ def kw_94_interpolation(
         max_emax,
         not_interpolated,
         period_draws_emax_risk,
+        period_weights,
         optim_paras["delta"],
     )
 
@@ -219,9 +221,10 @@ def _get_not_interpolated_indicator(interpolation_points, n_states, seed):
         Array of shape (n_states,) indicating states which will not be interpolated.
 
     """
-    np.random.seed(seed)
+    # Use a local random state because dense keys might be processed in parallel.
+    random_state = np.random.RandomState(seed)
 
-    indices = np.random.choice(n_states, size=interpolation_points, replace=False)
+    indices = random_state.choice(n_states, size=interpolation_points, replace=False)
     not_interpolated = np.zeros(n_states, dtype="bool")
     not_interpolated[indices] = True
 
@@ -230,14 +233,8 @@ def _get_not_interpolated_indicator(interpolation_points, n_states, seed):
 
 def _compute_expected_shocks(dense_key_to_choice_set_in_period, optim_paras):
     """Compute an array with the expected value of the shocks."""
-    n_wages = len(optim_paras["choices_w_wage"])
-
-    exp_shocks = np.zeros(len(optim_paras["choices"]))
-    var = np.diag(optim_paras["shocks_cholesky"].dot(optim_paras["shocks_cholesky"].T))
-    exp_shocks[:n_wages] = np.exp(np.clip(var[:n_wages], 0, MAX_LOG_FLOAT) / 2)
-
     expected_shocks = {
-        dense_index: exp_shocks[np.array(choice_set)]
+        dense_index: compute_expected_shocks(choice_set, optim_paras)
         for dense_index, choice_set in dense_key_to_choice_set_in_period.items()
     }
 
@@ -297,6 +294,7 @@ def _compute_lhs_variable(
     max_value_functions,
     not_interpolated,
     draws,
+    weights,
     delta,
 ):
     """Calculate left-hand side variable for all states which are not interpolated.
@@ -321,6 +319,8 @@ def _compute_lhs_variable(
         continuation_values.
     draws : numpy.ndarray
         Array with shape (n_draws, n_choices) containing draws.
+    weights : numpy.ndarray
+        Array with shape (n_draws,) containing the weights of the draws.
     delta : float
         Discount factor.
 
@@ -330,6 +330,9 @@ def _compute_lhs_variable(
         nonpec[not_interpolated],
         continuation_values[not_interpolated],
         draws,
+        weights,
+        draws.min(axis=0),
+        draws.max(axis=0),
         delta,
     )
     endogenous = expected_value_functions - max_value_functions[not_interpolated]
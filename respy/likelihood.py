@@ -7,11 +7,15 @@ import numpy as np
 import pandas as pd
 from scipy import special
 
+from respy._numba import guvectorize_with_target_selection
 from respy.conditional_draws import create_draws_and_log_prob_wages
 from respy.config import MAX_FLOAT
 from respy.config import MIN_FLOAT
+from respy.parallelization import concatenate_batches
+from respy.parallelization import create_batches_of_small_dense_keys
 from respy.parallelization import parallelize_across_dense_dimensions
 from respy.parallelization import split_and_combine_df
+from respy.parallelization import use_execution_backend_from_options
 from respy.pre_processing.data_checking import check_estimation_data
 from respy.pre_processing.model_processing import process_params_and_options
 from respy.pre_processing.process_covariates import identify_necessary_covariates
@@ -19,9 +23,12 @@ from respy.shared import aggregate_keane_wolpin_utility
 from respy.shared import compute_covariates
 from respy.shared import convert_labeled_variables_to_codes
 from respy.shared import create_base_draws
+from respy.shared import create_memo
 from respy.shared import downcast_to_smallest_dtype
+from respy.shared import find_undominated_choices
 from respy.shared import generate_column_dtype_dict_for_estimation
 from respy.shared import map_observations_to_states
+from respy.shared import memoize_by_params_hash
 from respy.shared import pandas_dot
 from respy.shared import rename_labels_to_internal
 from respy.shared import select_valid_choices
@@ -29,7 +36,7 @@ from respy.shared import subset_cholesky_factor_to_choice_set
 from respy.solve import get_solve_func
 
 
-def get_log_like_func(params, options, df, return_scalar=True):
+def get_log_like_func(params, options, df, return_scalar=True, solution=None):
     """Get the criterion function for maximum likelihood estimation.
 
     Return a version of the likelihood functions in respy where all arguments
@@ -59,6 +66,9 @@ def get_log_like_func(params, options, df, return_scalar=True):
             - ``kind`` : Kind of contribution (e.g choice or wage).
             - ``type`` and `log_type_probability``: Will be included in models with
             types.
+    solution : :class:`~respy.state_space.StateSpace`, default None
+        A solved state space, e.g., from :func:`~respy.solve.load_solution`, which is
+        re-used instead of solving the model again for the same parameters.
 
     Returns
     -------
@@ -96,7 +106,7 @@ def get_log_like_func(params, options, df, return_scalar=True):
 
     check_estimation_data(df, optim_paras)
 
-    solve = get_solve_func(params, options)
+    solve = get_solve_func(params, options, solution)
     state_space = solve.keywords["state_space"]
 
     df, type_covariates = _process_estimation_data(
@@ -111,26 +121,39 @@ def get_log_like_func(params, options, df, return_scalar=True):
             (len(indices), options["estimation_draws"], n_choices),
             next(options["estimation_seed_startup"]),
             options["monte_carlo_sequence"],
+            options["monte_carlo_antithetic"],
+            options["monte_carlo_scramble"],
         )
-        base_draws_est[dense_key] = draws
+        base_draws_est[dense_key] = draws.astype(
+            options["floating_point_dtype"], copy=False
+        )
+
+    df, base_draws_est, batches = _batch_small_dense_keys(
+        df, base_draws_est, state_space, options
+    )
 
     criterion_function = partial(
         log_like,
         df=df,
         base_draws_est=base_draws_est,
+        batches=batches,
         solve=solve,
         type_covariates=type_covariates,
         options=options,
         return_scalar=return_scalar,
+        memo=create_memo(options),
     )
 
     return criterion_function
 
 
+@memoize_by_params_hash
+@use_execution_backend_from_options
 def log_like(
     params,
     df,
     base_draws_est,
+    batches,
     solve,
     type_covariates,
     options,
@@ -138,7 +161,9 @@ def log_like(
 ):
     """Criterion function for the likelihood maximization.
 
-    This function calculates the likelihood contributions of the sample.
+    This function calculates the likelihood contributions of the sample. If
+    ``options["memoization_maxsize"]`` is positive, the outputs are memoized by the
+    hash of the parameters.
 
     Parameters
     ----------
@@ -149,6 +174,9 @@ def log_like(
         different types.
     base_draws_est : numpy.ndarray
         Set of draws to calculate the probability of observed wages.
+    batches : dict
+        Maps the keys in ``df["dense_key"]`` to the batched dense keys. See
+        :func:`_batch_small_dense_keys`.
     solve : :func:`~respy.solve.solve`
         Function which solves the model with new parameters.
     options : dict
@@ -160,7 +188,7 @@ def log_like(
     state_space = solve(params)
 
     contribs, df, log_type_probabilities = _internal_log_like_obs(
-        state_space, df, base_draws_est, type_covariates, optim_paras, options
+        state_space, df, base_draws_est, batches, type_covariates, optim_paras, options
     )
 
     # Return mean log likelihood or log likelihood contributions.
@@ -177,7 +205,7 @@ def log_like(
 
 
 def _internal_log_like_obs(
-    state_space, df, base_draws_est, type_covariates, optim_paras, options
+    state_space, df, base_draws_est, batches, type_covariates, optim_paras, options
 ):
     """Calculate the likelihood contribution of each individual in the sample.
 
@@ -198,6 +226,8 @@ def _internal_log_like_obs(
     base_draws_est : numpy.ndarray
         Array with shape (n_periods, n_draws, n_choices) containing i.i.d. draws from
         standard normal distributions.
+    batches : dict
+        Maps the keys in ``df["dense_key"]`` to the batched dense keys.
     type_covariates : pandas.DataFrame or None
         If the model includes types, this is a :class:`pandas.DataFrame` containing the
         covariates to compute the type probabilities.
@@ -219,14 +249,23 @@ def _internal_log_like_obs(
 
     n_types = optim_paras["n_types"]
 
-    wages = state_space.wages
-    nonpecs = state_space.nonpecs
-    continuation_values = {}
-    for period in range(options["n_periods"]):
+    wages = concatenate_batches(state_space.wages, batches)
+    nonpecs = concatenate_batches(state_space.nonpecs, batches)
+
+    # The choice probabilities of myopic agents only depend on the flow utilities.
+    if optim_paras["delta"] == 0:
+        zero = np.zeros(1, dtype=options["floating_point_dtype"])
         continuation_values = {
-            **continuation_values,
-            **state_space.get_continuation_values(period),
+            key: np.broadcast_to(zero, value.shape) for key, value in wages.items()
         }
+    else:
+        continuation_values = {}
+        for period in range(options["n_periods"]):
+            continuation_values = {
+                **continuation_values,
+                **state_space.get_continuation_values(period),
+            }
+        continuation_values = concatenate_batches(continuation_values, batches)
 
     df = _compute_wage_and_choice_log_likelihood_contributions(
         df,
@@ -269,8 +308,16 @@ def _internal_log_like_obs(
     return contribs, df, log_type_probabilities
 
 
+def _estimate_cost_of_log_likelihood_contributions(df, base_draws_est, *args):
+    """Estimate the cost with the number of observations times draws times choices."""
+    return base_draws_est.size
+
+
 @split_and_combine_df
-@parallelize_across_dense_dimensions
+@parallelize_across_dense_dimensions(
+    cost=_estimate_cost_of_log_likelihood_contributions,
+    split_arguments=("df", "base_draws_est"),
+)
 def _compute_wage_and_choice_log_likelihood_contributions(
     df,
     base_draws_est,
@@ -319,6 +366,8 @@ def _compute_wage_and_choice_log_likelihood_contributions(
         nonpecs[indices],
         selected_continuation_values,
         draws,
+        draws.min(axis=1),
+        draws.max(axis=1),
         optim_paras["beta_delta"],
         choices,
         options["estimation_tau"],
@@ -396,17 +445,22 @@ def _logsumexp(x):
     return log_sum_exp
 
 
-@nb.guvectorize(
-    ["f8[:], f8[:], f8[:], f8[:, :], f8, i8, f8, f8[:]"],
-    "(n_choices), (n_choices), (n_choices), (n_draws, n_choices), (), (), () -> ()",
+@guvectorize_with_target_selection(
+    [
+        "f4[:], f4[:], f4[:], f4[:, :], f4[:], f4[:], f8, i8, f8, f8[:]",
+        "f8[:], f8[:], f8[:], f8[:, :], f8[:], f8[:], f8, i8, f8, f8[:]",
+    ],
+    "(n_choices), (n_choices), (n_choices), (n_draws, n_choices), (n_choices), "
+    "(n_choices), (), (), () -> ()",
     nopython=True,
-    target="parallel",
 )
 def _simulate_log_probability_of_individuals_observed_choice(
     wages,
     nonpec,
     continuation_values,
     draws,
+    draws_lower,
+    draws_upper,
     delta,
     choice,
     tau,
@@ -431,6 +485,10 @@ def _simulate_log_probability_of_individuals_observed_choice(
     consecutive `logsumexp` functions is included in `#278
     <https://github.com/OpenSourceEconomics/respy/pull/288>`_.
 
+    Choices whose smoothed value functions are more than 1,000 below the maximum for
+    every draw between ``draws_lower`` and ``draws_upper`` are skipped. Their
+    exponentials are zero in double precision and do not change the result.
+
     Parameters
     ----------
     wages : numpy.ndarray
@@ -441,6 +499,10 @@ def _simulate_log_probability_of_individuals_observed_choice(
         Array with shape (n_choices,)
     draws : numpy.ndarray
         Array with shape (n_draws, n_choices)
+    draws_lower : numpy.ndarray
+        Array with shape (n_choices,) containing the smallest draw of each choice.
+    draws_upper : numpy.ndarray
+        Array with shape (n_choices,) containing the largest draw of each choice.
     delta : float
         Discount rate.
     choice : int
@@ -454,23 +516,37 @@ def _simulate_log_probability_of_individuals_observed_choice(
         Simulated Smoothed log probability of choice.
 
     """
-    n_draws, n_choices = draws.shape
+    n_draws = draws.shape[0]
+
+    choices = find_undominated_choices(
+        wages,
+        nonpec,
+        continuation_values,
+        draws_lower,
+        draws_upper,
+        delta,
+        -np.inf,
+        1_000 * tau,
+    )
+    if not (choices == choice).any():
+        choices = np.sort(np.append(choices, choice))
+    position_of_choice = np.flatnonzero(choices == choice)[0]
 
     smoothed_log_probabilities = np.empty(n_draws)
-    smoothed_value_functions = np.empty(n_choices)
+    smoothed_value_functions = np.empty(len(choices))
 
     for i in range(n_draws):
 
-        for j in range(n_choices):
+        for k, j in enumerate(choices):
             value_function, _ = aggregate_keane_wolpin_utility(
                 wages[j], nonpec[j], continuation_values[j], draws[i, j], delta
             )
 
-            smoothed_value_functions[j] = value_function / tau
+            smoothed_value_functions[k] = value_function / tau
 
-        smoothed_log_probabilities[i] = smoothed_value_functions[choice] - _logsumexp(
-            smoothed_value_functions
-        )
+        smoothed_log_probabilities[i] = smoothed_value_functions[
+            position_of_choice
+        ] - _logsumexp(smoothed_value_functions)
 
     smoothed_log_prob = _logsumexp(smoothed_log_probabilities) - np.log(n_draws)
 
@@ -550,6 +626,65 @@ def _process_estimation_data(df, state_space, optim_paras, options):
     return df, type_covariates
 
 
+def _batch_small_dense_keys(df, base_draws_est, state_space, options):
+    """Batch dense keys with few observations and the same choice set.
+
+    The observations of a batch are processed by a single kernel call. To do so, the
+    dense key of each observation is replaced with the first dense key of its batch and
+    the core index points to the concatenated states of all dense keys in the batch,
+    see :func:`~respy.parallelization.concatenate_batches`. The base draws are
+    rearranged accordingly.
+
+    Returns
+    -------
+    df : pandas.DataFrame
+        The data with the dense keys and core indices of the batches.
+    base_draws_est : dict
+        The base draws for each batch.
+    batches : dict
+        Maps the first dense key of a batch to all dense keys of the batch.
+
+    """
+    dense_key_to_n_observations = df.groupby("dense_key").size().to_dict()
+    batches = create_batches_of_small_dense_keys(
+        state_space.dense_key_to_choice_set,
+        dense_key_to_n_observations,
+        options["dense_key_batch_size"],
+    )
+
+    dense_key_to_batch = {}
+    dense_key_to_offset = {}
+    batched_base_draws_est = {}
+    for batch, dense_keys in batches.items():
+        offset = 0
+        for dense_key in dense_keys:
+            dense_key_to_batch[dense_key] = batch
+            dense_key_to_offset[dense_key] = offset
+            offset += len(state_space.dense_key_to_core_indices[dense_key])
+
+        if len(dense_keys) == 1:
+            batched_base_draws_est[batch] = base_draws_est[batch]
+        else:
+            dense_keys_of_rows = df.loc[
+                df["dense_key"].isin(dense_keys), "dense_key"
+            ].to_numpy()
+            draws = np.empty(
+                (len(dense_keys_of_rows), *base_draws_est[batch].shape[1:]),
+                dtype=base_draws_est[batch].dtype,
+            )
+            for dense_key in dense_keys:
+                draws[dense_keys_of_rows == dense_key] = base_draws_est[dense_key]
+            batched_base_draws_est[batch] = draws
+
+    df = df.copy()
+    df["core_index"] = df["core_index"].to_numpy().astype(np.int64) + df[
+        "dense_key"
+    ].map(dense_key_to_offset).to_numpy(dtype=np.int64)
+    df["dense_key"] = df["dense_key"].map(dense_key_to_batch)
+
+    return df, batched_base_draws_est, batches
+
+
 def _update_optim_paras_with_initial_experience_levels(optim_paras, df):
     """Adjust the initial experience levels in optim_paras from the data."""
     for choice in optim_paras["choices_w_exp"]:
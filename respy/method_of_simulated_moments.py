@@ -21,6 +21,8 @@ import functools
 import numpy as np
 import pandas as pd
 
+from respy.shared import create_memo
+from respy.shared import memoize_by_params_hash
 from respy.simulate import get_simulate_func
 
 
@@ -157,11 +159,13 @@ def get_moment_errors_func(
         weighting_matrix=weighting_matrix,
         return_scalar=return_scalar,
         are_empirical_moments_dict=are_empirical_moments_dict,
+        memo=create_memo(simulate.keywords["options"]),
     )
 
     return moment_errors_func
 
 
+@memoize_by_params_hash
 def moment_errors(
     params,
     simulate,
@@ -174,6 +178,9 @@ def moment_errors(
 ):
     """Loss function for MSM estimation.
 
+    If ``options["memoization_maxsize"]`` is positive, the outputs are memoized by the
+    hash of the parameters.
+
     Parameters
     ----------
     params : pandas.DataFrame or pandas.Series
@@ -0,0 +1,312 @@
+"""Evaluate criterion functions with increasing fidelity during the estimation."""
+import functools
+import logging
+import math
+from pathlib import Path
+
+import numpy as np
+
+from respy.config import DEFAULT_OPTIONS
+from respy.likelihood import get_log_like_func
+from respy.method_of_simulated_moments import get_moment_errors_func
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_FIDELITY_SHARES = (0.25, 0.5, 1)
+"""tuple : Shares of draws and individuals of the default fidelities."""
+
+CRITERION_TO_DIRECTION = {"log_like": 1, "moment_errors": -1}
+"""dict : Maps criteria to one if they are maximized and minus one if minimized."""
+
+
+def get_multi_fidelity_criterion_func(
+    params, options, criterion="log_like", fidelities=None, window=10, **kwargs
+):
+    """Get a criterion function which raises its fidelity as the optimizer converges.
+
+    Early iterations of an optimizer do not need precise criterion values. The returned
+    function evaluates the criterion with a low fidelity first, i.e., with fewer draws,
+    more aggressive interpolation and a subsample of individuals, and switches to the
+    next fidelity once the optimizer stops making progress which can be distinguished
+    from the error of the current fidelity.
+
+    The error of a fidelity is measured with the first evaluation of the fidelity as the
+    absolute difference to the criterion value of the next fidelity at the same
+    parameters. Thus, the error stems from a single sample at the first parameters of
+    the fidelity and is itself noisy. The fidelity is raised if the best criterion value
+    has not improved by more than the error over the last ``window`` evaluations. The
+    criterion functions of all fidelities are created once they are needed. Each
+    fidelity stores its state space in its own cache directory next to
+    ``options["cache_path"]``, e.g., ``.respy-fidelity-0``, because creating a state
+    space clears its cache directory.
+
+    Note that the criterion function changes if the fidelity is raised. Optimizers with
+    a memory of past criterion values should be restarted from the current parameters
+    after the last switch or run with the highest fidelity only afterwards.
+
+    Parameters
+    ----------
+    params : pandas.DataFrame
+        DataFrame containing the parameters.
+    options : dict
+        Dictionary containing the model options of the highest fidelity.
+    criterion : {"log_like", "moment_errors"}, default "log_like"
+        The criterion is either the log likelihood from :func:`~respy.get_log_like_func`
+        which is maximized or the moment errors from
+        :func:`~respy.get_moment_errors_func` which are minimized.
+    fidelities : list of dict, default None
+        Each fidelity is a dictionary of options which replace ``options`` and the
+        optional key ``"subsample"`` with the share of individuals. For the likelihood,
+        the individuals are sampled from the data. For the method of simulated moments,
+        the number of simulated agents is reduced. :data:`None` uses
+        :func:`create_fidelities` with :data:`DEFAULT_FIDELITY_SHARES`.
+    window : int, default 10
+        Number of evaluations over which the improvement of a fidelity is measured.
+    **kwargs
+        Keyword arguments passed to the function which creates the criterion function,
+        e.g., ``df`` for the likelihood or ``calc_moments``, ``replace_nans`` and
+        ``empirical_moments`` for the method of simulated moments.
+
+    Returns
+    -------
+    criterion_function : :func:`multi_fidelity_criterion`
+        Criterion function where all arguments except the parameters are set. The
+        evaluations with their fidelities are recorded in
+        ``criterion_function.keywords["state"]["history"]``.
+
+    Raises
+    ------
+    ValueError
+        If the criterion is unknown.
+
+    Examples
+    --------
+    >>> import respy as rp
+    >>> params, options, df = rp.get_example_model("robinson_crusoe_basic")
+    >>> log_like = rp.get_multi_fidelity_criterion_func(params, options, df=df)
+    >>> value = log_like(params)
+    >>> log_like.keywords["state"]["level"]
+    0
+
+    """
+    if criterion not in CRITERION_TO_DIRECTION:
+        raise ValueError(
+            f"criterion must be one of {list(CRITERION_TO_DIRECTION)}, not "
+            f"{criterion!r}."
+        )
+
+    options = {**DEFAULT_OPTIONS, **options}
+    if fidelities is None:
+        fidelities = create_fidelities(options, DEFAULT_FIDELITY_SHARES)
+
+    create_criterion_func = functools.partial(
+        _create_criterion_func,
+        params=params,
+        options=options,
+        criterion=criterion,
+        kwargs=kwargs,
+    )
+
+    state = {
+        "level": 0,
+        "criterion_funcs": {},
+        "errors": {},
+        "values": [],
+        "history": [],
+    }
+
+    criterion_function = functools.partial(
+        multi_fidelity_criterion,
+        fidelities=fidelities,
+        create_criterion_func=create_criterion_func,
+        direction=CRITERION_TO_DIRECTION[criterion],
+        window=window,
+        state=state,
+    )
+
+    return criterion_function
+
+
+def multi_fidelity_criterion(
+    params, fidelities, create_criterion_func, direction, window, state
+):
+    """Evaluate the criterion with the current fidelity and raise it if necessary.
+
+    Parameters
+    ----------
+    params : pandas.DataFrame
+        DataFrame containing the parameters.
+    fidelities : list of dict
+        Options of the fidelities.
+    create_criterion_func : callable
+        Creates the criterion function of a fidelity.
+    direction : int
+        One if the criterion is maximized and minus one if it is minimized.
+    window : int
+        Number of evaluations over which the improvement of a fidelity is measured.
+    state : dict
+        Mutable state with the current level of fidelity, the criterion functions and
+        errors of the fidelities and the criterion values of the current fidelity.
+
+    Returns
+    -------
+    out
+        The output of the criterion function of the current fidelity.
+
+    """
+    level = state["level"]
+    out, value = _evaluate_fidelity(
+        params, level, fidelities, create_criterion_func, state
+    )
+
+    if level < len(fidelities) - 1 and level not in state["errors"]:
+        _, value_next_level = _evaluate_fidelity(
+            params, level + 1, fidelities, create_criterion_func, state
+        )
+        state["errors"][level] = abs(value - value_next_level)
+        logger.info(
+            "Fidelity %d: Error of %.3g compared to the next fidelity.",
+            level,
+            state["errors"][level],
+        )
+
+    state["history"].append({"level": level, "value": value})
+    state["values"].append(direction * value)
+
+    if level < len(fidelities) - 1 and len(state["values"]) > window:
+        improvement = max(state["values"]) - max(state["values"][:-window])
+        if improvement <= state["errors"][level]:
+            state["level"] += 1
+            state["values"] = []
+            logger.info(
+                "Fidelity %d: Improvement of %.3g over the last %d evaluations does "
+                "not exceed the error. Switch to fidelity %d.",
+                level,
+                improvement,
+                window,
+                state["level"],
+            )
+
+    return out
+
+
+def create_fidelities(options, shares):
+    """Create fidelities which use shares of the draws and individuals.
+
+    The numbers of draws in the solution and the estimation and the number of
+    individuals are multiplied with the share. If the model is solved with
+    interpolation, the number of interpolation points or, for ``"auto"``, the time
+    budget of the solution is scaled as well.
+
+    Parameters
+    ----------
+    options : dict
+        Dictionary containing the model options of the highest fidelity.
+    shares : iterable of float
+        Shares in ascending order. The last share should be one.
+
+    Returns
+    -------
+    fidelities : list of dict
+
+    Examples
+    --------
+    >>> from respy.config import DEFAULT_OPTIONS
+    >>> create_fidelities(DEFAULT_OPTIONS, [0.25, 1])  # doctest: +NORMALIZE_WHITESPACE
+    [{'subsample': 0.25, 'solution_draws': 50, 'estimation_draws': 50},
+     {'subsample': 1, 'solution_draws': 200, 'estimation_draws': 200}]
+
+    """
+    fidelities = []
+    for share in shares:
+        fidelity = {"subsample": share}
+        for option in ["solution_draws", "estimation_draws"]:
+            fidelity[option] = max(math.ceil(share * options[option]), 1)
+
+        if options["interpolation_points"] == "auto":
+            fidelity["solution_time_budget"] = share * options["solution_time_budget"]
+        elif options["interpolation_points"] != -1:
+            fidelity["interpolation_points"] = max(
+                math.ceil(share * options["interpolation_points"]), 2
+            )
+
+        fidelities.append(fidelity)
+
+    return fidelities
+
+
+def _evaluate_fidelity(params, level, fidelities, create_criterion_func, state):
+    """Evaluate the criterion function of a fidelity and return it with its value."""
+    if level not in state["criterion_funcs"]:
+        state["criterion_funcs"][level] = create_criterion_func(
+            fidelities[level], level
+        )
+
+    out = state["criterion_funcs"][level](params)
+    value = out["value"] if isinstance(out, dict) else out
+
+    return out, value
+
+
+def _create_criterion_func(fidelity, level, params, options, criterion, kwargs):
+    """Create the criterion function of a fidelity with its own cache directory."""
+    options = {**options, **fidelity}
+    subsample = options.pop("subsample", 1)
+
+    cache_path = Path(options.get("cache_path", ".respy"))
+    options["cache_path"] = cache_path.parent / f"{cache_path.name}-fidelity-{level}"
+
+    if criterion == "log_like":
+        df = kwargs["df"]
+        if subsample < 1:
+            df = _draw_subsample_of_individuals(
+                df, subsample, options["estimation_seed"]
+            )
+        criterion_function = get_log_like_func(params, options, **{**kwargs, "df": df})
+
+    else:
+        options["simulation_agents"] = max(
+            math.ceil(subsample * options["simulation_agents"]), 1
+        )
+        criterion_function = get_moment_errors_func(params, options, **kwargs)
+
+    return criterion_function
+
+
+def _draw_subsample_of_individuals(df, share, seed):
+    """Draw a subsample of individuals and renumber their identifiers from zero.
+
+    Examples
+    --------
+    >>> import pandas as pd
+    >>> df = pd.DataFrame(
+    ...     {
+    ...         "Identifier": [0, 0, 1, 2, 2],
+    ...         "Period": [0, 1, 0, 0, 1],
+    ...         "Choice": ["a", "b", "a", "b", "b"],
+    ...     }
+    ... )
+    >>> _draw_subsample_of_individuals(df, 0.5, 0)
+       Identifier  Period Choice
+    2           0       0      a
+    3           1       0      b
+    4           1       1      b
+
+    """
+    index_names = [name for name in df.index.names if name is not None]
+    if index_names:
+        df = df.reset_index()
+
+    identifiers = df["Identifier"].unique()
+    n_individuals = max(math.ceil(share * len(identifiers)), 1)
+    subsample = np.sort(
+        np.random.RandomState(seed).choice(identifiers, n_individuals, replace=False)
+    )
+
+    df = df.loc[df["Identifier"].isin(subsample)].copy()
+    df["Identifier"] = np.searchsorted(subsample, df["Identifier"])
+
+    if index_names:
+        df = df.set_index(index_names)
+
+    return df
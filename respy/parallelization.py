@@ -1,11 +1,171 @@
 """This module contains the code to control parallel execution."""
+import atexit
+import contextlib
+import copyreg
 import functools
+import inspect
+import threading
 
 import joblib
+import numba as nb
+import numpy as np
 import pandas as pd
+from numba.typed import Dict
+
+try:
+    from threadpoolctl import threadpool_limits
+except ImportError:
+    threadpool_limits = None
+
+
+PARALLELIZATION_BACKENDS = ["serial", "threading", "loky", "dask"]
+"""list: Backends to process dense keys.
+
+- ``"serial"`` processes dense keys one after another without :mod:`joblib`.
+- ``"threading"`` uses a thread pool. It is useful because the heavy computations
+  happen in Numba functions which release the GIL.
+- ``"loky"`` uses a pool of processes. Large arrays are passed to the workers as
+  memory-mapped files and are shared instead of copied.
+- ``"dask"`` distributes dense keys across the workers of a :mod:`dask.distributed`
+  cluster which may span several hosts. Arrays used by many tasks like the draws are
+  scattered once to the workers. Without the address of a scheduler, a local cluster
+  of ``n_jobs`` processes is started. Requires :mod:`distributed` and, for multiple
+  hosts, a ``"cache_path"`` on a shared file system.
+
+"""
+
+_EXECUTION_SETTINGS = {
+    "backend": "serial",
+    "n_jobs": 1,
+    "n_threads": None,
+    "scheduler_address": None,
+}
+_DASK_CLIENTS = {}
+_WORKER_POOLS = {}
+_POOL_LOCK = threading.Lock()
+
+
+@contextlib.contextmanager
+def execution_backend(backend, n_jobs, n_threads=None, scheduler_address=None):
+    """Set the backend and the number of workers to process dense keys.
+
+    The settings apply to all functions decorated with
+    :func:`parallelize_across_dense_dimensions` which are called within the context.
+
+    Parameters
+    ----------
+    backend : str
+        One of :data:`PARALLELIZATION_BACKENDS`.
+    n_jobs : int
+        Number of workers. ``-1`` uses all available cores.
+    n_threads : int, default None
+        Total number of threads used by Numba kernels and BLAS, see
+        :func:`limit_threads`. With multiple workers, each worker receives an equal
+        share of the threads. ``None`` keeps the current limits.
+    scheduler_address : str, default None
+        Address of the :mod:`dask.distributed` scheduler for the ``"dask"`` backend,
+        e.g., ``"tcp://10.0.0.1:8786"``. ``None`` starts a local cluster.
+
+    Examples
+    --------
+    >>> with execution_backend("threading", 2):
+    ...     _EXECUTION_SETTINGS["backend"], _EXECUTION_SETTINGS["n_jobs"]
+    ('threading', 2)
+    >>> _EXECUTION_SETTINGS["backend"], _EXECUTION_SETTINGS["n_jobs"]
+    ('serial', 1)
 
+    """
+    previous_settings = _EXECUTION_SETTINGS.copy()
+    _EXECUTION_SETTINGS.update(
+        backend=backend,
+        n_jobs=n_jobs,
+        n_threads=n_threads,
+        scheduler_address=scheduler_address,
+    )
+    try:
+        with limit_threads(n_threads):
+            yield
+    finally:
+        _EXECUTION_SETTINGS.update(previous_settings)
+
+
+@contextlib.contextmanager
+def limit_threads(n_threads, limit_blas=True):
+    """Limit the number of threads of Numba and BLAS at runtime.
+
+    Environment variables like ``NUMBA_NUM_THREADS`` or ``MKL_NUM_THREADS`` are only
+    read when the libraries are imported. Instead, this context manager uses
+    :func:`numba.set_num_threads` which applies to the current thread and, if
+    :mod:`threadpoolctl` is installed, limits the thread pools of BLAS and OpenMP in the
+    current process.
+
+    Parameters
+    ----------
+    n_threads : int or None
+        Number of threads. It cannot exceed ``NUMBA_NUM_THREADS`` for Numba. ``None``
+        keeps the current limits.
+    limit_blas : bool, default True
+        Whether to limit BLAS. The limits of :mod:`threadpoolctl` apply to the whole
+        process and should not be set from multiple threads at the same time.
+
+    Examples
+    --------
+    >>> with limit_threads(1):
+    ...     nb.get_num_threads()
+    1
+
+    """
+    if n_threads is None:
+        yield
+    else:
+        previous_n_threads = nb.get_num_threads()
+        nb.set_num_threads(max(min(n_threads, nb.config.NUMBA_NUM_THREADS), 1))
+        blas_limits = (
+            threadpool_limits(limits=n_threads)
+            if limit_blas and threadpool_limits is not None
+            else contextlib.suppress()
+        )
+        try:
+            with blas_limits:
+                yield
+        finally:
+            nb.set_num_threads(previous_n_threads)
+
+
+def use_execution_backend_from_options(func):
+    """Process dense keys with the backend in the options of the decorated function.
 
-def parallelize_across_dense_dimensions(func=None, *, n_jobs=1):
+    The decorated function must have an argument called ``options`` which contains
+    ``"parallelization_backend"``, ``"parallelization_n_jobs"`` and
+    ``"parallelization_n_threads"`` and ``"parallelization_scheduler_address"``. It is
+    applied to the entry points like :func:`respy.solve.solve` so that all nested
+    functions use the same backend.
+
+    """
+    signature = inspect.signature(func)
+
+    @functools.wraps(func)
+    def wrapper_use_execution_backend_from_options(*args, **kwargs):
+        options = signature.bind(*args, **kwargs).arguments["options"]
+        with execution_backend(
+            options.get("parallelization_backend", _EXECUTION_SETTINGS["backend"]),
+            options.get("parallelization_n_jobs", _EXECUTION_SETTINGS["n_jobs"]),
+            options.get("parallelization_n_threads", _EXECUTION_SETTINGS["n_threads"]),
+            options.get(
+                "parallelization_scheduler_address",
+                _EXECUTION_SETTINGS["scheduler_address"],
+            ),
+        ):
+            out = func(*args, **kwargs)
+
+        return out
+
+    return wrapper_use_execution_backend_from_options
+
+
+def parallelize_across_dense_dimensions(
+    func=None, *, n_jobs=None, cost=None, split_arguments=()
+):
     """Parallelizes decorated function across dense state space dimensions.
 
     Parallelization is only possible if the decorated function has no side-effects to
@@ -21,24 +181,52 @@ def parallelize_across_dense_dimensions(func=None, *, n_jobs=1):
     across dense dimensions by patching the attribute access such that each sub state
     space can only access its attributes.
 
+    The dense keys are processed with the backend and the number of workers set by
+    :func:`execution_backend`. ``n_jobs`` overrides the number of workers for the
+    decorated function. With the serial backend or a single worker, the function is
+    called in a plain loop without the overhead of :mod:`joblib`. Otherwise, the
+    function is dispatched to a persistent pool of workers, see :func:`_dispatch`.
+
+    Which arguments are split across dense keys is decided once per decorated function
+    and kind of arguments and stored as a broadcasting plan. Afterwards, each worker
+    only receives the values of the dense dictionaries for its dense key.
+
+    If ``cost`` is given, it is called with the arguments of a dense key and returns
+    the estimated cost of the computation, e.g., the number of states times the number
+    of choices times the number of draws. With multiple workers, the dense keys are
+    submitted from the largest to the smallest cost so that idle workers pick up the
+    remaining small keys at the end. Dense keys whose cost exceeds the fair share of a
+    worker are split into chunks along the first axis of the arguments named in
+    ``split_arguments`` and the results are concatenated afterwards.
+
     The decorator can be applied to functions without trailing parentheses. At the same
     time, the `*` prohibits to use the decorator with positional arguments.
 
     """
 
     def decorator_parallelize_across_dense_dimensions(func):
+        broadcasting_plans = {}
+        schedule = _Schedule(
+            cost, split_arguments, list(inspect.signature(func).parameters)
+        )
+
         @functools.wraps(func)
         def wrapper_parallelize_across_dense_dimensions(*args, **kwargs):
             bypass = kwargs.pop("bypass", {})
-            dense_keys = _infer_dense_keys_from_arguments(args, kwargs)
 
-            if dense_keys:
-                args_, kwargs_ = _broadcast_arguments(args, kwargs, dense_keys)
+            fingerprint = _fingerprint_arguments(args, kwargs)
+            if fingerprint not in broadcasting_plans:
+                broadcasting_plans[fingerprint] = _create_broadcasting_plan(
+                    args, kwargs
+                )
+            plan = broadcasting_plans[fingerprint]
+            dense_keys = _infer_dense_keys_from_plan(args, kwargs, plan)
 
-                out = joblib.Parallel(n_jobs=n_jobs)(
-                    joblib.delayed(func)(*args_[idx], **kwargs_[idx], **bypass)
-                    for idx in dense_keys
+            if dense_keys:
+                out = _dispatch(
+                    func, args, kwargs, bypass, plan, dense_keys, n_jobs, schedule
                 )
+
                 # Re-order multiple return values from list of tuples to tuple of lists
                 # to tuple of dictionaries to set as state space attributes.
                 if isinstance(out[0], tuple):
@@ -65,6 +253,83 @@ def parallelize_across_dense_dimensions(func=None, *, n_jobs=1):
         return decorator_parallelize_across_dense_dimensions
 
 
+def create_batches_of_small_dense_keys(dense_key_to_group, dense_key_to_size, size):
+    """Combine small dense keys of the same group into batches.
+
+    Numba kernels are launched once per dense key. For many dense keys with few states,
+    the overhead of launching the kernel dominates. Thus, dense keys with less than
+    ``size`` states or observations and the same group, e.g., the same choice set, are
+    combined into batches with at most ``size`` states which can be processed by a
+    single kernel call.
+
+    Parameters
+    ----------
+    dense_key_to_group : dict
+        Maps dense keys to a hashable group. Only dense keys of the same group are
+        batched.
+    dense_key_to_size : dict
+        Maps dense keys to their number of states or observations.
+    size : int
+        Dense keys with fewer states are batched. ``0`` disables batching.
+
+    Returns
+    -------
+    batches : dict
+        Maps the first dense key of a batch to all dense keys of the batch.
+
+    Examples
+    --------
+    >>> create_batches_of_small_dense_keys(
+    ...     {0: "a", 1: "a", 2: "b", 3: "a", 4: "a"}, {0: 2, 1: 3, 2: 1, 3: 9, 4: 4}, 8
+    ... )
+    {0: [0, 1], 2: [2], 3: [3], 4: [4]}
+
+    """
+    batches = {}
+    group_to_open_batch = {}
+    batch_sizes = {}
+
+    for dense_key, n_rows in dense_key_to_size.items():
+        group = dense_key_to_group[dense_key]
+        open_batch = group_to_open_batch.get(group)
+
+        if n_rows >= size:
+            batches[dense_key] = [dense_key]
+        elif open_batch is not None and batch_sizes[open_batch] + n_rows <= size:
+            batches[open_batch].append(dense_key)
+            batch_sizes[open_batch] += n_rows
+        else:
+            batches[dense_key] = [dense_key]
+            batch_sizes[dense_key] = n_rows
+            group_to_open_batch[group] = dense_key
+
+    return batches
+
+
+def concatenate_batches(dictionary, batches):
+    """Concatenate the arrays of all dense keys in a batch."""
+    return {
+        batch: np.concatenate([dictionary[key] for key in keys])
+        if len(keys) > 1
+        else dictionary[batch]
+        for batch, keys in batches.items()
+    }
+
+
+def split_batches(dictionary, batches, dense_key_to_size):
+    """Split the arrays of batches into arrays for each dense key."""
+    out = {}
+    for batch, keys in batches.items():
+        if len(keys) == 1:
+            out[batch] = dictionary[batch]
+        else:
+            bounds = np.cumsum([0] + [dense_key_to_size[key] for key in keys])
+            for key, start, stop in zip(keys, bounds[:-1], bounds[1:]):
+                out[key] = dictionary[batch][start:stop]
+
+    return out
+
+
 def split_and_combine_df(func):
     """Split the data across dense indices, run a function, and combine again."""
 
@@ -117,31 +382,357 @@ def _is_dictionary_with_integer_keys(candidate):
     )
 
 
-def _broadcast_arguments(args, kwargs, dense_keys):
-    """Broadcast arguments to dense state space dimensions."""
-    args = list(args) if isinstance(args, tuple) else [args]
+def _fingerprint_arguments(args, kwargs):
+    """Create a cheap fingerprint of the kind of arguments.
+
+    Dictionaries are characterized by the type of their first key which is sufficient
+    to distinguish dictionaries with dense keys from other dictionaries like options.
+
+    """
+    return (
+        tuple(_fingerprint_argument(arg) for arg in args),
+        tuple((name, _fingerprint_argument(kwarg)) for name, kwarg in kwargs.items()),
+    )
+
+
+def _fingerprint_argument(argument):
+    """Fingerprint a single argument."""
+    if isinstance(argument, dict) and len(argument) > 0:
+        fingerprint = type(next(iter(argument)))
+    else:
+        fingerprint = None
+
+    return fingerprint
+
+
+def _create_broadcasting_plan(args, kwargs):
+    """Create the plan which arguments are split across dense keys.
+
+    Returns
+    -------
+    plan : tuple
+        Tuple with the positions of positional arguments and the names of keyword
+        arguments which are dictionaries with dense keys.
+
+    """
+    dense_keys = _infer_dense_keys_from_arguments(args, kwargs)
+
+    if dense_keys:
+        plan = (
+            tuple(
+                i
+                for i, arg in enumerate(args)
+                if _is_dense_dictionary_argument(arg, dense_keys)
+            ),
+            tuple(
+                name
+                for name, kwarg in kwargs.items()
+                if _is_dense_dictionary_argument(kwarg, dense_keys)
+            ),
+        )
+    else:
+        plan = ((), ())
+
+    return plan
+
+
+def _infer_dense_keys_from_plan(args, kwargs, plan):
+    """Infer the dense keys as the intersection of keys of all dense arguments."""
+    positions, names = plan
+    list_of_dense_keys = [args[i].keys() for i in positions] + [
+        kwargs[name].keys() for name in names
+    ]
+
+    return (
+        set(list_of_dense_keys[0]).intersection(*list_of_dense_keys[1:])
+        if list_of_dense_keys
+        else set()
+    )
+
+
+def _select_arguments_of_dense_key(args, kwargs, plan, dense_key):
+    """Select the arguments for a single dense key following the plan."""
+    positions, names = plan
+
+    args_ = list(args)
+    for i in positions:
+        args_[i] = args[i][dense_key]
+
+    kwargs_ = kwargs.copy()
+    for name in names:
+        kwargs_[name] = kwargs[name][dense_key]
+
+    return args_, kwargs_
+
+
+def _dispatch(func, args, kwargs, bypass, plan, dense_keys, n_jobs, schedule):
+    """Call the function for every dense key with the current execution backend.
+
+    With multiple workers, the function is submitted to a pool of workers which is
+    kept alive across calls. If the pool is busy, e.g., because the decorated function
+    is called within a worker, the dense keys are processed serially.
 
-    # Broadcast arguments which are not captured in a dictionary with dense state space
-    # dimension as keys.
-    for i, arg in enumerate(args):
-        if _is_dense_dictionary_argument(arg, dense_keys):
-            args[i] = {key: arg[key] for key in dense_keys}
+    To avoid oversubscription, the threads available to Numba and BLAS are divided
+    among the workers. Threads of the threading backend already run Numba kernels
+    concurrently and use a single thread for Numba each. Since the limits of BLAS apply
+    to the whole process, they are set once for all threads.
+
+    """
+    backend = _EXECUTION_SETTINGS["backend"]
+    n_jobs = _EXECUTION_SETTINGS["n_jobs"] if n_jobs is None else n_jobs
+
+    if backend != "serial" and n_jobs != 1 and _POOL_LOCK.acquire(blocking=False):
+        try:
+            scheduler_address = _EXECUTION_SETTINGS["scheduler_address"]
+            pool = _get_worker_pool(backend, n_jobs, scheduler_address)
+            n_workers = _get_number_of_workers(backend, n_jobs, scheduler_address)
+
+            n_threads = _EXECUTION_SETTINGS["n_threads"]
+            is_threading = backend == "threading"
+            if backend == "dask" and scheduler_address is not None:
+                # Workers on other hosts do not share the threads of this host.
+                n_threads_per_worker = n_threads
+            else:
+                n_threads = n_threads or nb.get_num_threads()
+                n_threads_per_worker = max(n_threads // n_workers, 1)
+
+            tasks = schedule.create_tasks(args, kwargs, plan, dense_keys, n_workers)
+            with limit_threads(n_threads_per_worker if is_threading else None):
+                results = pool(
+                    joblib.delayed(_call_in_worker)(
+                        func,
+                        args_,
+                        {**kwargs_, **bypass},
+                        1 if is_threading else n_threads_per_worker,
+                        not is_threading,
+                    )
+                    for _, args_, kwargs_ in tasks
+                )
+        finally:
+            _POOL_LOCK.release()
+
+        key_to_results = {key: [] for key in dense_keys}
+        for (key, _, _), result in zip(tasks, results):
+            key_to_results[key].append(result)
+        out = [_combine_chunks(key_to_results[key]) for key in dense_keys]
+
+    else:
+        out = []
+        for key in dense_keys:
+            args_, kwargs_ = _select_arguments_of_dense_key(args, kwargs, plan, key)
+            out.append(func(*args_, **kwargs_, **bypass))
+
+    return out
+
+
+def _call_in_worker(func, args, kwargs, n_threads, limit_blas):
+    """Call the function in a worker with a limited number of threads."""
+    with limit_threads(n_threads, limit_blas):
+        out = func(*args, **kwargs)
+
+    return out
+
+
+class _Schedule:
+    """Order dense keys by their cost and split large dense keys into chunks.
+
+    Parameters
+    ----------
+    cost : callable or None
+        Function which receives the arguments for a dense key and returns its cost.
+    split_arguments : tuple of str
+        Names of arguments which can be split along the first axis.
+    parameters : list of str
+        Names of the parameters of the decorated function.
+
+    """
+
+    def __init__(self, cost, split_arguments, parameters):
+        self.cost = cost
+        self.split_arguments = split_arguments
+        self.parameters = parameters
+
+    def create_tasks(self, args, kwargs, plan, dense_keys, n_workers):
+        """Create a list of tasks containing the dense key, arguments and keywords."""
+        tasks = [
+            (key, *_select_arguments_of_dense_key(args, kwargs, plan, key))
+            for key in dense_keys
+        ]
+        if self.cost is None:
+            return tasks
+
+        costs = [self.cost(*args_, **kwargs_) for _, args_, kwargs_ in tasks]
+        fair_share = sum(costs) / n_workers
+
+        scheduled_tasks = []
+        for (key, args_, kwargs_), cost in sorted(
+            zip(tasks, costs), key=lambda x: x[1], reverse=True
+        ):
+            n_chunks = int(np.ceil(cost / fair_share)) if fair_share > 0 else 1
+            if n_chunks > 1 and self.split_arguments:
+                scheduled_tasks += [
+                    (key, *chunk) for chunk in self._split(args_, kwargs_, n_chunks)
+                ]
+            else:
+                scheduled_tasks.append((key, args_, kwargs_))
+
+        return scheduled_tasks
+
+    def _split(self, args, kwargs, n_chunks):
+        """Split arguments along the first axis into chunks."""
+        positions = [
+            i
+            for i in range(min(len(args), len(self.parameters)))
+            if self.parameters[i] in self.split_arguments
+        ]
+        names = [name for name in kwargs if name in self.split_arguments]
+
+        if not positions and not names:
+            yield args, kwargs
+            return
+
+        n_rows = len(args[positions[0]]) if positions else len(kwargs[names[0]])
+        bounds = np.linspace(0, n_rows, min(n_chunks, n_rows) + 1).astype(int)
+
+        for start, stop in zip(bounds[:-1], bounds[1:]):
+            args_ = list(args)
+            for i in positions:
+                args_[i] = _slice_rows(args[i], start, stop)
+            kwargs_ = kwargs.copy()
+            for name in names:
+                kwargs_[name] = _slice_rows(kwargs[name], start, stop)
+
+            yield args_, kwargs_
+
+
+def _slice_rows(argument, start, stop):
+    """Slice rows of arrays and DataFrames."""
+    if isinstance(argument, (pd.DataFrame, pd.Series)):
+        out = argument.iloc[start:stop].copy()
+    else:
+        out = argument[start:stop]
+
+    return out
+
+
+def _combine_chunks(chunks):
+    """Combine the results of the chunks of a dense key."""
+    first = chunks[0]
+    if len(chunks) == 1:
+        out = first
+    elif isinstance(first, tuple):
+        out = tuple(_combine_chunks(list(results)) for results in zip(*chunks))
+    elif isinstance(first, (pd.DataFrame, pd.Series)):
+        out = pd.concat(chunks)
+    else:
+        out = np.concatenate(chunks)
+
+    return out
+
+
+def _get_worker_pool(backend, n_jobs, scheduler_address=None):
+    """Get a persistent pool of workers.
+
+    The pool is created with the first call and reused afterwards which avoids the costs
+    of starting workers for every decorated function and every evaluation of the
+    criterion function.
+
+    """
+    key = (backend, n_jobs, scheduler_address if backend == "dask" else None)
+    if key not in _WORKER_POOLS:
+        if backend == "dask":
+            client = _get_dask_client(n_jobs, scheduler_address)
+            with joblib.parallel_backend("dask", client=client):
+                pool = joblib.Parallel(n_jobs=n_jobs)
+                pool.__enter__()
         else:
-            args[i] = {idx: arg for idx in dense_keys}
-    for kwarg, value in kwargs.items():
-        if _is_dense_dictionary_argument(value, dense_keys):
-            kwargs[kwarg] = {idx: kwargs[kwarg][idx] for idx in dense_keys}
+            pool = joblib.Parallel(n_jobs=n_jobs, backend=backend)
+            pool.__enter__()
+        _WORKER_POOLS[key] = pool
+
+    return _WORKER_POOLS[key]
+
+
+def _get_number_of_workers(backend, n_jobs, scheduler_address=None):
+    """Get the number of workers of a pool."""
+    if backend == "dask":
+        client = _get_dask_client(n_jobs, scheduler_address)
+        n_workers = max(len(client.scheduler_info()["workers"]), 1)
+    else:
+        n_workers = joblib.effective_n_jobs(n_jobs)
+
+    return n_workers
+
+
+def _get_dask_client(n_jobs, scheduler_address):
+    """Connect to a :mod:`dask.distributed` scheduler or start a local cluster.
+
+    The local cluster is a stand-in for a cluster on multiple hosts with one process per
+    worker.
+
+    """
+    try:
+        from distributed import Client
+        from distributed import LocalCluster
+    except ImportError as e:
+        raise ImportError(
+            "The parallelization backend 'dask' requires 'distributed'."
+        ) from e
+
+    key = (n_jobs, scheduler_address)
+    if key not in _DASK_CLIENTS:
+        if scheduler_address is None:
+            cluster = LocalCluster(
+                n_workers=joblib.effective_n_jobs(n_jobs),
+                threads_per_worker=1,
+                processes=True,
+            )
+            client = Client(cluster, set_as_default=False)
         else:
-            kwargs[kwarg] = {idx: value for idx in dense_keys}
+            client = Client(scheduler_address, set_as_default=False)
+        _DASK_CLIENTS[key] = client
+
+    return _DASK_CLIENTS[key]
+
+
+@atexit.register
+def shutdown_worker_pools():
+    """Shut down all persistent pools of workers and clients of dask clusters."""
+    for pool in _WORKER_POOLS.values():
+        pool.__exit__(None, None, None)
+    _WORKER_POOLS.clear()
+
+    for client in _DASK_CLIENTS.values():
+        cluster = client.cluster
+        client.close()
+        if cluster is not None:
+            cluster.close()
+    _DASK_CLIENTS.clear()
+
+
+def _reduce_numba_dictionary(dictionary):
+    """Reduce a :class:`numba.typed.Dict` which cannot be pickled by default.
+
+    Process-based backends pickle the arguments, e.g., the indexer, to send them to the
+    workers.
+
+    """
+    dict_type = dictionary._dict_type
+    return (
+        _rebuild_numba_dictionary,
+        (dict_type.key_type, dict_type.value_type, list(dictionary.items())),
+    )
+
+
+def _rebuild_numba_dictionary(key_type, value_type, items):
+    dictionary = Dict.empty(key_type=key_type, value_type=value_type)
+    for key, value in items:
+        dictionary[key] = value
+
+    return dictionary
 
-    # Re-order arguments for zipping.
-    args = {idx: [arg[idx] for arg in args] for idx in dense_keys}
-    kwargs = {
-        idx: {kwarg: value[idx] for kwarg, value in kwargs.items()}
-        for idx in dense_keys
-    }
 
-    return args, kwargs
+copyreg.pickle(Dict, _reduce_numba_dictionary)
 
 
 def _is_dense_dictionary_argument(argument, dense_keys):
@@ -2,6 +2,8 @@
 import numba as nb
 import numpy as np
 
+from respy.parallelization import PARALLELIZATION_BACKENDS
+
 
 def validate_options(o):
     """Validate the options provided by the user."""
@@ -17,7 +19,12 @@ def validate_options(o):
     assert (
         _is_positive_nonzero_integer(o["interpolation_points"])
         or o["interpolation_points"] == -1
+        or o["interpolation_points"] == "auto"
+    )
+    assert o["solution_time_budget"] is None or _is_positive_number(
+        o["solution_time_budget"]
     )
+    assert o["interpolation_points"] != "auto" or o["solution_time_budget"] is not None
     assert _is_positive_nonzero_integer(o["simulation_agents"])
     assert isinstance(o["core_state_space_filters"], list) and all(  # noqa: PT018
         isinstance(filter_, str) for filter_ in o["core_state_space_filters"]
@@ -29,6 +36,37 @@ def validate_options(o):
         for key, val in o["negative_choice_set"].items()
     )
     assert o["monte_carlo_sequence"] in ["random", "halton", "sobol"]
+    assert isinstance(o["monte_carlo_antithetic"], bool)
+    assert isinstance(o["monte_carlo_scramble"], bool)
+    assert o["solution_integration"] in ["monte_carlo", "gauss_hermite", "smolyak"]
+    assert _is_positive_nonzero_integer(o["solution_quadrature_level"])
+    assert isinstance(o["solution_closed_form_emax"], bool)
+    assert o["solution_emax_tolerance"] is None or (  # noqa: PT018
+        _is_positive_number(o["solution_emax_tolerance"])
+        and o["solution_integration"] == "monte_carlo"
+    )
+    assert _is_positive_nonzero_integer(o["solution_emax_block_size"])
+    assert isinstance(o["solution_control_variate"], bool)
+    assert not o["solution_control_variate"] or (  # noqa: PT018
+        o["solution_integration"] == "monte_carlo"
+        and o["solution_emax_tolerance"] is None
+    )
+    assert isinstance(o["solution_pipelining"], bool)
+    assert isinstance(o["solution_period_kernel"], bool)
+    assert o["floating_point_dtype"] in ["float64", "float32"]
+    assert o["parallelization_backend"] in PARALLELIZATION_BACKENDS
+    assert o["parallelization_n_threads"] is None or _is_positive_nonzero_integer(
+        o["parallelization_n_threads"]
+    )
+    assert o["parallelization_scheduler_address"] is None or isinstance(
+        o["parallelization_scheduler_address"], str
+    )
+    assert _is_nonnegative_integer(o["dense_key_batch_size"])
+    assert _is_nonnegative_integer(o["memoization_maxsize"])
+    assert (
+        _is_positive_nonzero_integer(o["parallelization_n_jobs"])
+        or o["parallelization_n_jobs"] == -1
+    )
 
 
 def validate_params(params, optim_paras):
@@ -36,6 +74,17 @@ def validate_params(params, optim_paras):
     _validate_shocks(params, optim_paras)
 
 
+def validate_stack_of_params(optim_paras_stack):
+    """Validate a stack of parameter vectors which are solved at once."""
+    assert not any(
+        optim_paras["exogenous_processes"] for optim_paras in optim_paras_stack
+    ), (
+        "A stack of parameter vectors cannot be solved for models with exogenous "
+        "processes because the transition probabilities are stored in the cache of the "
+        "shared state space. Solve the parameter vectors one after another."
+    )
+
+
 def _validate_shocks(params, optim_paras):
     """Validate that the elements of the shock matrix are correctly sorted."""
     choices = list(optim_paras["choices"])
@@ -79,6 +128,10 @@ def _is_nonnegative_integer(x):
     return isinstance(x, (int, np.integer)) and x >= 0
 
 
+def _is_positive_number(x):
+    return isinstance(x, (int, float, np.integer, np.floating)) and x > 0
+
+
 def check_model_solution(optim_paras, options, state_space):
     """Check properties of the solution of a model."""
     # Distribute class attributes
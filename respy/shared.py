@@ -4,16 +4,28 @@ This module should only import from other packages or modules of respy which als
 import from respy itself. This is to prevent circular imports.
 
 """
+import collections
+import copy
+import functools
+import hashlib
+import itertools
+import math
 import shutil
+import warnings
 
-import chaospy as cp
 import numba as nb
 import numpy as np
 import pandas as pd
+from scipy import special
+from scipy.stats import qmc
 
 from respy._numba import array_to_tuple
+from respy._numba import guvectorize_with_target_selection
 from respy.config import MAX_LOG_FLOAT
 from respy.config import MIN_LOG_FLOAT
+from respy.config import QMC_CHUNK_SIZE
+from respy.config import SOBOL_N_BITS
+from respy.config import SOBOL_PARAMETERS
 from respy.parallelization import parallelize_across_dense_dimensions
 
 
@@ -55,12 +67,117 @@ def aggregate_keane_wolpin_utility(wage, nonpec, continuation_value, draw, delta
     return alternative_specific_value_function, flow_utility
 
 
-def create_base_draws(shape, seed, monte_carlo_sequence):
+@nb.njit
+def find_undominated_choices(
+    wages,
+    nonpecs,
+    continuation_values,
+    draws_lower,
+    draws_upper,
+    delta,
+    lower_bound,
+    margin,
+):
+    """Find choices which might have the maximum value function for some draw.
+
+    Since wages are positive, the value function of each choice increases in the draw.
+    Thus, the smallest and largest draws of a choice bound its value functions from
+    below and above. A choice is dominated if its upper bound is not larger than the
+    largest lower bound of all choices minus ``margin``. ``lower_bound`` is an
+    additional lower bound of the maximum, e.g., zero in
+    :func:`calculate_expected_value_functions`. The choice with the largest lower bound
+    is never dominated, even if its bounds coincide because all of its draws are equal.
+
+    Parameters
+    ----------
+    wages : numpy.ndarray
+        Array with shape (n_choices,) containing wages.
+    nonpecs : numpy.ndarray
+        Array with shape (n_choices,) containing non-pecuniary rewards.
+    continuation_values : numpy.ndarray
+        Array with shape (n_choices,) containing continuation values.
+    draws_lower : numpy.ndarray
+        Array with shape (n_choices,) containing the smallest draw of each choice.
+    draws_upper : numpy.ndarray
+        Array with shape (n_choices,) containing the largest draw of each choice.
+    delta : float
+        The discount factor.
+    lower_bound : float
+        Lower bound of the maximum value function.
+    margin : float
+        Non-negative distance to the largest lower bound below which choices are
+        dominated.
+
+    Returns
+    -------
+    undominated_choices : numpy.ndarray
+        Array with the indices of choices which are not dominated.
+
+    Examples
+    --------
+    The second choice is never chosen as even its largest draw yields a lower value
+    than the smallest draw of the first choice.
+
+    >>> find_undominated_choices(
+    ...     np.ones(3), np.array([5, 0, 4.5]), np.zeros(3), np.full(3, -1),
+    ...     np.ones(3), 0.95, -np.inf, 0
+    ... )
+    array([0, 2])
+
+    With a single draw, the bounds of every choice coincide and only the best choice is
+    kept.
+
+    >>> find_undominated_choices(
+    ...     np.ones(3), np.array([5, 0, 4.5]), np.zeros(3), np.zeros(3), np.zeros(3),
+    ...     0.95, -np.inf, 0
+    ... )
+    array([0])
+
+    """
+    n_choices = wages.shape[0]
+    upper_bounds = np.empty(n_choices)
+
+    max_lower_bound = lower_bound
+    best_choice = -1
+    for j in range(n_choices):
+        lower_bound_j, _ = aggregate_keane_wolpin_utility(
+            wages[j], nonpecs[j], continuation_values[j], draws_lower[j], delta
+        )
+        upper_bounds[j], _ = aggregate_keane_wolpin_utility(
+            wages[j], nonpecs[j], continuation_values[j], draws_upper[j], delta
+        )
+        if lower_bound_j > max_lower_bound:
+            max_lower_bound = lower_bound_j
+            best_choice = j
+
+    is_undominated = upper_bounds > max_lower_bound - margin
+    if best_choice >= 0:
+        is_undominated[best_choice] = True
+    undominated_choices = np.flatnonzero(is_undominated)
+
+    return undominated_choices
+
+
+def create_base_draws(
+    shape, seed, monte_carlo_sequence, antithetic=False, scramble=False
+):
     """Create a set of draws from the standard normal distribution.
 
     The draws are either drawn randomly or from quasi-random low-discrepancy sequences,
     i.e., Sobol or Halton.
 
+    If ``antithetic`` is true, only half of the draws along the second to last axis are
+    generated and the other half are their negatives. The pairs of draws are negatively
+    correlated which reduces the variance of Monte Carlo integrals of monotone functions
+    and halves the costs of generating the draws.
+
+    The points of the quasi-random sequences are generated in parallel and transformed
+    to standard normal draws with the inverse of the cumulative distribution function.
+    Without scrambling, the sequences are deterministic and the seed has no effect. If
+    ``scramble`` is true, the sequences are randomized with the seed (see
+    :mod:`scipy.stats.qmc`) such that quasi-Monte Carlo integrals can be replicated with
+    different seeds to estimate their error.
+
     `"random"` is used to draw random standard normal shocks for the Monte Carlo
     integrations or because individuals face random shocks in the simulation.
 
@@ -85,6 +202,10 @@ def create_base_draws(shape, seed, monte_carlo_sequence):
         Seed to control randomness.
     monte_carlo_sequence : {"random", "halton", "sobol"}
         Name of the sequence.
+    antithetic : bool, default False
+        Whether the draws are antithetic.
+    scramble : bool, default False
+        Whether the quasi-random sequences are scrambled.
 
     Returns
     -------
@@ -105,6 +226,16 @@ def create_base_draws(shape, seed, monte_carlo_sequence):
             Verlag New York.*
 
     """
+    if antithetic:
+        n_draws = shape[-2]
+        half_shape = (*shape[:-2], math.ceil(n_draws / 2), shape[-1])
+        draws = create_base_draws(
+            half_shape, seed, monte_carlo_sequence, scramble=scramble
+        )
+        draws = np.concatenate([draws, -draws], axis=-2)[..., :n_draws, :]
+
+        return draws
+
     n_choices = shape[-1]
     n_points = np.prod(shape[:-1])
 
@@ -113,13 +244,17 @@ def create_base_draws(shape, seed, monte_carlo_sequence):
     if monte_carlo_sequence == "random":
         draws = np.random.standard_normal(shape)
 
-    elif monte_carlo_sequence == "halton":
-        distribution = cp.MvNormal(loc=np.zeros(n_choices), scale=np.eye(n_choices))
-        draws = distribution.sample(n_points, rule="H").T.reshape(shape)
+    elif monte_carlo_sequence in ["halton", "sobol"]:
+        uniforms = np.empty((n_points, n_choices))
 
-    elif monte_carlo_sequence == "sobol":
-        distribution = cp.MvNormal(loc=np.zeros(n_choices), scale=np.eye(n_choices))
-        draws = distribution.sample(n_points, rule="S").T.reshape(shape)
+        if scramble:
+            _fill_scrambled_sequence(uniforms, monte_carlo_sequence, seed)
+        elif monte_carlo_sequence == "halton":
+            _fill_halton_sequence(np.array(_create_primes(n_choices)), uniforms)
+        else:
+            _fill_sobol_sequence(_create_sobol_direction_numbers(n_choices), uniforms)
+
+        draws = special.ndtri(uniforms, out=uniforms).reshape(shape)
 
     else:
         raise NotImplementedError
@@ -127,6 +262,239 @@ def create_base_draws(shape, seed, monte_carlo_sequence):
     return draws
 
 
+def _create_primes(n_primes):
+    """Create the first prime numbers.
+
+    Examples
+    --------
+    >>> _create_primes(5)
+    [2, 3, 5, 7, 11]
+
+    """
+    primes = []
+    candidate = 2
+    while len(primes) < n_primes:
+        if all(candidate % prime for prime in primes):
+            primes.append(candidate)
+        candidate += 1
+
+    return primes
+
+
+@nb.njit(parallel=True)
+def _fill_halton_sequence(primes, out):
+    """Fill an array with points of the Halton sequence.
+
+    The first ``max(primes)`` points of the sequence are skipped. Each point is the
+    radical inverse of its index in the prime base of the dimension and is computed
+    independently such that the points are generated in parallel.
+
+    """
+    n_points, n_dimensions = out.shape
+    burn_in = primes.max()
+
+    for i in nb.prange(n_points):
+        for j in range(n_dimensions):
+            index = i + burn_in + 1
+            base = float(primes[j])
+            value = 0.0
+            while index > 0:
+                value += (index % primes[j]) / base
+                index //= primes[j]
+                base *= primes[j]
+            out[i, j] = value
+
+
+def _create_sobol_direction_numbers(n_dimensions):
+    """Create the direction numbers of the Sobol sequence.
+
+    The direction numbers are derived from the primitive polynomials and initial
+    direction numbers in :data:`SOBOL_PARAMETERS` from [1]_ and are scaled to integers
+    with :data:`SOBOL_N_BITS` bits.
+
+    References
+    ----------
+    .. [1] Bratley, P., & Fox, B. L. (1988). Algorithm 659: Implementing Sobol's
+           quasirandom sequence generator. *ACM Transactions on Mathematical Software
+           (TOMS)*, 14(1), 88-100.
+
+    """
+    if n_dimensions > len(SOBOL_PARAMETERS):
+        raise ValueError(
+            f"The Sobol sequence supports up to {len(SOBOL_PARAMETERS)} dimensions."
+        )
+
+    direction_numbers = np.zeros((n_dimensions, SOBOL_N_BITS), dtype=np.int64)
+    direction_numbers[0] = 1
+
+    for dim in range(1, n_dimensions):
+        polynomial, initial = SOBOL_PARAMETERS[dim]
+        degree = polynomial.bit_length() - 1
+        direction_numbers[dim, : len(initial)] = initial
+
+        for col in range(degree, SOBOL_N_BITS):
+            value = direction_numbers[dim, col - degree]
+            for k in range(1, degree + 1):
+                if polynomial >> (degree - k) & 1:
+                    value ^= 2 ** k * direction_numbers[dim, col - k]
+            direction_numbers[dim, col] = value
+
+    direction_numbers *= 2 ** np.arange(SOBOL_N_BITS, 0, -1)
+
+    return direction_numbers
+
+
+@nb.njit(parallel=True)
+def _fill_sobol_sequence(direction_numbers, out):
+    """Fill an array with points of the Sobol sequence.
+
+    The first point, the origin, is skipped. The point with index :math:`i` is the
+    exclusive or of the direction numbers selected by the bits of the Gray code of
+    :math:`i`. Thus, every point is computed independently and the points are generated
+    in parallel instead of recursively.
+
+    """
+    n_points, n_dimensions = out.shape
+    n_bits = direction_numbers.shape[1]
+    denominator = 0.5 ** (n_bits + 1)
+
+    for i in nb.prange(n_points):
+        gray_code = (i + 1) ^ ((i + 1) >> 1)
+        for j in range(n_dimensions):
+            value = 0
+            for bit in range(n_bits):
+                if gray_code >> bit & 1:
+                    value ^= direction_numbers[j, bit]
+            out[i, j] = value * denominator
+
+
+def _fill_scrambled_sequence(out, monte_carlo_sequence, seed):
+    """Fill an array with points of a scrambled Sobol or Halton sequence.
+
+    The sequences of :mod:`scipy.stats.qmc` are randomized with the seed which allows
+    to replicate quasi-Monte Carlo integrals with independent randomizations. The points
+    are generated in chunks to limit the memory of intermediate arrays.
+
+    """
+    engine_class = qmc.Sobol if monte_carlo_sequence == "sobol" else qmc.Halton
+    engine = engine_class(out.shape[1], scramble=True, seed=seed)
+
+    with warnings.catch_warnings():
+        warnings.filterwarnings("ignore", message=".*balance properties.*")
+        for start in range(0, out.shape[0], QMC_CHUNK_SIZE):
+            stop = min(start + QMC_CHUNK_SIZE, out.shape[0])
+            out[start:stop] = engine.random(stop - start)
+
+
+def create_quadrature_nodes_and_weights(n_dimensions, rule, level):
+    """Create nodes and weights to integrate over the standard normal distribution.
+
+    Instead of averaging over Monte Carlo draws, the expected value function can be
+    computed with deterministic quadrature rules which need far fewer nodes for models
+    with a small number of choices.
+
+    `"gauss_hermite"` creates a product rule of one-dimensional Gauss-Hermite rules with
+    ``level`` nodes per dimension which results in ``level ** n_dimensions`` nodes.
+
+    `"smolyak"` creates a sparse grid with Smolyak's combination technique from
+    Gauss-Hermite rules with up to ``level`` nodes (see [1]_). The number of nodes grows
+    only polynomially in the number of dimensions. Some weights are negative.
+
+    The nodes are standard normal and are transformed like Monte Carlo draws in
+    :func:`transform_base_draws_with_cholesky_factor`.
+
+    Parameters
+    ----------
+    n_dimensions : int
+        Number of dimensions which is the number of choices.
+    rule : {"gauss_hermite", "smolyak"}
+        Name of the quadrature rule.
+    level : int
+        Number of nodes per dimension of the product rule or level of the sparse grid.
+
+    Returns
+    -------
+    nodes : numpy.ndarray
+        Array with shape (n_nodes, n_dimensions).
+    weights : numpy.ndarray
+        Array with shape (n_nodes,) whose elements sum to one.
+
+    References
+    ----------
+    .. [1] Heiss, F. and Winschel, V. (2008). `Likelihood approximation by numerical
+           integration on sparse grids
+           <https://doi.org/10.1016/j.jeconom.2007.12.004>`_. *Journal of
+           Econometrics*, 144(1): 62-80.
+
+    Examples
+    --------
+    >>> nodes, weights = create_quadrature_nodes_and_weights(2, "gauss_hermite", 3)
+    >>> nodes.shape, weights.sum().round(12)
+    ((9, 2), 1.0)
+    >>> nodes, weights = create_quadrature_nodes_and_weights(2, "smolyak", 3)
+    >>> nodes.shape, weights.sum().round(12)
+    ((13, 2), 1.0)
+
+    """
+    if rule == "gauss_hermite":
+        nodes, weights = _create_tensor_product_rule(
+            [_create_gauss_hermite_rule(level)] * n_dimensions
+        )
+
+    elif rule == "smolyak":
+        nodes, weights = _create_smolyak_rule(n_dimensions, level)
+
+    else:
+        raise NotImplementedError
+
+    return nodes, weights
+
+
+def _create_gauss_hermite_rule(n_nodes):
+    """Create a Gauss-Hermite rule for the standard normal distribution."""
+    nodes, weights = np.polynomial.hermite_e.hermegauss(n_nodes)
+    return nodes, weights / np.sqrt(2 * np.pi)
+
+
+def _create_tensor_product_rule(rules):
+    """Create the tensor product of one-dimensional quadrature rules."""
+    nodes = np.array(list(itertools.product(*(nodes for nodes, _ in rules))))
+    weights = np.array(list(itertools.product(*(weights for _, weights in rules))))
+
+    return nodes, weights.prod(axis=1)
+
+
+def _create_smolyak_rule(n_dimensions, level):
+    """Create a sparse grid with Smolyak's combination technique.
+
+    Identical nodes of the tensor products are merged by adding up their weights.
+
+    """
+    max_norm = n_dimensions + level - 1
+    min_norm = max(n_dimensions, max_norm - n_dimensions + 1)
+
+    key_to_node = {}
+    key_to_weight = {}
+    for levels in itertools.product(range(1, level + 1), repeat=n_dimensions):
+        norm = sum(levels)
+        if min_norm <= norm <= max_norm:
+            coefficient = (-1) ** (max_norm - norm) * special.comb(
+                n_dimensions - 1, max_norm - norm
+            )
+            nodes, weights = _create_tensor_product_rule(
+                [_create_gauss_hermite_rule(n_nodes) for n_nodes in levels]
+            )
+            for node, weight in zip(nodes, weights):
+                key = tuple(node.round(12))
+                key_to_node.setdefault(key, node)
+                key_to_weight[key] = key_to_weight.get(key, 0) + coefficient * weight
+
+    nodes = np.array(list(key_to_node.values()))
+    weights = np.array(list(key_to_weight.values()))
+
+    return nodes, weights
+
+
 @parallelize_across_dense_dimensions
 def transform_base_draws_with_cholesky_factor(
     draws, choice_set, shocks_cholesky, optim_paras
@@ -146,25 +514,79 @@ def transform_base_draws_with_cholesky_factor(
     .. [1] Gentle, J. E. (2009). Computational statistics (Vol. 308). New York:
            Springer.
 
+    If ``shocks_cholesky`` is a stack of Cholesky factors with shape ``(n_params,
+    n_choices, n_choices)``, the transformed draws have the shape ``(n_params, n_draws,
+    n_choices)``.
+
     See also
     --------
     create_base_draws
 
     """
     shocks_cholesky = subset_cholesky_factor_to_choice_set(shocks_cholesky, choice_set)
-    draws_transformed = draws.dot(shocks_cholesky.T)
+    draws_transformed = draws @ np.swapaxes(shocks_cholesky, -1, -2)
 
     # Check how many wages we have
     n_wages_raw = len(optim_paras["choices_w_wage"])
     n_wages = sum(choice_set[:n_wages_raw])
 
-    draws_transformed[:, :n_wages] = np.exp(
-        np.clip(draws_transformed[:, :n_wages], MIN_LOG_FLOAT, MAX_LOG_FLOAT)
+    draws_transformed[..., :n_wages] = np.exp(
+        np.clip(draws_transformed[..., :n_wages], MIN_LOG_FLOAT, MAX_LOG_FLOAT)
     )
 
     return draws_transformed
 
 
+def transform_base_draws_of_choice_sets(
+    base_draws, dense_key_to_complex, shocks_cholesky, optim_paras, dtype=None
+):
+    """Transform the base draws of dense keys once per period and choice set.
+
+    Dense keys with the same choice set in a period share the same base draws (see
+    :meth:`~respy.state_space.StateSpace.create_draws`) and, thus, the same transformed
+    draws. Instead of calling :func:`transform_base_draws_with_cholesky_factor` for
+    every dense key, the draws are transformed once per period and choice set and the
+    resulting read-only array is shared by all dense keys with this combination.
+
+    Parameters
+    ----------
+    base_draws : dict
+        Maps dense keys to arrays with shape ``(n_draws, n_choices)``.
+    dense_key_to_complex : dict
+        Maps dense keys to complex indices whose first two elements are the period and
+        the choice set.
+    shocks_cholesky : numpy.ndarray
+        Cholesky factor or stack of Cholesky factors of the shocks.
+    optim_paras : dict
+        Parsed model parameters affected by the optimization.
+    dtype : numpy.dtype, default None
+        Data type of the transformed draws. :data:`None` keeps the data type of the
+        transformation.
+
+    Returns
+    -------
+    draws : dict
+        Maps dense keys to read-only arrays of transformed draws.
+
+    """
+    period_and_choice_set_to_draws = {}
+    draws = {}
+    for dense_key, complex_ in dense_key_to_complex.items():
+        period_and_choice_set = complex_[:2]
+        if period_and_choice_set not in period_and_choice_set_to_draws:
+            transformed = transform_base_draws_with_cholesky_factor(
+                base_draws[dense_key], complex_[1], shocks_cholesky, optim_paras
+            )
+            if dtype is not None:
+                transformed = transformed.astype(dtype, copy=False)
+            transformed.flags.writeable = False
+            period_and_choice_set_to_draws[period_and_choice_set] = transformed
+
+        draws[dense_key] = period_and_choice_set_to_draws[period_and_choice_set]
+
+    return draws
+
+
 def generate_column_dtype_dict_for_estimation(optim_paras):
     """Generate column labels for data necessary for the estimation."""
     labels = (
@@ -366,11 +788,10 @@ def normalize_probabilities(probabilities):
     return probabilities
 
 
-@nb.guvectorize(
-    ["f8, f8, f8, f8, f8, f8[:], f8[:]"],
+@guvectorize_with_target_selection(
+    ["f4, f4, f4, f4, f8, f8[:], f8[:]", "f8, f8, f8, f8, f8, f8[:], f8[:]"],
     "(), (), (), (), () -> (), ()",
     nopython=True,
-    target="parallel",
 )
 def calculate_value_functions_and_flow_utilities(
     wage, nonpec, continuation_value, draw, delta, value_function, flow_utility
@@ -432,14 +853,25 @@ def create_state_space_columns(optim_paras):
     ) + create_dense_state_space_columns(optim_paras)
 
 
-@nb.guvectorize(
-    ["f8[:], f8[:], f8[:], f8[:, :], f8, f8[:]"],
-    "(n_choices), (n_choices), (n_choices), (n_draws, n_choices), () -> ()",
+@guvectorize_with_target_selection(
+    [
+        "f4[:], f4[:], f4[:], f4[:, :], f8[:], f4[:], f4[:], f8, f8[:]",
+        "f8[:], f8[:], f8[:], f8[:, :], f8[:], f8[:], f8[:], f8, f8[:]",
+    ],
+    "(n_choices), (n_choices), (n_choices), (n_draws, n_choices), (n_draws), "
+    "(n_choices), (n_choices), () -> ()",
     nopython=True,
-    target="parallel",
 )
 def calculate_expected_value_functions(
-    wages, nonpecs, continuation_values, draws, delta, expected_value_functions
+    wages,
+    nonpecs,
+    continuation_values,
+    draws,
+    weights,
+    draws_lower,
+    draws_upper,
+    delta,
+    expected_value_functions,
 ):
     r"""Calculate the expected maximum of value functions for a set of unobservables.
 
@@ -455,6 +887,10 @@ def calculate_expected_value_functions(
     this setting, one wants to approximate the expected maximum utility of the current
     state.
 
+    The maximum utilities are averaged with ``weights`` which are normalized to sum to
+    one. Monte Carlo integration uses equal weights whereas quadrature rules from
+    :func:`create_quadrature_nodes_and_weights` supply their own weights.
+
     Note that ``wages`` have the same length as ``nonpecs`` despite that wages are only
     available in some choices. Missing choices are filled with ones. In the case of a
     choice with wage and without wage, flow utilities are
@@ -464,6 +900,127 @@ def calculate_expected_value_functions(
         \text{Flow Utility} = \text{Wage} * \epsilon + \text{Non-pecuniary}
         \text{Flow Utility} = 1 * \epsilon + \text{Non-pecuniary}
 
+    Before iterating over the draws, choices which cannot be maximal for any draw
+    between ``draws_lower`` and ``draws_upper`` are discarded with
+    :func:`find_undominated_choices`. This does not change the result.
+
+    Parameters
+    ----------
+    wages : numpy.ndarray
+        Array with shape (n_choices,) containing wages.
+    nonpecs : numpy.ndarray
+        Array with shape (n_choices,) containing non-pecuniary rewards.
+    continuation_values : numpy.ndarray
+        Array with shape (n_choices,) containing expected maximum utility for each
+        choice in the subsequent period.
+    draws : numpy.ndarray
+        Array with shape (n_draws, n_choices).
+    weights : numpy.ndarray
+        Array with shape (n_draws,) containing the weights of the draws.
+    draws_lower : numpy.ndarray
+        Array with shape (n_choices,) containing the smallest draw of each choice.
+    draws_upper : numpy.ndarray
+        Array with shape (n_choices,) containing the largest draw of each choice.
+    delta : float
+        The discount factor.
+
+    Returns
+    -------
+    expected_value_functions : float
+        Expected maximum utility of an agent.
+
+    """
+    expected_value_functions[0] = _calculate_expected_value_function(
+        wages,
+        nonpecs,
+        continuation_values,
+        draws,
+        weights,
+        draws_lower,
+        draws_upper,
+        delta,
+    )
+
+
+@nb.njit
+def _calculate_expected_value_function(
+    wages,
+    nonpecs,
+    continuation_values,
+    draws,
+    weights,
+    draws_lower,
+    draws_upper,
+    delta,
+):
+    """Calculate the expected maximum of value functions of a single state.
+
+    See :func:`calculate_expected_value_functions` for the parameters.
+
+    """
+    n_draws = draws.shape[0]
+
+    # The maximum is bounded from below by zero.
+    choices = find_undominated_choices(
+        wages, nonpecs, continuation_values, draws_lower, draws_upper, delta, 0, 0
+    )
+
+    expected_value_function = 0.0
+    sum_weights = 0.0
+
+    for i in range(n_draws):
+
+        max_value_functions = 0
+
+        for j in choices:
+            value_function, _ = aggregate_keane_wolpin_utility(
+                wages[j], nonpecs[j], continuation_values[j], draws[i, j], delta
+            )
+
+            if value_function > max_value_functions:
+                max_value_functions = value_function
+
+        expected_value_function += weights[i] * max_value_functions
+        sum_weights += weights[i]
+
+    return expected_value_function / sum_weights
+
+
+@guvectorize_with_target_selection(
+    [
+        "f4[:], f4[:], f4[:], f4[:, :], f8[:], f8[:], f8, f8[:]",
+        "f8[:], f8[:], f8[:], f8[:, :], f8[:], f8[:], f8, f8[:]",
+    ],
+    "(n_choices), (n_choices), (n_choices), (n_draws, n_choices), (n_draws), "
+    "(n_choices), () -> ()",
+    nopython=True,
+)
+def calculate_expected_value_functions_with_control_variate(
+    wages,
+    nonpecs,
+    continuation_values,
+    draws,
+    weights,
+    expected_draws,
+    delta,
+    expected_value_functions,
+):
+    r"""Calculate the expected maximum of value functions with a control variate.
+
+    The Monte Carlo estimate of :func:`calculate_expected_value_functions` is corrected
+    with a control variate whose expectation is known. The control variate is the value
+    function of the choice which is maximal at the expected draws. Since the value
+    function is linear in the draw, its expectation is the value function at the
+    expected draw. The corrected estimate is
+
+    .. math::
+
+        \hat{E}[\max_j V_j] - \hat{\beta} (\hat{E}[V_c] - E[V_c])
+
+    where :math:`\hat{\beta}` is the estimated coefficient of the regression of the
+    maximum on the control variate. The estimate is consistent and the variance is
+    reduced by the squared correlation of the maximum and the control variate.
+
     Parameters
     ----------
     wages : numpy.ndarray
@@ -475,6 +1032,11 @@ def calculate_expected_value_functions(
         choice in the subsequent period.
     draws : numpy.ndarray
         Array with shape (n_draws, n_choices).
+    weights : numpy.ndarray
+        Array with shape (n_draws,) containing the weights of the draws.
+    expected_draws : numpy.ndarray
+        Array with shape (n_choices,) containing the expected value of the draws, see
+        :func:`compute_expected_draws`.
     delta : float
         The discount factor.
 
@@ -486,10 +1048,26 @@ def calculate_expected_value_functions(
     """
     n_draws, n_choices = draws.shape
 
-    expected_value_functions[0] = 0
+    control = 0
+    expected_control = -np.inf
+    for j in range(n_choices):
+        value_function, _ = aggregate_keane_wolpin_utility(
+            wages[j], nonpecs[j], continuation_values[j], expected_draws[j], delta
+        )
+        if value_function > expected_control:
+            expected_control = value_function
+            control = j
+
+    # Moments are centered at the expected control variate for numerical stability.
+    sum_weights = 0.0
+    sum_max = 0.0
+    sum_control = 0.0
+    sum_max_control = 0.0
+    sum_control_squared = 0.0
 
     for i in range(n_draws):
 
+        # The maximum is bounded from below by zero.
         max_value_functions = 0
 
         for j in range(n_choices):
@@ -500,9 +1078,374 @@ def calculate_expected_value_functions(
             if value_function > max_value_functions:
                 max_value_functions = value_function
 
-        expected_value_functions[0] += max_value_functions
+        control_value_function, _ = aggregate_keane_wolpin_utility(
+            wages[control],
+            nonpecs[control],
+            continuation_values[control],
+            draws[i, control],
+            delta,
+        )
+
+        centered_max = max_value_functions - expected_control
+        centered_control = control_value_function - expected_control
+
+        sum_weights += weights[i]
+        sum_max += weights[i] * centered_max
+        sum_control += weights[i] * centered_control
+        sum_max_control += weights[i] * centered_max * centered_control
+        sum_control_squared += weights[i] * centered_control ** 2
+
+    mean_max = sum_max / sum_weights
+    mean_control = sum_control / sum_weights
+    variance = sum_control_squared / sum_weights - mean_control ** 2
+    covariance = sum_max_control / sum_weights - mean_max * mean_control
+
+    beta = covariance / variance if variance > 0 else 0.0
+
+    expected_value_functions[0] = expected_control + mean_max - beta * mean_control
+
+
+def compute_expected_shocks(choice_set, optim_paras):
+    r"""Compute the expected value of the shocks of the choices in a choice set.
+
+    The shocks of choices without wages are normally distributed with mean zero. The
+    shocks of choices with wages are log-normally distributed with expectation
+    :math:`\exp\{\sigma^2 / 2\}`.
+
+    Parameters
+    ----------
+    choice_set : tuple of bool
+        Indicates which choices are available.
+    optim_paras : dict
+        Parsed model parameters affected by the optimization.
+
+    Returns
+    -------
+    expected_shocks : numpy.ndarray
+        Array with shape (n_choices_in_set,).
+
+    """
+    n_wages = len(optim_paras["choices_w_wage"])
+
+    exp_shocks = np.zeros(len(optim_paras["choices"]))
+    var = np.diag(optim_paras["shocks_cholesky"].dot(optim_paras["shocks_cholesky"].T))
+    exp_shocks[:n_wages] = np.exp(np.clip(var[:n_wages], 0, MAX_LOG_FLOAT) / 2)
+
+    return exp_shocks[np.array(choice_set)]
+
+
+def compute_expected_draws(choice_set, shocks_cholesky, optim_paras):
+    r"""Compute the expected value of the draws of a choice set.
+
+    The expectation matches the draws of
+    :func:`transform_base_draws_with_cholesky_factor` which use the Cholesky factor
+    subset to the choice set. Thus, the variance of the log shock of a wage choice
+    :math:`j` is :math:`\sum_{k \in C} L_{jk}^2` where :math:`C` is the choice set. It
+    differs from the variance of the full model if an excluded choice precedes the wage
+    choice and their shocks are correlated.
+
+    Parameters
+    ----------
+    choice_set : tuple of bool
+        Indicates which choices are available.
+    shocks_cholesky : numpy.ndarray
+        Cholesky factor of the shocks with shape (n_choices, n_choices).
+    optim_paras : dict
+        Parsed model parameters affected by the optimization.
+
+    Returns
+    -------
+    expected_draws : numpy.ndarray
+        Array with shape (n_choices_in_set,).
+
+    Examples
+    --------
+    >>> optim_paras = {"choices_w_wage": ["a", "b"]}
+    >>> shocks_cholesky = np.array([[1, 0, 0], [1, 1, 0], [0, 0, 1]])
+    >>> compute_expected_draws((False, True, True), shocks_cholesky, optim_paras)
+    array([1.64872127, 0.        ])
+
+    """
+    shocks_cholesky = subset_cholesky_factor_to_choice_set(shocks_cholesky, choice_set)
+    n_wages = sum(choice_set[: len(optim_paras["choices_w_wage"])])
+
+    expected_draws = np.zeros(shocks_cholesky.shape[0])
+    variances = (shocks_cholesky[:n_wages] ** 2).sum(axis=1)
+    expected_draws[:n_wages] = np.exp(np.clip(variances, 0, MAX_LOG_FLOAT) / 2)
+
+    return expected_draws
+
+
+@nb.njit(parallel=True)
+def calculate_expected_value_functions_of_period(
+    wages,
+    nonpecs,
+    continuation_values,
+    state_to_group,
+    group_to_n_choices,
+    group_to_n_draws,
+    draws,
+    weights,
+    draws_lower,
+    draws_upper,
+    delta,
+):
+    """Calculate the expected value functions of all states in a period.
+
+    Instead of one call of :func:`calculate_expected_value_functions` per dense key,
+    the states of all dense keys in a period are processed in a single parallel loop
+    which balances the work across threads regardless of the size of the dense keys.
+
+    The choice dimension of all arrays is padded to the largest choice set in the
+    period. Each state refers to a group, the choice set of its dense key, which
+    determines the number of choices and the shared draws of the state.
+
+    Parameters
+    ----------
+    wages : numpy.ndarray
+        Array with shape (n_states, n_choices) containing wages.
+    nonpecs : numpy.ndarray
+        Array with shape (n_states, n_choices) containing non-pecuniary rewards.
+    continuation_values : numpy.ndarray
+        Array with shape (n_states, n_choices) containing the continuation values.
+    state_to_group : numpy.ndarray
+        Array with shape (n_states,) containing the group of each state.
+    group_to_n_choices : numpy.ndarray
+        Array with shape (n_groups,) containing the number of choices of each group.
+    group_to_n_draws : numpy.ndarray
+        Array with shape (n_groups,) containing the number of draws of each group.
+    draws : numpy.ndarray
+        Array with shape (n_groups, n_draws, n_choices).
+    weights : numpy.ndarray
+        Array with shape (n_groups, n_draws) containing the weights of the draws.
+    draws_lower : numpy.ndarray
+        Array with shape (n_groups, n_choices) containing the smallest draws.
+    draws_upper : numpy.ndarray
+        Array with shape (n_groups, n_choices) containing the largest draws.
+    delta : float
+        The discount factor.
+
+    Returns
+    -------
+    expected_value_functions : numpy.ndarray
+        Array with shape (n_states,) containing the expected maximum utilities.
+
+    """
+    n_states = wages.shape[0]
+    expected_value_functions = np.empty(n_states)
+
+    for i in nb.prange(n_states):
+        group = state_to_group[i]
+        n_choices = group_to_n_choices[group]
+        n_draws = group_to_n_draws[group]
+
+        expected_value_functions[i] = _calculate_expected_value_function(
+            wages[i, :n_choices],
+            nonpecs[i, :n_choices],
+            continuation_values[i, :n_choices],
+            draws[group, :n_draws, :n_choices],
+            weights[group, :n_draws],
+            draws_lower[group, :n_choices],
+            draws_upper[group, :n_choices],
+            delta,
+        )
+
+    return expected_value_functions
+
+
+@guvectorize_with_target_selection(
+    ["f8[:], f8[:], f8[:], f8[:, :], f8[:], f8[:], f8, f8, i8, f8[:], f8[:], i8[:]"],
+    "(n_choices), (n_choices), (n_choices), (n_draws, n_choices), (n_choices), "
+    "(n_choices), (), (), () -> (), (), ()",
+    nopython=True,
+)
+def calculate_expected_value_functions_with_error_control(
+    wages,
+    nonpecs,
+    continuation_values,
+    draws,
+    draws_lower,
+    draws_upper,
+    delta,
+    tolerance,
+    block_size,
+    expected_value_functions,
+    standard_errors,
+    n_draws_used,
+):
+    """Calculate the expected maximum of value functions with adaptive draws.
+
+    The function is the adaptive counterpart to
+    :func:`calculate_expected_value_functions`. The draws are processed in blocks of
+    ``block_size`` draws. After each block, the standard error of the Monte Carlo
+    estimate is computed from the running mean and variance of the maximum utilities.
+    The integration stops as soon as the standard error is not larger than
+    ``tolerance`` or all draws are used.
+
+    Parameters
+    ----------
+    wages : numpy.ndarray
+        Array with shape (n_choices,) containing wages.
+    nonpecs : numpy.ndarray
+        Array with shape (n_choices,) containing non-pecuniary rewards.
+    continuation_values : numpy.ndarray
+        Array with shape (n_choices,) containing expected maximum utility for each
+        choice in the subsequent period.
+    draws : numpy.ndarray
+        Array with shape (n_draws, n_choices). The number of draws is the maximum
+        number of draws.
+    draws_lower : numpy.ndarray
+        Array with shape (n_choices,) containing the smallest draw of each choice.
+    draws_upper : numpy.ndarray
+        Array with shape (n_choices,) containing the largest draw of each choice.
+    delta : float
+        The discount factor.
+    tolerance : float
+        The standard error of the expected value function at which the integration
+        stops.
+    block_size : int
+        The number of draws after which the standard error is checked.
+
+    Returns
+    -------
+    expected_value_functions : float
+        Expected maximum utility of an agent.
+    standard_errors : float
+        Standard error of the expected maximum utility.
+    n_draws_used : int
+        Number of draws used to compute the expected maximum utility.
+
+    """
+    n_draws = draws.shape[0]
+
+    choices = find_undominated_choices(
+        wages, nonpecs, continuation_values, draws_lower, draws_upper, delta, 0, 0
+    )
+
+    mean = 0.0
+    sum_squared_deviations = 0.0
+    standard_error = np.inf
+    n = 0
+
+    for i in range(n_draws):
+
+        max_value_functions = 0
+
+        for j in choices:
+            value_function, _ = aggregate_keane_wolpin_utility(
+                wages[j], nonpecs[j], continuation_values[j], draws[i, j], delta
+            )
+
+            if value_function > max_value_functions:
+                max_value_functions = value_function
+
+        # Welford's algorithm for the running mean and variance.
+        n = i + 1
+        deviation = max_value_functions - mean
+        mean += deviation / n
+        sum_squared_deviations += deviation * (max_value_functions - mean)
+
+        if n % block_size == 0 or n == n_draws:
+            if n > 1:
+                standard_error = np.sqrt(sum_squared_deviations / (n - 1) / n)
+            if standard_error <= tolerance:
+                break
+
+    expected_value_functions[0] = mean
+    standard_errors[0] = standard_error
+    n_draws_used[0] = n
+
+
+@guvectorize_with_target_selection(
+    ["f8[:], f8[:], f8[:, :], f8, f8[:]"],
+    "(n_choices), (n_choices), (n_choices, n_choices), () -> ()",
+    nopython=True,
+)
+def calculate_expected_value_functions_with_normal_shocks(
+    nonpecs, continuation_values, shocks_cov, delta, expected_value_functions
+):
+    r"""Calculate the expected maximum of value functions with additive normal shocks.
+
+    If the choice set of a state contains no choice with a wage, all shocks enter the
+    value functions additively and the value functions are jointly normally distributed.
+    Then, the expected maximum can be computed analytically without Monte Carlo
+    integration.
+
+    The function applies the method of [1]_ which computes the first two moments of the
+    maximum of two normal variables and its covariances with the remaining variables.
+    The maximum is then approximated by a normal variable and the procedure continues
+    with the next variable. The result is exact for two variables and a close
+    approximation for more.
+
+    As in :func:`calculate_expected_value_functions`, the maximum is bounded from below
+    by zero which is included as a degenerate variable.
+
+    Parameters
+    ----------
+    nonpecs : numpy.ndarray
+        Array with shape (n_choices,) containing non-pecuniary rewards.
+    continuation_values : numpy.ndarray
+        Array with shape (n_choices,) containing expected maximum utility for each
+        choice in the subsequent period.
+    shocks_cov : numpy.ndarray
+        Array with shape (n_choices, n_choices) containing the variance-covariance
+        matrix of the shocks.
+    delta : float
+        The discount factor.
+
+    Returns
+    -------
+    expected_value_functions : float
+        Expected maximum utility of an agent.
+
+    References
+    ----------
+    .. [1] Clark, C. E. (1961). `The Greatest of a Finite Set of Random Variables
+           <https://doi.org/10.1287/opre.9.2.145>`_. *Operations Research*, 9(2):
+           145-162.
+
+    """
+    n_choices = nonpecs.shape[0]
+
+    # Moments of the running maximum which starts with the lower bound of zero.
+    mean = 0.0
+    variance = 0.0
+    covariances = np.zeros(n_choices)
+
+    for k in range(n_choices):
+        mean_k = nonpecs[k] + delta * continuation_values[k]
+        variance_k = shocks_cov[k, k]
+        variance_diff = variance + variance_k - 2 * covariances[k]
+
+        if variance_diff <= 0:
+            if mean_k > mean:
+                mean = mean_k
+                variance = variance_k
+                for j in range(k + 1, n_choices):
+                    covariances[j] = shocks_cov[k, j]
+
+        else:
+            sd_diff = np.sqrt(variance_diff)
+            alpha = (mean - mean_k) / sd_diff
+            cdf = 0.5 * math.erfc(-alpha / np.sqrt(2))
+            cdf_complement = 1 - cdf
+            pdf = np.exp(-0.5 * alpha ** 2) / np.sqrt(2 * np.pi)
+
+            new_mean = mean * cdf + mean_k * cdf_complement + sd_diff * pdf
+            second_moment = (
+                (variance + mean ** 2) * cdf
+                + (variance_k + mean_k ** 2) * cdf_complement
+                + (mean + mean_k) * sd_diff * pdf
+            )
+
+            mean = new_mean
+            variance = max(second_moment - new_mean ** 2, 0)
+            for j in range(k + 1, n_choices):
+                covariances[j] = (
+                    covariances[j] * cdf + shocks_cov[k, j] * cdf_complement
+                )
 
-    expected_value_functions[0] /= n_draws
+    expected_value_functions[0] = mean
 
 
 def convert_dictionary_keys_to_dense_indices(dictionary):
@@ -526,6 +1469,9 @@ def convert_dictionary_keys_to_dense_indices(dictionary):
 def subset_cholesky_factor_to_choice_set(cholesky_factor, choice_set):
     """Subset the Cholesky factor to dimensions required by the admissible choice set.
 
+    The Cholesky factor can also be a stack of factors with the last two axes being
+    the dimensions of the choices.
+
     Examples
     --------
     >>> m = np.arange(9).reshape(3, 3)
@@ -534,7 +1480,7 @@ def subset_cholesky_factor_to_choice_set(cholesky_factor, choice_set):
 
     """
     rows_cols_to_keep = np.where(choice_set)[0]
-    out = cholesky_factor[rows_cols_to_keep][:, rows_cols_to_keep]
+    out = cholesky_factor[..., rows_cols_to_keep, :][..., rows_cols_to_keep]
     return out
 
 
@@ -559,8 +1505,9 @@ def pandas_dot(x, beta, out=None):
     ----------
     x : pandas.DataFrame
         A DataFrame containing the covariates of the dot product.
-    beta : pandas.Series
-        A Series containing the parameters or coefficients of the dot product.
+    beta : pandas.Series or pandas.DataFrame
+        A Series containing the parameters or coefficients of the dot product. A
+        DataFrame contains one column of coefficients per parameter vector.
     out : numpy.ndarray or optional
         An output array can be passed to the function which is filled instead of
         allocating a new array.
@@ -568,7 +1515,8 @@ def pandas_dot(x, beta, out=None):
     Returns
     -------
     out : numpy.ndarray
-        Array with shape `len(x)` which contains the solution of the dot product.
+        Array with shape `len(x)` which contains the solution of the dot product. If
+        ``beta`` is a DataFrame, the array has the shape ``(len(x), beta.shape[1])``.
 
     Examples
     --------
@@ -578,15 +1526,24 @@ def pandas_dot(x, beta, out=None):
     array([ 2,  8, 14, 20, 26]...
     >>> pandas_dot(x, beta)
     array([ 2.,  8., 14., 20., 26.])
+    >>> pandas_dot(x, pd.concat([beta, 2 * beta], axis=1))[:2]
+    array([[ 2.,  4.],
+           [ 8., 16.]])
 
     """
     received_out = False if out is None else True
 
     if not received_out:
-        out = np.zeros(x.shape[0])
+        out = np.zeros(x.shape[:1] + beta.shape[1:])
 
-    for covariate, beta in beta.items():
-        out += beta * x[covariate].values
+    # The products of each column of a DataFrame are computed in the same order as for
+    # a Series such that the results are equal.
+    if isinstance(beta, pd.DataFrame):
+        for covariate, coefficients in zip(beta.index, beta.to_numpy()):
+            out += coefficients * x[covariate].values[:, np.newaxis]
+    else:
+        for covariate, beta in beta.items():
+            out += beta * x[covariate].values
 
     if not received_out:
         return out
@@ -684,6 +1641,12 @@ def load_objects(topic, complex_, options):
     return pd.read_parquet(directory / file_name)
 
 
+def get_size_of_objects(topic, complex_, options):
+    """Get the size of stored objects in bytes."""
+    file_name = _create_file_name_from_complex_index(topic, complex_)
+    return (options["cache_path"] / file_name).stat().st_size
+
+
 def _create_file_name_from_complex_index(topic, complex_):
     """Create a file name from a complex index."""
     choice = "".join(str(int(x)) for x in complex_[1])
@@ -697,6 +1660,114 @@ def _create_file_name_from_complex_index(topic, complex_):
     return file_name
 
 
+def compute_params_hash(params):
+    """Compute a hash of the parameter vector.
+
+    The hash covers the index and the values of the parameters and identifies the
+    parameters for which a solution was computed.
+
+    Parameters
+    ----------
+    params : pandas.DataFrame or pandas.Series
+        The parameters. If a DataFrame is passed, the column ``"value"`` is used.
+
+    Returns
+    -------
+    params_hash : str
+        Hexadecimal digest of the parameters.
+
+    Examples
+    --------
+    >>> params = pd.Series([0.95, 1.0], index=["delta", "wage"])
+    >>> compute_params_hash(params) == compute_params_hash(params.to_frame("value"))
+    True
+    >>> compute_params_hash(params) == compute_params_hash(params + 1e-12)
+    False
+
+    """
+    values = params["value"] if isinstance(params, pd.DataFrame) else params
+
+    hash_ = hashlib.sha256()
+    hash_.update("|".join(str(label) for label in values.index).encode())
+    hash_.update(np.ascontiguousarray(values.to_numpy(dtype=np.float64)).tobytes())
+
+    return hash_.hexdigest()
+
+
+class LRUMemo:
+    """Memo of the least recently used outputs keyed by hashes of parameters.
+
+    Parameters
+    ----------
+    maxsize : int
+        Maximum number of memoized outputs. If the memo is full, the least recently used
+        output is dropped.
+
+    Examples
+    --------
+    >>> memo = LRUMemo(maxsize=2)
+    >>> memo.add("a", 1)
+    >>> memo.add("b", 2)
+    >>> memo.get("a")
+    1
+    >>> memo.add("c", 3)
+    >>> "b" in memo, len(memo)
+    (False, 2)
+
+    """
+
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self._outputs = collections.OrderedDict()
+
+    def __contains__(self, key):
+        return key in self._outputs
+
+    def __len__(self):
+        return len(self._outputs)
+
+    def get(self, key):
+        """Get the output of a key and mark it as the most recently used."""
+        self._outputs.move_to_end(key)
+        return self._outputs[key]
+
+    def add(self, key, output):
+        """Add an output and drop the least recently used one if the memo is full."""
+        self._outputs[key] = output
+        self._outputs.move_to_end(key)
+        while len(self._outputs) > self.maxsize:
+            self._outputs.popitem(last=False)
+
+
+def create_memo(options):
+    """Create a memo if memoization is requested in the options."""
+    maxsize = options["memoization_maxsize"]
+    return LRUMemo(maxsize) if maxsize > 0 else None
+
+
+def memoize_by_params_hash(func):
+    """Memoize the outputs of a criterion function by the hash of the parameters.
+
+    The decorated function accepts the keyword argument ``memo`` which is either
+    :data:`None` to disable memoization or a :class:`LRUMemo`. Copies of memoized
+    outputs are returned such that callers cannot modify the memo.
+
+    """
+
+    @functools.wraps(func)
+    def wrapper(params, *args, memo=None, **kwargs):
+        if memo is None:
+            return func(params, *args, **kwargs)
+
+        params_hash = compute_params_hash(params)
+        if params_hash not in memo:
+            memo.add(params_hash, func(params, *args, **kwargs))
+
+        return copy.deepcopy(memo.get(params_hash))
+
+    return wrapper
+
+
 def prepare_cache_directory(options):
     """Prepare cache directory.
 
@@ -9,6 +9,7 @@ from scipy.special import softmax
 from respy.config import DTYPE_STATES
 from respy.parallelization import parallelize_across_dense_dimensions
 from respy.parallelization import split_and_combine_df
+from respy.parallelization import use_execution_backend_from_options
 from respy.pre_processing.model_processing import process_params_and_options
 from respy.shared import apply_law_of_motion_for_core
 from respy.shared import calculate_value_functions_and_flow_utilities
@@ -35,6 +36,7 @@ def get_simulate_func(
     method="n_step_ahead_with_sampling",
     df=None,
     n_simulation_periods=None,
+    solution=None,
 ):
     """Get the simulation function.
 
@@ -57,6 +59,9 @@ def get_simulate_func(
         Simulate data for a number of periods. This options does not affect
         ``options["n_periods"]`` which controls the number of periods for which decision
         rules are computed.
+    solution : :class:`~respy.state_space.StateSpace`, default None
+        A solved state space, e.g., from :func:`~respy.solve.load_solution`, which is
+        re-used instead of solving the model again for the same parameters.
 
     Returns
     -------
@@ -79,7 +84,7 @@ def get_simulate_func(
 
     df = _process_input_df_for_simulation(df, method, options, optim_paras)
 
-    solve = get_solve_func(params, options)
+    solve = get_solve_func(params, options, solution)
 
     # We draw shocks for all observations and for all choices although some choices
     # might not be available. Later, only the relevant shocks are selected.
@@ -111,6 +116,7 @@ def get_simulate_func(
     return simulate_function
 
 
+@use_execution_backend_from_options
 def simulate(
     params,
     base_draws_sim,
@@ -412,7 +418,7 @@ def _simulate_single_period(
     draws_shock = df[[f"shock_reward_{c}" for c in valid_choices]].to_numpy()
     draws_shock_transformed = transform_base_draws_with_cholesky_factor(
         draws_shock, choice_set, optim_paras["shocks_cholesky"], optim_paras
-    )
+    ).astype(options["floating_point_dtype"], copy=False)
 
     draws_wage = df[[f"meas_error_wage_{c}" for c in valid_choices]].to_numpy()
     value_functions, flow_utilities = calculate_value_functions_and_flow_utilities(
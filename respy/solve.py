@@ -1,22 +1,73 @@
 """Everything related to the solution of a structural model."""
+import copy
 import functools
+import json
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
 
+import numba as nb
 import numpy as np
+import pandas as pd
 
+from respy._numba import _time_function
 from respy.exogenous_processes import compute_transition_probabilities
 from respy.interpolate import kw_94_interpolation
+from respy.parallelization import concatenate_batches
+from respy.parallelization import create_batches_of_small_dense_keys
 from respy.parallelization import parallelize_across_dense_dimensions
+from respy.parallelization import split_batches
+from respy.parallelization import use_execution_backend_from_options
+from respy.pre_processing.model_checking import validate_stack_of_params
 from respy.pre_processing.model_processing import process_params_and_options
 from respy.shared import calculate_expected_value_functions
+from respy.shared import calculate_expected_value_functions_of_period
+from respy.shared import calculate_expected_value_functions_with_control_variate
+from respy.shared import calculate_expected_value_functions_with_error_control
+from respy.shared import calculate_expected_value_functions_with_normal_shocks
+from respy.shared import compute_expected_draws
+from respy.shared import compute_params_hash
+from respy.shared import create_memo
 from respy.shared import dump_objects
+from respy.shared import get_size_of_objects
 from respy.shared import load_objects
 from respy.shared import pandas_dot
 from respy.shared import select_valid_choices
-from respy.shared import transform_base_draws_with_cholesky_factor
+from respy.shared import subset_cholesky_factor_to_choice_set
+from respy.shared import transform_base_draws_of_choice_sets
 from respy.state_space import create_state_space_class
 
+SOLUTION_FORMAT_VERSION = 1
+"""int: Version of the file format written by :func:`save_solution`."""
 
-def get_solve_func(params, options):
+logger = logging.getLogger(__name__)
+
+_THROUGHPUTS_OF_FULL_SOLUTION = {}
+"""dict : Calibrated utility evaluations per second by data type and threads."""
+
+_OPTIONS_AFFECTING_SOLUTION = [
+    "n_periods",
+    "covariates",
+    "core_state_space_filters",
+    "negative_choice_set",
+    "interpolation_points",
+    "solution_time_budget",
+    "monte_carlo_sequence",
+    "monte_carlo_antithetic",
+    "monte_carlo_scramble",
+    "solution_draws",
+    "solution_seed",
+    "solution_integration",
+    "solution_quadrature_level",
+    "solution_closed_form_emax",
+    "solution_emax_tolerance",
+    "solution_emax_block_size",
+    "solution_control_variate",
+    "floating_point_dtype",
+]
+
+
+def get_solve_func(params, options, solution=None):
     """Get the solve function.
 
     This function takes a model specification and returns the state space of the model
@@ -29,12 +80,25 @@ def get_solve_func(params, options):
         DataFrame containing parameter series.
     options : dict
         Dictionary containing model attributes which are not optimized.
+    solution : :class:`~respy.state_space.StateSpace`, default None
+        A solved state space, e.g., from :func:`load_solution`. The solution is
+        returned without solving the model again if the function is called with the
+        parameters of the solution. Otherwise, the state space is re-used.
+
+    If ``options["memoization_maxsize"]`` is positive, the solutions of as many
+    parameter vectors as the option allows are kept and restored if the function is
+    called with the same parameters again.
 
     Returns
     -------
     solve : :func:`~respy.solve.solve`
         Function with partialed arguments.
 
+    Raises
+    ------
+    ValueError
+        If the solution was computed with different options.
+
     Examples
     --------
     >>> import respy as rp
@@ -45,22 +109,712 @@ def get_solve_func(params, options):
     """
     optim_paras, options = process_params_and_options(params, options)
 
-    state_space = create_state_space_class(optim_paras, options)
-    solve_function = functools.partial(solve, options=options, state_space=state_space)
+    if solution is None:
+        state_space = create_state_space_class(optim_paras, options)
+    else:
+        _check_options_of_solution(solution.options, options)
+        state_space = solution
+    solve_function = functools.partial(
+        solve, options=options, state_space=state_space, memo=create_memo(options)
+    )
 
     return solve_function
 
 
-def solve(params, options, state_space):
-    """Solve the model."""
+@use_execution_backend_from_options
+def solve(params, options, state_space, memo=None):
+    """Solve the model.
+
+    The state space is a cache for a single solution which is always active, even if
+    memoization is disabled. If the state space holds the solution for the same
+    parameters and the same options affecting the solution, it is returned
+    immediately. If the solution is memoized, it is restored in the state space.
+
+    If ``params`` is a list of parameter vectors, e.g., for finite differences, the
+    model is solved for all parameter vectors at once. See
+    :func:`_solve_stack_of_params`.
+
+    """
+    if isinstance(params, (list, tuple)):
+        return _solve_stack_of_params(params, options, state_space, memo)
+
+    params_hash = compute_params_hash(params)
+    solution_options = _fingerprint_options(options)
+    if (
+        getattr(state_space, "params_hash", None) == params_hash
+        and getattr(state_space, "solution_options", None) == solution_options
+    ):
+        return state_space
+
+    # A solution for other options cannot be updated incrementally.
+    if getattr(state_space, "solution_options", None) != solution_options:
+        state_space.solution_inputs = None
+    state_space.params_hash = None
+    state_space.solution_options = None
+
+    if memo is not None and params_hash in memo:
+        solution, solution_inputs = memo.get(params_hash)
+        _restore_solution(state_space, solution, options)
+        state_space.solution_inputs = solution_inputs
+        state_space.params_hash = params_hash
+        state_space.solution_options = solution_options
+
+        return state_space
+
+    optim_paras, options = process_params_and_options(params, options)
+
+    if options["solution_pipelining"]:
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            period_to_rewards = {
+                period: executor.submit(
+                    _create_param_specific_objects_of_dense_keys,
+                    state_space.get_dense_keys_from_period(period),
+                    state_space,
+                    optim_paras,
+                    options,
+                )
+                for period in reversed(range(options["n_periods"]))
+            }
+            # Without previous rewards, the dense keys with changed rewards are
+            # collected while the rewards become available.
+            dense_keys_to_solve = _find_dense_keys_with_changed_inputs(
+                state_space, {}, {}, optim_paras
+            )
+            if not hasattr(state_space, "wages"):
+                state_space.wages, state_space.nonpecs = {}, {}
+
+            state_space.solution_inputs = None
+            try:
+                state_space = _solve_with_backward_induction(
+                    state_space,
+                    optim_paras,
+                    options,
+                    dense_keys_to_solve,
+                    period_to_rewards,
+                )
+            finally:
+                for future in period_to_rewards.values():
+                    future.cancel()
+
+    else:
+        wages, nonpecs = _create_param_specific_objects_of_dense_keys(
+            list(state_space.dense_key_to_complex), state_space, optim_paras, options
+        )
+
+        dense_keys_to_solve = _find_dense_keys_with_changed_inputs(
+            state_space, wages, nonpecs, optim_paras
+        )
+
+        state_space.wages = wages
+        state_space.nonpecs = nonpecs
+
+        # Invalidate the previous solution until the backward induction has finished.
+        state_space.solution_inputs = None
+        state_space = _solve_with_backward_induction(
+            state_space, optim_paras, options, dense_keys_to_solve
+        )
+
+    state_space.solution_inputs = _collect_inputs_shared_by_dense_keys(optim_paras)
+    state_space.params_hash = params_hash
+    state_space.solution_options = solution_options
+
+    if memo is not None:
+        memo.add(
+            params_hash, (_collect_solution(state_space), state_space.solution_inputs)
+        )
+
+    return state_space
+
+
+def save_solution(state_space, path):
+    """Save the solution of a model to disk.
+
+    The solution consists of the wages, non-pecuniary rewards and expected value
+    functions of every dense key plus, for models with exogenous processes, the
+    transition probabilities. The arrays are stored in an uncompressed ``.npz`` archive
+    together with metadata on the structure of the state space, the options affecting
+    the solution and a hash of the parameters. Unlike pickling the state space, the
+    format does not contain :class:`numba.typed.Dict` objects or other Python objects.
+
+    Parameters
+    ----------
+    state_space : :class:`~respy.state_space.StateSpace`
+        The solved state space returned by :func:`solve`.
+    path : str or pathlib.Path
+        Path of the archive. The file is written as it is and no suffix is added.
+
+    Raises
+    ------
+    ValueError
+        If the state space is not solved.
+
+    Examples
+    --------
+    >>> import respy as rp
+    >>> params, options = rp.get_example_model("robinson_crusoe_basic", with_data=False)
+    >>> solve = rp.get_solve_func(params, options)
+    >>> state_space = solve(params)
+    >>> rp.save_solution(state_space, "solution.npz")
+    >>> solution = rp.load_solution("solution.npz", params, options)
+
+    """
+    if getattr(state_space, "params_hash", None) is None:
+        raise ValueError("The state space does not contain a solution.")
+
+    solution = _collect_solution(state_space)
+
+    arrays = {
+        f"{attribute}_{dense_key}": array
+        for attribute, dense_key_to_array in solution.items()
+        if attribute != "transition"
+        for dense_key, array in dense_key_to_array.items()
+    }
+    transition_columns = {}
+    for dense_key, transition in solution.get("transition", {}).items():
+        arrays[f"transition_{dense_key}"] = transition.to_numpy()
+        arrays[f"transition_index_{dense_key}"] = transition.index.to_numpy()
+        transition_columns[dense_key] = transition.columns.tolist()
+
+    metadata = {
+        "format_version": SOLUTION_FORMAT_VERSION,
+        "params_hash": state_space.params_hash,
+        "options": _fingerprint_options(state_space.options),
+        "dense_key_to_complex": _serialize_dense_key_to_complex(state_space),
+        "transition_columns": transition_columns,
+    }
+    arrays["metadata"] = np.array(json.dumps(metadata))
+
+    with Path(path).open("wb") as file:
+        np.savez(file, **arrays)
+
+
+def load_solution(path, params, options):
+    """Load the solution of a model from disk.
+
+    The state space is re-created from the parameters and options which is cheap
+    compared to the solution. The rewards and expected value functions are restored
+    from the archive written by :func:`save_solution`. Pass the returned state space as
+    the ``solution`` argument of :func:`get_solve_func`,
+    :func:`~respy.simulate.get_simulate_func` or
+    :func:`~respy.likelihood.get_log_like_func` to avoid solving the model again.
+
+    Parameters
+    ----------
+    path : str or pathlib.Path
+        Path to an archive written by :func:`save_solution`.
+    params : pandas.DataFrame
+        The parameters of the solution.
+    options : dict
+        The options of the solution.
+
+    Returns
+    -------
+    state_space : :class:`~respy.state_space.StateSpace`
+        The solved state space.
+
+    Raises
+    ------
+    ValueError
+        If the archive has an unknown format, or the parameters, the options or the
+        structure of the state space differ from the solution.
+
+    """
     optim_paras, options = process_params_and_options(params, options)
 
+    # The archive is read completely because the state space clears the cache
+    # directory which might contain the archive.
+    with np.load(path, allow_pickle=False) as archive:
+        arrays = {name: archive[name] for name in archive.files}
+    metadata = json.loads(arrays.pop("metadata").item())
+
+    if metadata["format_version"] != SOLUTION_FORMAT_VERSION:
+        raise ValueError(
+            f"The solution has the format version {metadata['format_version']}, "
+            f"but {SOLUTION_FORMAT_VERSION} is required."
+        )
+    if metadata["params_hash"] != compute_params_hash(params):
+        raise ValueError("The solution was computed with different parameters.")
+    _check_options_of_solution(metadata["options"], options, fingerprinted=True)
+
+    state_space = create_state_space_class(optim_paras, options)
+    if _serialize_dense_key_to_complex(state_space) != metadata["dense_key_to_complex"]:
+        raise ValueError(
+            "The state space of the solution differs from the state space of the model."
+        )
+
+    solution = {
+        attribute: {
+            dense_key: arrays[f"{attribute}_{dense_key}"]
+            for dense_key in state_space.dense_key_to_complex
+        }
+        for attribute in _get_attributes_of_solution(options)
+    }
+    if optim_paras["exogenous_processes"]:
+        solution["transition"] = {
+            dense_key: pd.DataFrame(
+                arrays[f"transition_{dense_key}"],
+                index=arrays[f"transition_index_{dense_key}"],
+                columns=metadata["transition_columns"][str(dense_key)],
+            )
+            for dense_key in state_space.dense_key_to_complex
+        }
+    _restore_solution(state_space, solution, options)
+
+    state_space.solution_inputs = _collect_inputs_shared_by_dense_keys(optim_paras)
+    state_space.params_hash = metadata["params_hash"]
+    state_space.solution_options = metadata["options"]
+
+    return state_space
+
+
+def _collect_solution(state_space):
+    """Collect copies of the arrays which constitute the solution of the state space.
+
+    Returns
+    -------
+    solution : dict
+        Maps the names of attributes to dictionaries from dense keys to arrays. For
+        models with exogenous processes, ``"transition"`` maps dense keys to the
+        transition probabilities.
+
+    """
+    solution = {
+        attribute: {
+            dense_key: np.array(array)
+            for dense_key, array in getattr(state_space, attribute).items()
+        }
+        for attribute in _get_attributes_of_solution(state_space.options)
+    }
+    if state_space.optim_paras["exogenous_processes"]:
+        solution["transition"] = {
+            dense_key: load_objects("transition", complex_, state_space.options)
+            for dense_key, complex_ in state_space.dense_key_to_complex.items()
+        }
+
+    return solution
+
+
+def _restore_solution(state_space, solution, options):
+    """Restore a solution collected by :func:`_collect_solution` in the state space.
+
+    The rewards are replaced whereas the other arrays are copied into the existing
+    containers of the state space which are modified in-place by later solutions.
+
+    """
+    state_space.wages = dict(solution["wages"])
+    state_space.nonpecs = dict(solution["nonpecs"])
+    for attribute in _get_attributes_of_solution(options)[2:]:
+        for dense_key, array in solution[attribute].items():
+            getattr(state_space, attribute)[dense_key][:] = array
+
+    for dense_key, transition in solution.get("transition", {}).items():
+        complex_ = state_space.dense_key_to_complex[dense_key]
+        dump_objects(transition, "transition", complex_, options)
+
+
+def _get_attributes_of_solution(options):
+    """Get the names of the state space attributes which are stored per dense key."""
+    attributes = ["wages", "nonpecs", "expected_value_functions"]
+    if options["solution_emax_tolerance"] is not None:
+        attributes += ["emax_standard_errors", "emax_n_draws"]
+
+    return attributes
+
+
+def _serialize_dense_key_to_complex(state_space):
+    """Convert the mapping from dense keys to complex indices to JSON types."""
+    return {
+        str(dense_key): [
+            int(complex_[0]),
+            [int(i) for i in complex_[1]],
+            None if len(complex_) < 3 else int(complex_[2]),
+        ]
+        for dense_key, complex_ in state_space.dense_key_to_complex.items()
+    }
+
+
+def _fingerprint_options(options):
+    """Collect the options affecting the solution in a JSON-compatible form.
+
+    The formulas of the negative choice set are de-duplicated because processing the
+    options repeatedly appends the same formulas again.
+
+    """
+    fingerprint = {key: options.get(key) for key in _OPTIONS_AFFECTING_SOLUTION}
+    fingerprint["negative_choice_set"] = {
+        choice: sorted(set(formulas))
+        for choice, formulas in (options.get("negative_choice_set") or {}).items()
+    }
+
+    return json.loads(json.dumps(fingerprint, sort_keys=True, default=str))
+
+
+def _check_options_of_solution(solution_options, options, fingerprinted=False):
+    """Check that a solution was computed with options equal to the current ones."""
+    if not fingerprinted:
+        solution_options = _fingerprint_options(solution_options)
+    different = sorted(
+        key
+        for key, value in _fingerprint_options(options).items()
+        if solution_options.get(key) != value
+    )
+    if different:
+        raise ValueError(
+            "The solution was computed with different options: "
+            f"{', '.join(different)}."
+        )
+
+
+def _solve_stack_of_params(params_stack, options, state_space, memo=None):
+    """Solve the model for a stack of parameter vectors.
+
+    The parameter vectors share the state space, the child indices and the draws.
+    Instead of a backward induction per parameter vector, the rewards, the transformed
+    draws, the continuation values and the expected value functions carry an
+    additional axis for the parameter vectors and are computed in one pass. Thus, the
+    costs of reading the states, gathering continuation values and dispatching the
+    kernels are shared by all parameter vectors.
+
+    Models with interpolation, with an adaptive number of draws or with a control
+    variate are solved sequentially for each parameter vector in a copy of the state
+    space.
+
+    Models with exogenous processes are rejected because the transition probabilities
+    are stored in the cache of the state space which is shared by all copies.
+
+    Returns
+    -------
+    state_spaces : list of :class:`~respy.state_space.StateSpace`
+        One state space per parameter vector. The state spaces are shallow copies of
+        the input which share the structure of the model, but have their own solution.
+        The input state space is not modified.
+
+    """
+    optim_paras_stack = []
+    for params in params_stack:
+        optim_paras, options_ = process_params_and_options(params, options)
+        optim_paras_stack.append(optim_paras)
+    options = options_
+
+    validate_stack_of_params(optim_paras_stack)
+
+    if (
+        options["solution_emax_tolerance"] is not None
+        or options["solution_control_variate"]
+        or any(
+            _is_period_interpolated(state_space, period, options)
+            for period in range(options["n_periods"])
+        )
+    ):
+        # Solve into a copy without a solution such that the input is not modified.
+        working_state_space = copy.copy(state_space)
+        working_state_space.create_arrays_for_expected_value_functions()
+        working_state_space.wages, working_state_space.nonpecs = {}, {}
+        working_state_space.solution_inputs = None
+        working_state_space.params_hash = None
+        working_state_space.solution_options = None
+
+        state_spaces = []
+        for params in params_stack:
+            solve(params, options, working_state_space, memo)
+            state_spaces.append(_copy_solved_state_space(working_state_space))
+
+    else:
+        dense_keys = list(state_space.dense_key_to_complex)
+        wages, nonpecs = _create_param_specific_objects_of_stack(
+            {key: state_space.dense_key_to_complex[key] for key in dense_keys},
+            state_space.dense_key_to_choice_set,
+            optim_paras_stack,
+            options,
+        )
+        expected_value_functions = _solve_stack_with_backward_induction(
+            state_space, wages, nonpecs, optim_paras_stack, options
+        )
+
+        state_spaces = []
+        for i, (params, optim_paras) in enumerate(zip(params_stack, optim_paras_stack)):
+            state_space_ = copy.copy(state_space)
+            state_space_.create_arrays_for_expected_value_functions()
+            state_space_.wages = {
+                key: np.ascontiguousarray(value[:, i]) for key, value in wages.items()
+            }
+            state_space_.nonpecs = {
+                key: np.ascontiguousarray(value[:, i]) for key, value in nonpecs.items()
+            }
+            for key, value in expected_value_functions.items():
+                state_space_.expected_value_functions[key][:] = value[:, i]
+            state_space_.solution_inputs = _collect_inputs_shared_by_dense_keys(
+                optim_paras
+            )
+            state_space_.params_hash = compute_params_hash(params)
+            state_space_.solution_options = _fingerprint_options(options)
+            state_spaces.append(state_space_)
+
+    return state_spaces
+
+
+def _solve_stack_with_backward_induction(
+    state_space, wages, nonpecs, optim_paras_stack, options
+):
+    """Calculate the expected value functions of a stack of parameter vectors.
+
+    The arrays have the axis of parameter vectors after the axis of states such that
+    the kernels broadcast over states and parameter vectors and the work of a dense key
+    can still be split into chunks of states.
+
+    Returns
+    -------
+    expected_value_functions : dict
+        Maps dense keys to arrays with shape ``(n_states, n_params)``.
+
+    """
+    n_params = len(optim_paras_stack)
+    deltas = np.array([optim_paras["delta"] for optim_paras in optim_paras_stack])
+
+    stacked_optim_paras = {
+        "choices_w_wage": optim_paras_stack[0]["choices_w_wage"],
+        "delta": deltas,
+        "shocks_cholesky": np.stack(
+            [optim_paras["shocks_cholesky"] for optim_paras in optim_paras_stack]
+        ),
+    }
+
+    draws_emax_risk = transform_base_draws_of_choice_sets(
+        state_space.base_draws_sol,
+        state_space.dense_key_to_complex,
+        stacked_optim_paras["shocks_cholesky"],
+        stacked_optim_paras,
+        options["floating_point_dtype"],
+    )
+
+    expected_value_functions = {
+        dense_key: np.zeros((len(indices), n_params))
+        for dense_key, indices in state_space.dense_key_to_core_indices.items()
+    }
+
+    for period in reversed(range(options["n_periods"])):
+        dense_keys_in_period = state_space.get_dense_keys_from_period(period)
+
+        continuation_values = state_space.get_continuation_values(
+            period, dense_keys_in_period, expected_value_functions
+        )
+        continuation_values = {
+            key: value.astype(options["floating_point_dtype"], copy=False)
+            for key, value in continuation_values.items()
+        }
+
+        period_expected_value_functions = _full_solution(
+            {key: wages[key] for key in dense_keys_in_period},
+            {key: nonpecs[key] for key in dense_keys_in_period},
+            continuation_values,
+            {key: draws_emax_risk[key] for key in dense_keys_in_period},
+            {key: state_space.weights_sol[key] for key in dense_keys_in_period},
+            state_space.dense_key_to_choice_set,
+            stacked_optim_paras,
+            options,
+        )
+
+        for key, value in period_expected_value_functions.items():
+            # The expected value functions of myopic agents are zero.
+            value[:, deltas == 0] = 0
+            expected_value_functions[key][:] = value
+
+    return expected_value_functions
+
+
+def _is_period_interpolated(state_space, period, options):
+    """Check whether the expected value functions of a period are interpolated."""
+    return _get_interpolation_points_of_period(state_space, period, options) is not None
+
+
+def _get_interpolation_points_of_period(state_space, period, options):
+    """Get the number of interpolation points of a period.
+
+    If ``options["interpolation_points"]`` is ``"auto"``, the number of points is taken
+    from the plan of :func:`_plan_interpolation` which is created once per state space
+    such that all evaluations of an estimation use the same approximation.
+
+    Returns
+    -------
+    n_points : int or None
+        Number of interpolation points or :data:`None` if the period is fully solved.
+
+    """
+    if options["interpolation_points"] == "auto":
+        if not hasattr(state_space, "period_to_interpolation_points"):
+            state_space.period_to_interpolation_points = _plan_interpolation(
+                state_space, options
+            )
+        n_points = state_space.period_to_interpolation_points[period]
+
+    else:
+        dense_keys_in_period = state_space.get_dense_keys_from_period(period)
+        n_states_in_period = sum(
+            len(state_space.dense_key_to_core_indices[dense_key])
+            for dense_key in dense_keys_in_period
+        )
+        n_points = options["interpolation_points"]
+        if not n_states_in_period > n_points >= 2 * len(dense_keys_in_period):
+            n_points = None
+
+    return n_points
+
+
+def _plan_interpolation(state_space, options):
+    """Choose between the full solution and interpolation for each period.
+
+    The costs of a period are measured in evaluations of the utility function. The full
+    solution costs ``n_states * n_draws * n_choices`` evaluations. The interpolation
+    costs the same per simulated state plus ``n_states * n_choices * (2 * n_choices +
+    1)`` for the regressors and the prediction of the linear model. With the calibrated
+    throughput of the kernel, ``options["solution_time_budget"]`` is converted to a
+    budget of evaluations.
+
+    The budget is distributed over the periods starting with the cheapest one. Each
+    period receives an equal share of the remaining budget. If the full solution of a
+    period fits into its share, the period is solved fully and passes the unused budget
+    on to more expensive periods. Otherwise, the period is interpolated with as many
+    points as the share allows, but with at least two points per dense key.
+
+    Returns
+    -------
+    period_to_interpolation_points : dict
+        Maps periods to the number of interpolation points or :data:`None` for the full
+        solution.
+
+    """
+    throughput = _calibrate_throughput_of_full_solution(options)
+    remaining_budget = options["solution_time_budget"] * throughput
+
+    period_to_costs = {
+        period: _estimate_costs_of_period(state_space, period)
+        for period in range(options["n_periods"])
+    }
+    periods = sorted(
+        period_to_costs, key=lambda period: period_to_costs[period]["full"]
+    )
+
+    period_to_interpolation_points = {}
+    for i, period in enumerate(periods):
+        costs = period_to_costs[period]
+        share = remaining_budget / (len(periods) - i)
+
+        n_points = int(max(share - costs["overhead"], 0) // costs["per_point"])
+        n_points = max(n_points, costs["min_points"])
+        cost_of_interpolation = n_points * costs["per_point"] + costs["overhead"]
+
+        if (
+            costs["full"] <= share
+            or n_points >= costs["n_states"]
+            or cost_of_interpolation >= costs["full"]
+        ):
+            period_to_interpolation_points[period] = None
+            remaining_budget -= costs["full"]
+            logger.info(
+                "Period %d: Full solution of %d states.", period, costs["n_states"]
+            )
+        else:
+            period_to_interpolation_points[period] = n_points
+            remaining_budget -= cost_of_interpolation
+            logger.info(
+                "Period %d: Interpolation with %d of %d states.",
+                period,
+                n_points,
+                costs["n_states"],
+            )
+
+    predicted_duration = options["solution_time_budget"] - remaining_budget / throughput
+    logger.info(
+        "Predicted duration of the solution: %.3fs with a budget of %.3fs.",
+        predicted_duration,
+        options["solution_time_budget"],
+    )
+
+    return period_to_interpolation_points
+
+
+def _estimate_costs_of_period(state_space, period):
+    """Estimate the costs of the full solution and interpolation of a period."""
+    dense_keys_in_period = state_space.get_dense_keys_from_period(period)
+
+    n_states = 0
+    full = 0
+    overhead = 0
+    for dense_key in dense_keys_in_period:
+        n_states_ = len(state_space.dense_key_to_core_indices[dense_key])
+        n_choices = sum(state_space.dense_key_to_choice_set[dense_key])
+        n_draws = len(state_space.weights_sol[dense_key])
+
+        n_states += n_states_
+        full += n_states_ * n_draws * n_choices
+        overhead += n_states_ * n_choices * (2 * n_choices + 1)
+
+    return {
+        "n_states": n_states,
+        "full": full,
+        "per_point": full / max(n_states, 1),
+        "overhead": overhead,
+        "min_points": 2 * len(dense_keys_in_period),
+    }
+
+
+def _calibrate_throughput_of_full_solution(options, n_states=1_000, n_choices=4):
+    """Calibrate the number of utility evaluations per second of the full solution.
+
+    The kernel of the full solution is timed once per process, data type and number
+    of threads on random inputs with the number of draws of the model.
+
+    """
+    dtype = np.dtype(options["floating_point_dtype"])
+    key = (dtype.name, nb.get_num_threads())
+
+    if key not in _THROUGHPUTS_OF_FULL_SOLUTION:
+        n_draws = options["solution_draws"]
+        random_state = np.random.RandomState(0)
+        rewards = random_state.normal(size=(3, n_states, n_choices)).astype(dtype)
+        draws = random_state.normal(size=(n_draws, n_choices)).astype(dtype)
+        args = (
+            *rewards,
+            draws,
+            np.ones(n_draws),
+            draws.min(axis=0),
+            draws.max(axis=0),
+            0.95,
+        )
+        duration = _time_function(calculate_expected_value_functions, args)
+        throughput = n_states * n_draws * n_choices / max(duration, 1e-9)
+        _THROUGHPUTS_OF_FULL_SOLUTION[key] = throughput
+        logger.info(
+            "Calibrated throughput of the full solution: %.3g utility evaluations per "
+            "second.",
+            throughput,
+        )
+
+    return _THROUGHPUTS_OF_FULL_SOLUTION[key]
+
+
+def _copy_solved_state_space(state_space):
+    """Copy the state space with its own copy of the solution."""
+    state_space_ = copy.copy(state_space)
+    state_space_.create_arrays_for_expected_value_functions()
+    _restore_solution(state_space_, _collect_solution(state_space), state_space.options)
+    state_space_.solution_inputs = state_space.solution_inputs
+    state_space_.params_hash = state_space.params_hash
+    state_space_.solution_options = state_space.solution_options
+
+    return state_space_
+
+
+def _create_param_specific_objects_of_dense_keys(
+    dense_keys, state_space, optim_paras, options
+):
+    """Create wages and non-pecuniary rewards for a subset of dense keys."""
     transit_keys = None
     if hasattr(state_space, "dense_key_to_transit_keys"):
         transit_keys = state_space.dense_key_to_transit_keys
 
-    wages, nonpecs = _create_param_specific_objects(
-        state_space.dense_key_to_complex,
+    return _create_param_specific_objects(
+        {key: state_space.dense_key_to_complex[key] for key in dense_keys},
         state_space.dense_key_to_choice_set,
         optim_paras,
         options,
@@ -70,15 +824,77 @@ def solve(params, options, state_space):
         },
     )
 
-    state_space.wages = wages
-    state_space.nonpecs = nonpecs
 
-    state_space = _solve_with_backward_induction(state_space, optim_paras, options)
+def _find_dense_keys_with_changed_inputs(state_space, wages, nonpecs, optim_paras):
+    """Find dense keys whose rewards changed since the last solution.
+
+    The state space is re-used across calls of :func:`solve`. If parameters which
+    affect all dense keys, e.g., the discount factor or the shock distribution, are
+    unchanged, only dense keys with changed wages or non-pecuniary rewards and the dense
+    keys whose continuation values depend on them need to be solved again. For
+    example, changing the shift of a type only affects dense keys of this type.
+
+    Returns
+    -------
+    dense_keys : set or None
+        Set of dense keys with changed rewards. :data:`None` means that all dense keys
+        need to be solved.
+
+    """
+    previous_inputs = getattr(state_space, "solution_inputs", None)
+    current_inputs = _collect_inputs_shared_by_dense_keys(optim_paras)
+
+    if previous_inputs is None or not _are_inputs_equal(
+        previous_inputs, current_inputs
+    ):
+        dense_keys = None
+    else:
+        dense_keys = _find_dense_keys_with_changed_rewards(state_space, wages, nonpecs)
+
+    return dense_keys
+
+
+def _find_dense_keys_with_changed_rewards(state_space, wages, nonpecs):
+    """Compare rewards to the rewards of the previous solution."""
+    return {
+        key
+        for key in wages
+        if key not in state_space.wages
+        or not np.array_equal(wages[key], state_space.wages[key])
+        or not np.array_equal(nonpecs[key], state_space.nonpecs[key])
+    }
 
-    return state_space
 
+def _collect_inputs_shared_by_dense_keys(optim_paras):
+    """Collect parameters which enter the solution of every dense key."""
+    exogenous_processes = [
+        coefficients.to_numpy()
+        for process in optim_paras["exogenous_processes"].values()
+        for coefficients in process.values()
+    ]
 
-@parallelize_across_dense_dimensions
+    return [
+        np.array(optim_paras["delta"]),
+        optim_paras["shocks_cholesky"],
+        *exogenous_processes,
+    ]
+
+
+def _are_inputs_equal(inputs, other_inputs):
+    """Compare two collections of inputs which are shared by all dense keys."""
+    return len(inputs) == len(other_inputs) and all(
+        np.array_equal(a, b) for a, b in zip(inputs, other_inputs)
+    )
+
+
+def _estimate_cost_of_param_specific_objects(
+    complex_, choice_set, optim_paras, options, transit_keys=None
+):
+    """Estimate the cost with the size of the stored states times the choices."""
+    return get_size_of_objects("states", complex_, options) * sum(choice_set)
+
+
+@parallelize_across_dense_dimensions(cost=_estimate_cost_of_param_specific_objects)
 def _create_param_specific_objects(
     complex_,
     choice_set,
@@ -98,6 +914,8 @@ def _create_param_specific_objects(
     """
     states = load_objects("states", complex_, options)
     wages, nonpecs = _create_choice_rewards(states, choice_set, optim_paras)
+    wages = wages.astype(options["floating_point_dtype"], copy=False)
+    nonpecs = nonpecs.astype(options["floating_point_dtype"], copy=False)
 
     if optim_paras["exogenous_processes"]:
         transition_probabilities = compute_transition_probabilities(
@@ -108,28 +926,69 @@ def _create_param_specific_objects(
     return wages, nonpecs
 
 
+@parallelize_across_dense_dimensions(cost=_estimate_cost_of_param_specific_objects)
+def _create_param_specific_objects_of_stack(
+    complex_, choice_set, optim_paras_stack, options
+):
+    """Create wages and non-pecuniary rewards for a stack of parameter vectors."""
+    states = load_objects("states", complex_, options)
+    wages, nonpecs = _create_choice_rewards(states, choice_set, optim_paras_stack)
+    wages = wages.astype(options["floating_point_dtype"], copy=False)
+    nonpecs = nonpecs.astype(options["floating_point_dtype"], copy=False)
+
+    return wages, nonpecs
+
+
 def _create_choice_rewards(states, choice_set, optim_paras):
-    """Create wage and non-pecuniary reward for each state and choice."""
+    """Create wage and non-pecuniary reward for each state and choice.
+
+    If ``optim_paras`` is a list for a stack of parameter vectors, the coefficients of
+    all parameter vectors are multiplied with the covariates at once and the rewards
+    have the shape ``(n_states, n_params, n_choices)``.
+
+    """
+    is_stack = isinstance(optim_paras, list)
+    optim_paras_stack = optim_paras if is_stack else [optim_paras]
+
     n_choices = sum(choice_set)
-    choices = select_valid_choices(optim_paras["choices"], choice_set)
+    choices = select_valid_choices(optim_paras_stack[0]["choices"], choice_set)
 
     n_states = states.shape[0]
+    params_shape = (len(optim_paras_stack),) if is_stack else ()
 
-    wages = np.ones((n_states, n_choices))
-    nonpecs = np.zeros((n_states, n_choices))
+    wages = np.ones((n_states, *params_shape, n_choices))
+    nonpecs = np.zeros((n_states, *params_shape, n_choices))
 
     for i, choice in enumerate(choices):
-        if f"wage_{choice}" in optim_paras:
-            log_wage = pandas_dot(states, optim_paras[f"wage_{choice}"])
-            wages[:, i] = np.exp(log_wage)
+        if f"wage_{choice}" in optim_paras_stack[0]:
+            log_wage = pandas_dot(
+                states, _stack_coefficients(optim_paras, f"wage_{choice}")
+            )
+            wages[..., i] = np.exp(log_wage)
 
-        if f"nonpec_{choice}" in optim_paras:
-            nonpecs[:, i] = pandas_dot(states, optim_paras[f"nonpec_{choice}"])
+        if f"nonpec_{choice}" in optim_paras_stack[0]:
+            nonpecs[..., i] = pandas_dot(
+                states, _stack_coefficients(optim_paras, f"nonpec_{choice}")
+            )
 
     return wages, nonpecs
 
 
-def _solve_with_backward_induction(state_space, optim_paras, options):
+def _stack_coefficients(optim_paras, name):
+    """Stack the coefficients of parameter vectors to a DataFrame if necessary."""
+    if isinstance(optim_paras, list):
+        coefficients = pd.concat(
+            [optim_paras_[name] for optim_paras_ in optim_paras], axis=1
+        ).fillna(0)
+    else:
+        coefficients = optim_paras[name]
+
+    return coefficients
+
+
+def _solve_with_backward_induction(
+    state_space, optim_paras, options, dense_keys_to_solve=None, period_to_rewards=None
+):
     """Calculate utilities with backward induction.
 
     The expected value functions in one period are only computed by interpolation if:
@@ -138,6 +997,30 @@ def _solve_with_backward_induction(state_space, optim_paras, options):
     2. If there are more states in the period than interpolation points.
     3. If there are at least two interpolation points per `dense_index`.
 
+    If ``options["interpolation_points"]`` is ``"auto"``, the choice between the full
+    solution and interpolation and the number of points are made per period by a cost
+    model such that the solution meets ``options["solution_time_budget"]``. See
+    :func:`_plan_interpolation`.
+
+    If ``options["solution_period_kernel"]`` is true, the full solution of all dense
+    keys in a period is computed by a single parallel kernel instead of one kernel call
+    per dense key or batch of dense keys. See :func:`_full_solution_of_period`.
+
+    If only a subset of dense keys has changed rewards, the full solution is only
+    computed for these dense keys and the dense keys whose child states are located in
+    re-solved dense keys. The expected value functions of the remaining dense keys are
+    kept from the previous solution. Periods with interpolation are always solved
+    completely to consume the same seeds as a complete solution.
+
+    The expected value functions of myopic agents are zero. Neither child states nor
+    continuation values are needed and the child states of the state space are only
+    created once the model is solved with a positive discount factor.
+
+    If the solution is pipelined, the rewards of a period are created in the background
+    while later periods are solved. The rewards of a period do not depend on the
+    expected value functions, but the costs of reading the states, computing the rewards
+    and transition probabilities are hidden behind the integration.
+
     Parameters
     ----------
     state_space : :class:`~respy.state_space.StateSpace`
@@ -146,6 +1029,13 @@ def _solve_with_backward_induction(state_space, optim_paras, options):
         Parsed model parameters affected by the optimization.
     options : dict
         Optimization independent model options.
+    dense_keys_to_solve : set or None, default None
+        Dense keys with changed rewards. :data:`None` means that all dense keys are
+        solved.
+    period_to_rewards : dict, default None
+        Maps periods to :class:`concurrent.futures.Future` which return the wages and
+        non-pecuniary rewards of the period. :data:`None` means that the rewards are
+        already attributes of the state space.
 
     Returns
     -------
@@ -154,34 +1044,51 @@ def _solve_with_backward_induction(state_space, optim_paras, options):
     """
     n_periods = options["n_periods"]
 
-    # Can we move that up to the other function? Then we have everything at one point
-    # that is params specific?
-    draws_emax_risk = transform_base_draws_with_cholesky_factor(
+    # The child states of myopic models are created once agents look ahead.
+    if optim_paras["delta"] != 0 and not hasattr(state_space, "child_indices"):
+        state_space.create_child_indices()
+
+    # Dense keys with the same choice set in a period share the transformed draws.
+    draws_emax_risk = transform_base_draws_of_choice_sets(
         state_space.base_draws_sol,
-        state_space.dense_key_to_choice_set,
+        state_space.dense_key_to_complex,
         optim_paras["shocks_cholesky"],
         optim_paras,
+        options["floating_point_dtype"],
     )
 
     for period in reversed(range(n_periods)):
         dense_keys_in_period = state_space.get_dense_keys_from_period(period)
 
+        if period_to_rewards is not None:
+            period_wages, period_nonpecs = period_to_rewards[period].result()
+            if dense_keys_to_solve is not None:
+                dense_keys_to_solve |= _find_dense_keys_with_changed_rewards(
+                    state_space, period_wages, period_nonpecs
+                )
+            state_space.wages.update(period_wages)
+            state_space.nonpecs.update(period_nonpecs)
+
+        if dense_keys_to_solve is not None and optim_paras["delta"] != 0:
+            dense_keys_to_solve |= {
+                dense_key
+                for dense_key in dense_keys_in_period
+                if state_space.dense_key_to_child_dense_keys[dense_key]
+                & dense_keys_to_solve
+            }
+
         period_draws_emax_risk = {
             dense_index: draws_emax_risk[dense_index]
             for dense_index in dense_keys_in_period
         }
-
-        n_states_in_period = sum(
-            len(state_space.dense_key_to_core_indices[dense_index])
+        period_weights = {
+            dense_index: state_space.weights_sol[dense_index]
             for dense_index in dense_keys_in_period
-        )
+        }
 
         # See docstring for note on interpolation.
-        any_interpolated = options[
-            "interpolation_points"
-        ] < n_states_in_period and options["interpolation_points"] >= 2 * len(
-            dense_keys_in_period
-        )
+        n_points = _get_interpolation_points_of_period(state_space, period, options)
+        any_interpolated = n_points is not None
 
         # Handle myopic individuals. Check interpolation!
         if optim_paras["delta"] == 0:
@@ -191,20 +1098,103 @@ def _solve_with_backward_induction(state_space, optim_paras, options):
             period_expected_value_functions = kw_94_interpolation(
                 state_space,
                 period_draws_emax_risk,
+                period_weights,
                 period,
                 optim_paras,
-                options,
+                {**options, "interpolation_points": n_points},
             )
 
         else:
+            if dense_keys_to_solve is not None:
+                dense_keys_in_period = [
+                    dense_key
+                    for dense_key in dense_keys_in_period
+                    if dense_key in dense_keys_to_solve
+                ]
+                if not dense_keys_in_period:
+                    continue
 
-            wages = state_space.get_attribute_from_period("wages", period)
-            nonpecs = state_space.get_attribute_from_period("nonpecs", period)
-            continuation_values = state_space.get_continuation_values(period)
-            period_expected_value_functions = _full_solution(
-                wages, nonpecs, continuation_values, period_draws_emax_risk, optim_paras
+            wages = {
+                dense_key: state_space.wages[dense_key]
+                for dense_key in dense_keys_in_period
+            }
+            nonpecs = {
+                dense_key: state_space.nonpecs[dense_key]
+                for dense_key in dense_keys_in_period
+            }
+            continuation_values = state_space.get_continuation_values(
+                period, dense_keys_in_period
             )
 
+            if _is_solved_with_period_kernel(options):
+                period_expected_value_functions = _full_solution_of_period(
+                    wages,
+                    nonpecs,
+                    continuation_values,
+                    period_draws_emax_risk,
+                    period_weights,
+                    state_space.dense_key_to_choice_set,
+                    optim_paras,
+                )
+                state_space.set_attribute_from_keys(
+                    "expected_value_functions", period_expected_value_functions
+                )
+                continue
+
+            # Dense keys with few states and the same choice set share the draws and
+            # are solved with a single kernel call.
+            dense_key_to_n_states = {key: len(value) for key, value in wages.items()}
+            batches = create_batches_of_small_dense_keys(
+                state_space.dense_key_to_choice_set,
+                dense_key_to_n_states,
+                options["dense_key_batch_size"],
+            )
+            wages = concatenate_batches(wages, batches)
+            nonpecs = concatenate_batches(nonpecs, batches)
+            continuation_values = concatenate_batches(continuation_values, batches)
+
+            if options["solution_emax_tolerance"] is None:
+                period_expected_value_functions = _full_solution(
+                    wages,
+                    nonpecs,
+                    continuation_values,
+                    period_draws_emax_risk,
+                    period_weights,
+                    state_space.dense_key_to_choice_set,
+                    optim_paras,
+                    options,
+                )
+                period_expected_value_functions = split_batches(
+                    period_expected_value_functions, batches, dense_key_to_n_states
+                )
+            else:
+                (
+                    period_expected_value_functions,
+                    period_standard_errors,
+                    period_n_draws,
+                ) = _full_solution_with_error_control(
+                    wages,
+                    nonpecs,
+                    continuation_values,
+                    period_draws_emax_risk,
+                    state_space.dense_key_to_choice_set,
+                    optim_paras,
+                    options,
+                )
+                period_expected_value_functions = split_batches(
+                    period_expected_value_functions, batches, dense_key_to_n_states
+                )
+                period_standard_errors = split_batches(
+                    period_standard_errors, batches, dense_key_to_n_states
+                )
+                period_n_draws = split_batches(
+                    period_n_draws, batches, dense_key_to_n_states
+                )
+                state_space.set_attribute_from_keys(
+                    "emax_standard_errors", period_standard_errors
+                )
+                state_space.set_attribute_from_keys("emax_n_draws", period_n_draws)
+
         state_space.set_attribute_from_keys(
             "expected_value_functions", period_expected_value_functions
         )
@@ -212,22 +1202,252 @@ def _solve_with_backward_induction(state_space, optim_paras, options):
     return state_space
 
 
-@parallelize_across_dense_dimensions
+def _is_solved_with_period_kernel(options):
+    """Check whether the full solution of a period is computed by a single kernel."""
+    return (
+        options["solution_period_kernel"]
+        and options["solution_emax_tolerance"] is None
+        and not options["solution_closed_form_emax"]
+        and not options["solution_control_variate"]
+    )
+
+
+def _full_solution_of_period(
+    wages,
+    nonpecs,
+    continuation_values,
+    period_draws_emax_risk,
+    period_weights,
+    dense_key_to_choice_set,
+    optim_paras,
+):
+    """Calculate the full solution of all dense keys in a period with one kernel.
+
+    The states of all dense keys are stacked into flat arrays whose choice dimension is
+    padded to the largest choice set in the period. Dense keys with the same choice set
+    form a group and share the draws of the group. Then,
+    :func:`~respy.shared.calculate_expected_value_functions_of_period` processes all
+    states in one load-balanced parallel loop. Late periods with many small dense keys
+    use all cores. The results equal the solution per dense key.
+
+    Returns
+    -------
+    period_expected_value_functions : dict
+        Maps dense keys to arrays with shape ``(n_states,)``.
+
+    """
+    dense_keys = list(wages)
+    choice_set_to_dense_key = {}
+    for dense_key in dense_keys:
+        choice_set_to_dense_key.setdefault(
+            dense_key_to_choice_set[dense_key], dense_key
+        )
+    choice_set_to_group = {
+        choice_set: group for group, choice_set in enumerate(choice_set_to_dense_key)
+    }
+    group_to_dense_key = list(choice_set_to_dense_key.values())
+
+    dtype = period_draws_emax_risk[dense_keys[0]].dtype
+    n_states = [len(wages[dense_key]) for dense_key in dense_keys]
+    bounds = np.cumsum([0] + n_states)
+    n_choices = max(wages[dense_key].shape[-1] for dense_key in dense_keys)
+    n_draws = max(len(period_weights[dense_key]) for dense_key in group_to_dense_key)
+    n_groups = len(group_to_dense_key)
+
+    flat_wages = np.zeros((bounds[-1], n_choices), dtype)
+    flat_nonpecs = np.zeros((bounds[-1], n_choices), dtype)
+    flat_continuation_values = np.zeros((bounds[-1], n_choices), dtype)
+    state_to_group = np.empty(bounds[-1], np.int64)
+    for dense_key, start, stop in zip(dense_keys, bounds[:-1], bounds[1:]):
+        n_choices_ = wages[dense_key].shape[-1]
+        flat_wages[start:stop, :n_choices_] = wages[dense_key]
+        flat_nonpecs[start:stop, :n_choices_] = nonpecs[dense_key]
+        flat_continuation_values[start:stop, :n_choices_] = continuation_values[
+            dense_key
+        ]
+        state_to_group[start:stop] = choice_set_to_group[
+            dense_key_to_choice_set[dense_key]
+        ]
+
+    group_to_n_choices = np.zeros(n_groups, np.int64)
+    group_to_n_draws = np.zeros(n_groups, np.int64)
+    draws = np.zeros((n_groups, n_draws, n_choices), dtype)
+    weights = np.zeros((n_groups, n_draws))
+    draws_lower = np.zeros((n_groups, n_choices), dtype)
+    draws_upper = np.zeros((n_groups, n_choices), dtype)
+    for group, dense_key in enumerate(group_to_dense_key):
+        n_draws_, n_choices_ = period_draws_emax_risk[dense_key].shape
+        group_to_n_choices[group] = n_choices_
+        group_to_n_draws[group] = n_draws_
+        draws[group, :n_draws_, :n_choices_] = period_draws_emax_risk[dense_key]
+        weights[group, :n_draws_] = period_weights[dense_key]
+        draws_lower[group, :n_choices_] = period_draws_emax_risk[dense_key].min(axis=0)
+        draws_upper[group, :n_choices_] = period_draws_emax_risk[dense_key].max(axis=0)
+
+    expected_value_functions = calculate_expected_value_functions_of_period(
+        flat_wages,
+        flat_nonpecs,
+        flat_continuation_values,
+        state_to_group,
+        group_to_n_choices,
+        group_to_n_draws,
+        draws,
+        weights,
+        draws_lower,
+        draws_upper,
+        optim_paras["delta"],
+    )
+
+    return {
+        dense_key: expected_value_functions[start:stop]
+        for dense_key, start, stop in zip(dense_keys, bounds[:-1], bounds[1:])
+    }
+
+
+def _estimate_cost_of_full_solution(
+    wages, nonpecs, continuation_values, period_draws_emax_risk, *args
+):
+    """Estimate the cost with the number of states times choices times draws.
+
+    The draws of a stack of parameter vectors have an additional leading axis for the
+    parameter vectors which are already counted by the wages.
+
+    """
+    return wages.size * period_draws_emax_risk.shape[-2]
+
+
+@parallelize_across_dense_dimensions(
+    cost=_estimate_cost_of_full_solution,
+    split_arguments=("wages", "nonpecs", "continuation_values"),
+)
 def _full_solution(
-    wages, nonpecs, continuation_values, period_draws_emax_risk, optim_paras
+    wages,
+    nonpecs,
+    continuation_values,
+    period_draws_emax_risk,
+    period_weights,
+    choice_set,
+    optim_paras,
+    options,
 ):
     """Calculate the full solution of the model.
 
     In contrast to approximate solution, the Monte Carlo integration is done for each
     state and not only a subset of states.
 
+    If ``options["solution_closed_form_emax"]`` is true and the choice set contains no
+    choice with a wage, all shocks are additive and normally distributed. Then, the
+    expected value functions are computed analytically and the draws are not used.
+
+    If ``options["solution_control_variate"]`` is true, the Monte Carlo estimate is
+    corrected with a control variate, see
+    :func:`~respy.shared.calculate_expected_value_functions_with_control_variate`.
+
+    For a stack of parameter vectors, the rewards and continuation values have the
+    shape ``(n_states, n_params, n_choices)``, the draws have the shape ``(n_params,
+    n_draws, n_choices)`` and ``optim_paras`` contains the stacked discount factors
+    and Cholesky factors.
+
     """
-    period_expected_value_functions = calculate_expected_value_functions(
-        wages,
-        nonpecs,
-        continuation_values,
-        period_draws_emax_risk,
-        optim_paras["delta"],
-    )
+    n_wages_raw = len(optim_paras["choices_w_wage"])
+    n_wages = sum(choice_set[:n_wages_raw])
+
+    if options["solution_closed_form_emax"] and n_wages == 0:
+        shocks_cholesky = subset_cholesky_factor_to_choice_set(
+            optim_paras["shocks_cholesky"], choice_set
+        )
+        period_expected_value_functions = (
+            calculate_expected_value_functions_with_normal_shocks(
+                nonpecs,
+                continuation_values,
+                shocks_cholesky @ np.swapaxes(shocks_cholesky, -1, -2),
+                optim_paras["delta"],
+            )
+        )
+    elif options["solution_control_variate"]:
+        period_expected_value_functions = (
+            calculate_expected_value_functions_with_control_variate(
+                wages,
+                nonpecs,
+                continuation_values,
+                period_draws_emax_risk,
+                period_weights,
+                compute_expected_draws(
+                    choice_set, optim_paras["shocks_cholesky"], optim_paras
+                ),
+                optim_paras["delta"],
+            )
+        )
+    else:
+        period_expected_value_functions = calculate_expected_value_functions(
+            wages,
+            nonpecs,
+            continuation_values,
+            period_draws_emax_risk,
+            period_weights,
+            period_draws_emax_risk.min(axis=-2),
+            period_draws_emax_risk.max(axis=-2),
+            optim_paras["delta"],
+        )
 
     return period_expected_value_functions
+
+
+@parallelize_across_dense_dimensions(
+    cost=_estimate_cost_of_full_solution,
+    split_arguments=("wages", "nonpecs", "continuation_values"),
+)
+def _full_solution_with_error_control(
+    wages,
+    nonpecs,
+    continuation_values,
+    period_draws_emax_risk,
+    choice_set,
+    optim_paras,
+    options,
+):
+    """Calculate the full solution with an adaptive number of draws per state.
+
+    The Monte Carlo integration stops for each state once the standard error of the
+    expected value function is not larger than ``options["solution_emax_tolerance"]``.
+    The number of draws is capped by ``options["solution_draws"]``. Besides the
+    expected value functions, the function returns the achieved standard errors and
+    the number of used draws. Expected value functions computed in closed form have a
+    standard error of zero and use no draws.
+
+    """
+    n_wages_raw = len(optim_paras["choices_w_wage"])
+    n_wages = sum(choice_set[:n_wages_raw])
+
+    if options["solution_closed_form_emax"] and n_wages == 0:
+        shocks_cholesky = subset_cholesky_factor_to_choice_set(
+            optim_paras["shocks_cholesky"], choice_set
+        )
+        period_expected_value_functions = (
+            calculate_expected_value_functions_with_normal_shocks(
+                nonpecs,
+                continuation_values,
+                shocks_cholesky.dot(shocks_cholesky.T),
+                optim_paras["delta"],
+            )
+        )
+        period_standard_errors = np.zeros_like(period_expected_value_functions)
+        period_n_draws = np.zeros(period_expected_value_functions.shape, np.int64)
+    else:
+        (
+            period_expected_value_functions,
+            period_standard_errors,
+            period_n_draws,
+        ) = calculate_expected_value_functions_with_error_control(
+            wages,
+            nonpecs,
+            continuation_values,
+            period_draws_emax_risk,
+            period_draws_emax_risk.min(axis=0),
+            period_draws_emax_risk.max(axis=0),
+            optim_paras["delta"],
+            options["solution_emax_tolerance"],
+            options["solution_emax_block_size"],
+        )
+
+    return period_expected_value_functions, period_standard_errors, period_n_draws
@@ -11,12 +11,14 @@ from respy.exogenous_processes import create_transit_choice_set
 from respy.exogenous_processes import create_transition_objects
 from respy.exogenous_processes import weight_continuation_values
 from respy.parallelization import parallelize_across_dense_dimensions
+from respy.parallelization import use_execution_backend_from_options
 from respy.shared import apply_law_of_motion_for_core
 from respy.shared import compute_covariates
 from respy.shared import convert_dictionary_keys_to_dense_indices
 from respy.shared import create_base_draws
 from respy.shared import create_core_state_space_columns
 from respy.shared import create_dense_state_space_columns
+from respy.shared import create_quadrature_nodes_and_weights
 from respy.shared import downcast_to_smallest_dtype
 from respy.shared import dump_objects
 from respy.shared import load_objects
@@ -25,6 +27,7 @@ from respy.shared import prepare_cache_directory
 from respy.shared import return_core_dense_key
 
 
+@use_execution_backend_from_options
 def create_state_space_class(optim_paras, options):
     """Create the state space of the model."""
     prepare_cache_directory(options)
@@ -122,12 +125,16 @@ class StateSpace:
         self.options = options
         self.n_periods = options["n_periods"]
         self._create_conversion_dictionaries()
-        self.base_draws_sol = self.create_draws(options)
+        self.base_draws_sol, self.weights_sol = self.create_draws(options)
         self.create_arrays_for_expected_value_functions()
 
         if len(self.optim_paras["exogenous_processes"]) > 0:
             self.create_objects_for_exogenous_processes()
-        self.child_indices = self.collect_child_indices()
+
+        # Myopic agents do not look ahead. The child states are only collected if the
+        # model is solved with a positive discount factor.
+        if self.optim_paras["delta"] != 0:
+            self.create_child_indices()
 
     def _create_conversion_dictionaries(self):
         """Create mappings between state space location indices and properties.
@@ -187,13 +194,28 @@ class StateSpace:
             }
 
     def create_arrays_for_expected_value_functions(self):
-        """Create a container for expected value functions."""
+        """Create containers for expected value functions.
+
+        If the number of draws is chosen adaptively, the standard errors of the
+        expected value functions and the number of used draws are stored as well.
+
+        """
         self.expected_value_functions = Dict.empty(
             key_type=nb.types.int64, value_type=nb.types.float64[:]
         )
         for index, indices in self.dense_key_to_core_indices.items():
             self.expected_value_functions[index] = np.zeros(len(indices))
 
+        if self.options["solution_emax_tolerance"] is not None:
+            self.emax_standard_errors = {
+                index: np.zeros(len(indices))
+                for index, indices in self.dense_key_to_core_indices.items()
+            }
+            self.emax_n_draws = {
+                index: np.zeros(len(indices), dtype=np.int64)
+                for index, indices in self.dense_key_to_core_indices.items()
+            }
+
     def create_objects_for_exogenous_processes(self):
         """Create mappings for the implementation of the exogenous processes."""
         # Include switch arg
@@ -219,7 +241,9 @@ class StateSpace:
             self.dense_key_to_transit_keys, self.dense_key_to_choice_set
         )
 
-    def get_continuation_values(self, period):
+    def get_continuation_values(
+        self, period, dense_keys=None, expected_value_functions=None
+    ):
         """Get continuation values.
 
         The function takes the expected value functions from the previous periods and
@@ -232,10 +256,29 @@ class StateSpace:
         because we need a Numba typed dict but the function
         :meth:`StateSpace.get_attribute_from_period` just returns a normal dict)
 
+        If the model has only been solved for myopic agents, the child states do not
+        exist and read-only arrays of zeros are returned, see
+        :meth:`_get_continuation_values_of_myopic_agents`.
+
+        Parameters
+        ----------
+        period : int
+            Continuation values are retrieved for states in this period.
+        dense_keys : list of int or None, default None
+            Restrict the computation to these dense keys of the period. By default,
+            continuation values are computed for all dense keys in the period.
+        expected_value_functions : dict or None, default None
+            Maps all dense keys to arrays with shape ``(n_states, n_params)`` which
+            contain the expected value functions of a stack of parameter vectors. By
+            default, the expected value functions of the state space are used.
+
         Returns
         -------
-        continuation_values : numba.typed.Dict
-            The continuation values for each dense key in a :class:`numpy.ndarray`.
+        continuation_values : dict
+            The continuation values for each dense key in a :class:`numpy.ndarray` with
+            the dtype of ``options["floating_point_dtype"]``. The arrays have the shape
+            ``(n_states, n_choices)`` or ``(n_states, n_params, n_choices)`` for a
+            stack of expected value functions.
 
         See also
         --------
@@ -244,13 +287,42 @@ class StateSpace:
             values <get_continuation_values>`.
 
         """
+        dense_key_to_complex = self.get_attribute_from_period(
+            "dense_key_to_complex", period
+        )
+        if dense_keys is not None:
+            dense_key_to_complex = {
+                key: dense_key_to_complex[key] for key in dense_keys
+            }
+
+        if not hasattr(self, "child_indices"):
+            if expected_value_functions is None:
+                return self._get_continuation_values_of_myopic_agents(
+                    dense_key_to_complex
+                )
+            self.create_child_indices()
+
+        if expected_value_functions is not None:
+            n_params = next(iter(expected_value_functions.values())).shape[1]
+
         if period == self.n_periods - 1:
             shapes = self.get_attribute_from_period("base_draws_sol", period)
             states = self.get_attribute_from_period("dense_key_to_core_indices", period)
+            params_shape = () if expected_value_functions is None else (n_params,)
             continuation_values = {
-                key: np.zeros((states[key].shape[0], shapes[key].shape[1]))
-                for key in shapes
+                key: np.zeros(
+                    (states[key].shape[0], *params_shape, shapes[key].shape[1])
+                )
+                for key in dense_key_to_complex
             }
+        elif expected_value_functions is not None:
+            continuation_values = _get_continuation_values_of_stack(
+                dense_key_to_complex,
+                self.get_attribute_from_period("dense_key_to_choice_set", period),
+                self.get_attribute_from_period("child_indices", period),
+                self.core_key_and_dense_index_to_dense_key,
+                bypass={"expected_value_functions": expected_value_functions},
+            )
         else:
             child_indices = self.get_attribute_from_period("child_indices", period)
             expected_value_functions = self.get_attribute_from_period(
@@ -268,8 +340,21 @@ class StateSpace:
                 else "dense_key_to_choice_set"
             )
 
+            # With exogenous processes, the continuation values of a dense key are a
+            # weighted sum of the continuation values of all reachable dense keys.
+            dense_key_to_complex_w_transit = dense_key_to_complex
+            if len(self.optim_paras["exogenous_processes"]) > 0:
+                transit_keys = {
+                    transit_key
+                    for key in dense_key_to_complex
+                    for transit_key in self.dense_key_to_transit_keys[key]
+                }
+                dense_key_to_complex_w_transit = {
+                    key: self.dense_key_to_complex[key] for key in transit_keys
+                }
+
             continuation_values = _get_continuation_values(
-                self.get_attribute_from_period("dense_key_to_complex", period),
+                dense_key_to_complex_w_transit,
                 self.get_attribute_from_period(transit_choice_sets, period),
                 self.get_attribute_from_period("dense_key_to_core_indices", period),
                 child_indices,
@@ -279,7 +364,7 @@ class StateSpace:
 
             if len(self.optim_paras["exogenous_processes"]) > 0:
                 continuation_values = weight_continuation_values(
-                    self.get_attribute_from_period("dense_key_to_complex", period),
+                    dense_key_to_complex,
                     self.options,
                     bypass={
                         "continuation_values": continuation_values,
@@ -289,8 +374,46 @@ class StateSpace:
                     },
                 )
 
+        continuation_values = {
+            key: value.astype(self.options["floating_point_dtype"], copy=False)
+            for key, value in continuation_values.items()
+        }
+
         return continuation_values
 
+    def _get_continuation_values_of_myopic_agents(self, dense_key_to_complex):
+        """Get the continuation values of a model which was only solved myopically.
+
+        Without child states, the model has only been solved for a discount factor of
+        zero and all expected value functions are zero. Instead of gathering zeros from
+        the child states, read-only arrays of zeros without memory for each state are
+        returned.
+
+        """
+        zero = np.zeros(1, dtype=self.options["floating_point_dtype"])
+
+        return {
+            key: np.broadcast_to(
+                zero,
+                (
+                    len(self.dense_key_to_core_indices[key]),
+                    sum(self.dense_key_to_choice_set[key]),
+                ),
+            )
+            for key in dense_key_to_complex
+        }
+
+    def create_child_indices(self):
+        """Create the indices of child states and the dense keys of child states.
+
+        The attributes are missing in state spaces of myopic models until the model is
+        solved with a positive discount factor, see
+        :func:`~respy.solve._solve_with_backward_induction`.
+
+        """
+        self.child_indices = self.collect_child_indices()
+        self.dense_key_to_child_dense_keys = self.collect_child_dense_keys()
+
     def collect_child_indices(self):
         """Collect for each state the indices of its child states.
 
@@ -336,26 +459,97 @@ class StateSpace:
 
         return child_indices
 
+    def collect_child_dense_keys(self):
+        """Collect for each dense key the dense keys its continuation values depend on.
+
+        The continuation values of a dense key are gathered from the expected value
+        functions of its child states which are located in dense keys of the following
+        period. With exogenous processes, the continuation values are additionally
+        weighted over all dense keys which can be reached by the transition of the
+        processes. The mapping allows to re-solve only the dense keys which are affected
+        by a change in parameters.
+
+        Returns
+        -------
+        dense_key_to_child_dense_keys : dict
+            Maps a dense key to a set of dense keys in the following period. The set is
+            empty for dense keys in the last period.
+
+        """
+        dense_key_to_child_dense_keys = {}
+        for dense_key, complex_ in self.dense_key_to_complex.items():
+            if complex_[0] == self.n_periods - 1:
+                dense_key_to_child_dense_keys[dense_key] = set()
+                continue
+
+            reachable_keys = (
+                self.dense_key_to_transit_keys[dense_key]
+                if hasattr(self, "dense_key_to_transit_keys")
+                else [dense_key]
+            )
+
+            child_dense_keys = set()
+            for key in reachable_keys:
+                complex_ = self.dense_key_to_complex[key]
+                dense_idx = complex_[2] if len(complex_) == 3 else 0
+                child_core_keys = np.unique(self.child_indices[key][:, :, 0])
+                child_dense_keys |= {
+                    self.core_key_and_dense_index_to_dense_key[(core_key, dense_idx)]
+                    for core_key in child_core_keys.tolist()
+                }
+
+            dense_key_to_child_dense_keys[dense_key] = child_dense_keys
+
+        return dense_key_to_child_dense_keys
+
     def create_draws(self, options):
-        """Get draws."""
+        """Get draws and weights for the integration of expected value functions.
+
+        With Monte Carlo integration, dense keys with the same number of choices share
+        the same draws in a period and all draws have the same weight. With quadrature
+        rules, the nodes and weights are the same in every period.
+
+        Returns
+        -------
+        draws : dict
+            Maps dense keys to arrays with shape (n_draws, n_choices).
+        weights : dict
+            Maps dense keys to arrays with shape (n_draws,).
+
+        """
         n_choices_in_sets = list(set(map(sum, self.dense_key_to_choice_set.values())))
         shocks_sets = []
+        weights_sets = []
 
         for n_choices in n_choices_in_sets:
-            draws = create_base_draws(
-                (options["n_periods"], options["solution_draws"], n_choices),
-                next(options["solution_seed_startup"]),
-                options["monte_carlo_sequence"],
-            )
+            if options["solution_integration"] == "monte_carlo":
+                draws = create_base_draws(
+                    (options["n_periods"], options["solution_draws"], n_choices),
+                    next(options["solution_seed_startup"]),
+                    options["monte_carlo_sequence"],
+                    options["monte_carlo_antithetic"],
+                    options["monte_carlo_scramble"],
+                )
+                weights = np.ones(options["solution_draws"])
+            else:
+                nodes, weights = create_quadrature_nodes_and_weights(
+                    n_choices,
+                    options["solution_integration"],
+                    options["solution_quadrature_level"],
+                )
+                draws = np.broadcast_to(nodes, (options["n_periods"], *nodes.shape))
             shocks_sets.append(draws)
+            weights_sets.append(weights)
         draws = {}
+        weights = {}
         for dense_idx, complex_ix in self.dense_key_to_complex.items():
             period = complex_ix[0]
             n_choices = sum(complex_ix[1])
             idx = n_choices_in_sets.index(n_choices)
             draws[dense_idx] = shocks_sets[idx][period]
+            weights[dense_idx] = weights_sets[idx]
 
-        return draws
+        return draws, weights
 
     def get_dense_keys_from_period(self, period):
         """Get dense indices from one period."""
@@ -863,6 +1057,44 @@ def _get_continuation_values(
     return continuation_values
 
 
+@parallelize_across_dense_dimensions
+def _get_continuation_values_of_stack(
+    dense_complex_index,
+    choice_set,
+    child_indices,
+    core_index_and_dense_vector_to_dense_index,
+    expected_value_functions,
+):
+    """Get continuation values of a stack of parameter vectors from child states.
+
+    In contrast to :func:`_get_continuation_values`, the expected value functions have
+    an additional axis for the parameter vectors and the child states are gathered for
+    all states of one child dense key at once.
+
+    Returns
+    -------
+    continuation_values : numpy.ndarray
+        Array with shape ``(n_states, n_params, n_choices)``.
+
+    """
+    dense_idx = dense_complex_index[2] if len(dense_complex_index) == 3 else 0
+    n_choices = sum(choice_set)
+    n_params = next(iter(expected_value_functions.values())).shape[1]
+
+    child_core_keys = child_indices[:, :n_choices, 0]
+    child_rows = child_indices[:, :n_choices, 1]
+
+    continuation_values = np.zeros((len(child_indices), n_choices, n_params))
+    for core_key in np.unique(child_core_keys):
+        dense_key = core_index_and_dense_vector_to_dense_index[(core_key, dense_idx)]
+        is_child = child_core_keys == core_key
+        continuation_values[is_child] = expected_value_functions[dense_key][
+            child_rows[is_child]
+        ]
+
+    return continuation_values.transpose(0, 2, 1)
+
+
 @parallelize_across_dense_dimensions
 def _collect_child_indices(complex_, choice_set, indexer, optim_paras, options):
     """Collect child indices for states.
@@ -45,6 +45,15 @@ def test_transition_probabilities_for_one_exogenous_process(model_with_one_exog_
     assert np.allclose(probs, [[0.81, 0.09], [0.09, 0.01]], atol=0.01)
 
 
+def test_stack_of_params_is_rejected_for_exogenous_processes(model_with_one_exog_proc):
+    params, options = model_with_one_exog_proc
+
+    solve = get_solve_func(params, options)
+
+    with pytest.raises(AssertionError, match="exogenous processes"):
+        solve([params, params])
+
+
 def test_transition_probabilities_for_two_exogenous_processes(model_with_two_exog_proc):
     params, options = model_with_two_exog_proc
 
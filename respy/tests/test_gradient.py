@@ -0,0 +1,70 @@
+import numpy as np
+import pytest
+
+from respy.gradient import get_log_like_gradient_func
+from respy.likelihood import get_log_like_func
+from respy.simulate import get_simulate_func
+from respy.tests.utils import process_model_or_seed
+
+
+def _compute_numerical_derivatives_of_reward_and_type_parameters(params, log_like):
+    is_analytic = params.index.get_level_values("category").str.match(
+        r"(wage|nonpec|type)_"
+    )
+
+    derivatives = {}
+    for label in params.index[is_analytic]:
+        step = 1e-6 * max(abs(params.loc[label, "value"]), 0.1)
+        upper = params.copy()
+        upper.loc[label, "value"] += step
+        lower = params.copy()
+        lower.loc[label, "value"] -= step
+        derivatives[label] = (log_like(upper) - log_like(lower)) / (2 * step)
+
+    return derivatives
+
+
+@pytest.mark.integration
+@pytest.mark.parametrize("model", ["robinson_crusoe_extended", "kw_94_one"])
+def test_analytic_gradient_equals_numerical_gradient(model):
+    params, options = process_model_or_seed(model)
+    options["n_periods"] = 4
+    options["simulation_agents"] = 200
+
+    simulate = get_simulate_func(params, options)
+    df = simulate(params)
+
+    log_like = get_log_like_func(params, options, df)
+    log_like_gradient = get_log_like_gradient_func(params, options, df)
+    gradient = log_like_gradient(params)
+
+    expected = _compute_numerical_derivatives_of_reward_and_type_parameters(
+        params, log_like
+    )
+
+    assert gradient.index.equals(params.index)
+    np.testing.assert_allclose(
+        gradient[list(expected)], list(expected.values()), rtol=1e-4, atol=1e-6
+    )
+
+
+@pytest.mark.integration
+def test_analytic_gradient_with_types_equals_numerical_gradient(seed):
+    params, options = process_model_or_seed(
+        seed, n_types=2, point_constr={"n_periods": 3, "simulation_agents": 100}
+    )
+
+    simulate = get_simulate_func(params, options)
+    df = simulate(params)
+
+    log_like = get_log_like_func(params, options, df)
+    log_like_gradient = get_log_like_gradient_func(params, options, df)
+    gradient = log_like_gradient(params)
+
+    expected = _compute_numerical_derivatives_of_reward_and_type_parameters(
+        params, log_like
+    )
+
+    np.testing.assert_allclose(
+        gradient[list(expected)], list(expected.values()), rtol=1e-4, atol=1e-6
+    )
@@ -1,8 +1,11 @@
 from itertools import count
 
+import numpy as np
 import pytest
 
+import respy.solve
 from respy.interpolate import _split_interpolation_points_evenly
+from respy.solve import _estimate_costs_of_period
 from respy.solve import get_solve_func
 from respy.tests.utils import process_model_or_seed
 
@@ -36,3 +39,52 @@ def test_split_interpolation_points_evenly(
 
     for index in dense_index_to_n_states:
         assert dense_index_to_n_states[index] >= interpolations_points_splitted[index]
+
+
+@pytest.mark.integration
+def test_automatic_interpolation_meets_time_budget(monkeypatch):
+    params, options = process_model_or_seed("kw_94_one")
+    options["n_periods"] = 10
+    monkeypatch.setattr(
+        respy.solve, "_calibrate_throughput_of_full_solution", lambda options: 1e6
+    )
+
+    solve = get_solve_func(params, options)
+    state_space = solve(params)
+    costs = [
+        _estimate_costs_of_period(state_space, period)
+        for period in range(options["n_periods"])
+    ]
+    total_costs = sum(cost["full"] for cost in costs)
+
+    # A budget larger than the costs of the full solution reproduces it.
+    options["interpolation_points"] = "auto"
+    options["solution_time_budget"] = 2 * total_costs / 1e6
+    state_space_auto = get_solve_func(params, options)(params)
+
+    assert all(
+        n_points is None
+        for n_points in state_space_auto.period_to_interpolation_points.values()
+    )
+    for dense_key, value in state_space.expected_value_functions.items():
+        np.testing.assert_array_equal(
+            state_space_auto.expected_value_functions[dense_key], value
+        )
+
+    # With a smaller budget, expensive periods are interpolated and cheap periods are
+    # solved fully.
+    options["solution_time_budget"] = total_costs / 4 / 1e6
+    state_space_auto = get_solve_func(params, options)(params)
+    plan = state_space_auto.period_to_interpolation_points
+
+    planned_costs = sum(
+        cost["full"]
+        if plan[period] is None
+        else plan[period] * cost["per_point"] + cost["overhead"]
+        for period, cost in enumerate(costs)
+    )
+    assert planned_costs <= total_costs / 4
+    assert plan[0] is None
+    assert plan[options["n_periods"] - 1] is not None
+    for dense_key, value in state_space_auto.expected_value_functions.items():
+        assert np.isfinite(value).all()
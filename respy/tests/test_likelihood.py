@@ -49,6 +49,73 @@ def test_return_scalar_for_likelihood(model):
     assert isinstance(outputs, dict)
 
 
+@pytest.mark.integration
+@pytest.mark.parametrize("model", ["robinson_crusoe_basic", "kw_94_one"])
+def test_likelihood_with_single_precision(model):
+    params, options = process_model_or_seed(model)
+    options["n_periods"] = 3
+
+    simulate = get_simulate_func(params, options)
+    df = simulate(params)
+
+    log_like = get_log_like_func(params, options, df)
+    value = log_like(params)
+
+    options["floating_point_dtype"] = "float32"
+    log_like = get_log_like_func(params, options, df)
+    value_single_precision = log_like(params)
+
+    np.testing.assert_allclose(value_single_precision, value, rtol=1e-4)
+
+
+@pytest.mark.integration
+def test_batching_of_small_dense_keys_does_not_change_likelihood():
+    params, options = process_model_or_seed(
+        "robinson_crusoe_with_observed_characteristics"
+    )
+    options["n_periods"] = 5
+
+    simulate = get_simulate_func(params, options)
+    df = simulate(params)
+
+    log_like = get_log_like_func(params, options, df)
+    value = log_like(params)
+
+    options["dense_key_batch_size"] = 0
+    log_like = get_log_like_func(params, options, df)
+    value_without_batching = log_like(params)
+
+    assert value == value_without_batching
+
+
+@pytest.mark.integration
+def test_memoized_likelihood_is_returned_for_repeated_params():
+    params, options = process_model_or_seed("robinson_crusoe_basic")
+    options["n_periods"] = 3
+    df = get_simulate_func(params, options)(params)
+    other_params = params.copy()
+    other_params.loc[("delta", "delta"), "value"] = 0.9
+
+    log_like = get_log_like_func(params, options, df, return_scalar=False)
+    expected = log_like(params)
+    expected_other = log_like(other_params)
+
+    options["memoization_maxsize"] = 1
+    log_like = get_log_like_func(params, options, df, return_scalar=False)
+    memo = log_like.keywords["memo"]
+
+    outputs = log_like(params)
+    outputs["contributions"][:] = 0
+    assert log_like(params)["value"] == expected["value"]
+    np.testing.assert_array_equal(
+        log_like(params)["contributions"], expected["contributions"]
+    )
+    assert len(memo) == 1
+
+    assert log_like(other_params)["value"] == expected_other["value"]
+    assert len(memo) == 1
+
+
 @pytest.mark.unit
 @pytest.mark.precise
 @given(
@@ -0,0 +1,61 @@
+import numpy as np
+import pytest
+
+from respy.likelihood import get_log_like_func
+from respy.multi_fidelity import _draw_subsample_of_individuals
+from respy.multi_fidelity import get_multi_fidelity_criterion_func
+from respy.pre_processing.data_checking import check_estimation_data
+from respy.pre_processing.model_processing import process_params_and_options
+from respy.simulate import get_simulate_func
+from respy.tests.utils import process_model_or_seed
+
+
+@pytest.mark.integration
+def test_fidelity_is_raised_without_improvement():
+    params, options = process_model_or_seed("robinson_crusoe_basic")
+    options["n_periods"] = 5
+    options["simulation_agents"] = 100
+
+    simulate = get_simulate_func(params, options)
+    df = simulate(params)
+
+    log_like = get_multi_fidelity_criterion_func(params, options, df=df, window=2)
+    state = log_like.keywords["state"]
+
+    # Without improvement, the fidelity is raised after the window is exceeded.
+    levels = []
+    for _ in range(8):
+        log_like(params)
+        levels.append(state["level"])
+
+    assert levels == [0, 0, 1, 1, 1, 2, 2, 2]
+    assert set(state["errors"]) == {0, 1}
+
+    # Every fidelity has its own cache directory.
+    cache_paths = {
+        func.keywords["options"]["cache_path"]
+        for func in state["criterion_funcs"].values()
+    }
+    assert len(cache_paths) == 3
+    assert all(path.exists() for path in cache_paths)
+
+    # The highest fidelity is the criterion with the original options.
+    expected = get_log_like_func(params, options, df)(params)
+    assert log_like(params) == pytest.approx(expected)
+
+
+@pytest.mark.unit
+def test_subsample_of_individuals_is_valid_estimation_data():
+    params, options = process_model_or_seed("kw_94_one")
+    options["n_periods"] = 3
+    options["simulation_agents"] = 50
+
+    simulate = get_simulate_func(params, options)
+    df = simulate(params)
+
+    subsample = _draw_subsample_of_individuals(df, 0.3, 0)
+
+    optim_paras, _ = process_params_and_options(params, options)
+    check_estimation_data(subsample, optim_paras)
+    assert subsample.index.get_level_values("Identifier").nunique() == 15
+    np.testing.assert_array_equal(subsample.columns, df.columns)
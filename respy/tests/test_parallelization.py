@@ -1,10 +1,26 @@
 import numba as nb
+import numpy as np
+import pandas as pd
 import pytest
 from numba.typed import Dict
 
+import respy._numba
+from respy.parallelization import _create_broadcasting_plan
 from respy.parallelization import _infer_dense_keys_from_arguments
+from respy.parallelization import _infer_dense_keys_from_plan
+from respy.parallelization import _Schedule
 from respy.parallelization import _is_dense_dictionary_argument
 from respy.parallelization import _is_dictionary_with_integer_keys
+from respy.parallelization import _WORKER_POOLS
+from respy.parallelization import concatenate_batches
+from respy.parallelization import create_batches_of_small_dense_keys
+from respy.parallelization import execution_backend
+from respy.parallelization import PARALLELIZATION_BACKENDS
+from respy.parallelization import parallelize_across_dense_dimensions
+from respy.parallelization import split_batches
+from respy.shared import calculate_expected_value_functions
+from respy.simulate import get_simulate_func
+from respy.tests.utils import process_model_or_seed
 
 
 def _typeddict_wo_integer_keys():
@@ -58,3 +74,183 @@ def test_infer_dense_keys_from_arguments(args, kwargs, expected):
 def test_is_dense_dictionary_argument(arg, dense_keys, expected):
     result = _is_dense_dictionary_argument(arg, dense_keys)
     assert result is expected
+
+
+@parallelize_across_dense_dimensions
+def _multiply(array, factor):
+    return array * factor
+
+
+@pytest.mark.unit
+@pytest.mark.parametrize("backend", PARALLELIZATION_BACKENDS)
+def test_execution_backends_return_the_same_results(backend):
+    if backend == "dask":
+        pytest.importorskip("distributed")
+    arrays = {i: np.arange(i, i + 5) for i in range(10)}
+
+    with execution_backend(backend, 2):
+        out = _multiply(arrays, 2)
+
+    assert out.keys() == arrays.keys()
+    for key, array in arrays.items():
+        np.testing.assert_array_equal(out[key], array * 2)
+
+
+@parallelize_across_dense_dimensions
+def _sum_of_nested_multiplication(array):
+    return sum(_multiply({0: array, 1: array}, 2).values())
+
+
+@pytest.mark.unit
+def test_nested_calls_and_reuse_of_worker_pool():
+    arrays = {i: np.arange(i, i + 5) for i in range(10)}
+
+    with execution_backend("threading", 2):
+        out = _sum_of_nested_multiplication(arrays)
+        out_2 = _sum_of_nested_multiplication(arrays)
+
+    assert ("threading", 2, None) in _WORKER_POOLS
+    for key, array in arrays.items():
+        np.testing.assert_array_equal(out[key], array * 4)
+        np.testing.assert_array_equal(out_2[key], array * 4)
+
+
+@pytest.mark.unit
+def test_broadcasting_plan_distinguishes_dense_dictionaries():
+    args = ({1: "a", 2: "b"}, {"n_periods": 3})
+    kwargs = {"dense": {1: 0, 2: 0, 3: 0}, "other": 1}
+
+    plan = _create_broadcasting_plan(args, kwargs)
+
+    assert plan == ((0,), ("dense",))
+    assert _infer_dense_keys_from_plan(args, kwargs, plan) == {1, 2}
+
+
+def _size_of_array(array, df, factor):
+    return array.size
+
+
+@parallelize_across_dense_dimensions(
+    cost=_size_of_array, split_arguments=("array", "df")
+)
+def _multiply_array_and_df(array, df, factor):
+    df = df.assign(product=array * factor)
+    return array * factor, df
+
+
+@pytest.mark.unit
+def test_large_dense_keys_are_split_into_chunks():
+    arrays = {0: np.arange(1_000.0), 1: np.arange(10.0), 2: np.arange(5.0)}
+    dfs = {key: pd.DataFrame(index=np.arange(len(a)) * 2) for key, a in arrays.items()}
+
+    tasks = _Schedule(_size_of_array, ("array", "df"), ["array", "df", "factor"])
+    tasks = tasks.create_tasks((arrays, dfs, 2), {}, ((0, 1), ()), {0, 1, 2}, 4)
+
+    assert [key for key, _, _ in tasks] == [0, 0, 0, 0, 1, 2]
+
+    with execution_backend("threading", 4):
+        out, out_dfs = _multiply_array_and_df(arrays, dfs, 2)
+
+    for key, array in arrays.items():
+        np.testing.assert_array_equal(out[key], array * 2)
+        np.testing.assert_array_equal(out_dfs[key]["product"], array * 2)
+        assert out_dfs[key].index.equals(dfs[key].index)
+
+
+@pytest.mark.unit
+def test_batches_of_small_dense_keys_can_be_split_again():
+    sizes = {0: 3, 1: 20, 2: 4, 3: 5, 4: 2}
+    groups = {0: "a", 1: "a", 2: "b", 3: "a", 4: "b"}
+    arrays = {key: np.random.normal(size=(size, 2)) for key, size in sizes.items()}
+
+    batches = create_batches_of_small_dense_keys(groups, sizes, 10)
+    assert batches == {0: [0, 3], 1: [1], 2: [2, 4]}
+
+    concatenated = concatenate_batches(arrays, batches)
+    assert set(concatenated) == {0, 1, 2}
+    assert concatenated[0].shape == (8, 2)
+
+    splitted = split_batches(concatenated, batches, sizes)
+    assert set(splitted) == set(arrays)
+    for key, array in arrays.items():
+        np.testing.assert_array_equal(splitted[key], array)
+
+
+@pytest.mark.unit
+def test_kernel_targets_are_selected_by_size_and_compute_the_same(monkeypatch):
+    dtypes = ",".join(["float64"] * 8)
+    key = f"{calculate_expected_value_functions.name}|{dtypes}|4"
+    monkeypatch.setattr(respy._numba.nb, "get_num_threads", lambda: 4)
+    monkeypatch.setitem(
+        respy._numba._KERNEL_THRESHOLDS,
+        key,
+        {"threshold": 1_000, "calibrated_up_to": 1_000},
+    )
+
+    draws = np.random.normal(size=(50, 3))
+    for n_states, expected_target in [(10, "cpu"), (999, "cpu"), (1_000, "parallel")]:
+        args = (
+            np.exp(np.random.normal(size=(n_states, 3))),
+            np.random.normal(size=(n_states, 3)),
+            np.random.normal(size=(n_states, 3)),
+            draws,
+            np.ones(50),
+            draws.min(axis=0),
+            draws.max(axis=0),
+            0.95,
+        )
+        target = calculate_expected_value_functions.select_target(*args)
+        assert target == expected_target
+
+        results = {
+            target: calculate_expected_value_functions.get_ufunc(target)(*args)
+            for target in ["cpu", "parallel"]
+        }
+        np.testing.assert_array_equal(results["cpu"], results["parallel"])
+        np.testing.assert_array_equal(
+            calculate_expected_value_functions(*args), results["cpu"]
+        )
+
+    # A single thread, e.g., within a worker, always uses the serial target.
+    monkeypatch.setattr(respy._numba.nb, "get_num_threads", lambda: 1)
+    assert calculate_expected_value_functions.select_target(*args) == "cpu"
+
+
+@parallelize_across_dense_dimensions
+def _get_number_of_threads(array):
+    return nb.get_num_threads()
+
+
+@pytest.mark.unit
+@pytest.mark.parametrize("backend", PARALLELIZATION_BACKENDS)
+def test_number_of_threads_is_limited_and_shared_among_workers(backend):
+    if backend == "dask":
+        pytest.importorskip("distributed")
+    n_threads = nb.get_num_threads()
+    arrays = {0: np.zeros(1), 1: np.zeros(1)}
+
+    with execution_backend(backend, 2, n_threads=1):
+        assert nb.get_num_threads() == 1
+        out = _get_number_of_threads(arrays)
+
+    assert nb.get_num_threads() == n_threads
+    assert out == {0: 1, 1: 1}
+
+
+@pytest.mark.end_to_end
+@pytest.mark.parametrize("backend", ["threading", "loky", "dask"])
+def test_simulation_with_parallel_backends(backend):
+    if backend == "dask":
+        pytest.importorskip("distributed")
+    params, options = process_model_or_seed(
+        "robinson_crusoe_with_observed_characteristics"
+    )
+    options["n_periods"] = 5
+
+    df = get_simulate_func(params, options)(params)
+
+    options["parallelization_backend"] = backend
+    options["parallelization_n_jobs"] = 2
+    df_parallel = get_simulate_func(params, options)(params)
+
+    assert df.equals(df_parallel)
@@ -1,5 +1,7 @@
 import numpy as np
+import pandas as pd
 import pytest
+from scipy import stats
 
 from respy.config import EXAMPLE_MODELS
 from respy.config import INDEXER_INVALID_INDEX
@@ -7,8 +9,21 @@ from respy.config import KEANE_WOLPIN_1994_MODELS
 from respy.config import KEANE_WOLPIN_1997_MODELS
 from respy.pre_processing.model_checking import check_model_solution
 from respy.pre_processing.model_processing import process_params_and_options
+from respy.shared import calculate_expected_value_functions
+from respy.shared import calculate_expected_value_functions_with_control_variate
+from respy.shared import calculate_expected_value_functions_with_error_control
+from respy.shared import calculate_expected_value_functions_with_normal_shocks
+from respy.shared import compute_expected_draws
+from respy.shared import compute_params_hash
+from respy.shared import create_base_draws
 from respy.shared import create_core_state_space_columns
+from respy.shared import create_quadrature_nodes_and_weights
+from respy.shared import transform_base_draws_of_choice_sets
+from respy.shared import transform_base_draws_with_cholesky_factor
+from respy.simulate import get_simulate_func
 from respy.solve import get_solve_func
+from respy.solve import load_solution
+from respy.solve import save_solution
 from respy.state_space import _create_core_period_choice
 from respy.state_space import _create_core_state_space
 from respy.state_space import _create_indexer
@@ -104,6 +119,63 @@ def test_invariance_of_solution(model_or_seed):
         )
 
 
+@pytest.mark.integration
+@pytest.mark.precise
+@pytest.mark.parametrize("model", ["kw_97_basic", "kw_2000"])
+def test_incremental_solution_after_changing_type_specific_parameter(model):
+    """Re-solving only dense keys of a type yields the solution of a complete solve."""
+    params, options = process_model_or_seed(model)
+
+    solve = get_solve_func(params, options)
+    solve(params)
+
+    params.loc[("wage_white_collar", "type_2"), "value"] += 0.1
+
+    state_space = solve(params)
+    state_space_ = get_solve_func(params, options)(params)
+
+    apply_to_attributes_of_two_state_spaces(
+        state_space.expected_value_functions,
+        state_space_.expected_value_functions,
+        np.testing.assert_array_equal,
+    )
+
+
+@pytest.mark.integration
+@pytest.mark.precise
+@pytest.mark.parametrize(
+    "model", ["kw_97_basic", "robinson_crusoe_with_observed_characteristics"]
+)
+def test_pipelined_solution_is_equal_to_sequential_solution(model):
+    params, options = process_model_or_seed(model)
+    options["n_periods"] = min(options["n_periods"], 10)
+
+    state_space = get_solve_func(params, options)(params)
+
+    options["solution_pipelining"] = True
+    solve = get_solve_func(params, options)
+    state_space_ = solve(params)
+
+    for attribute in ["wages", "nonpecs", "expected_value_functions"]:
+        apply_to_attributes_of_two_state_spaces(
+            getattr(state_space, attribute),
+            getattr(state_space_, attribute),
+            np.testing.assert_array_equal,
+        )
+
+    # Changed rewards are detected while the rewards are created.
+    wage_parameter = next(i for i in params.index if i[0].startswith("wage_"))
+    params.loc[wage_parameter, "value"] += 0.1
+    state_space = get_solve_func(params, options)(params)
+    state_space_ = solve(params)
+
+    apply_to_attributes_of_two_state_spaces(
+        state_space.expected_value_functions,
+        state_space_.expected_value_functions,
+        np.testing.assert_array_equal,
+    )
+
+
 @pytest.mark.precise
 @pytest.mark.unit
 @pytest.mark.parametrize("model", KEANE_WOLPIN_1994_MODELS)
@@ -427,3 +499,621 @@ def test_wage_nonpecs():
             getattr(state_space_, attribute),
             np.testing.assert_array_almost_equal,
         )
+
+
+@pytest.mark.unit
+@pytest.mark.precise
+@pytest.mark.parametrize("rule, level", [("gauss_hermite", 10), ("smolyak", 6)])
+def test_quadrature_rules_against_closed_form_emax_of_two_normals(rule, level):
+    """Quadrature rules reproduce the expected maximum of two normal variables."""
+    nonpecs = np.array([100.0, 101.0])
+    sds = np.array([2.0, 3.0])
+
+    nodes, weights = create_quadrature_nodes_and_weights(2, rule, level)
+    draws = nodes * sds
+    expected_value_function = calculate_expected_value_functions(
+        np.ones(2),
+        nonpecs,
+        np.zeros(2),
+        draws,
+        weights,
+        draws.min(axis=0),
+        draws.max(axis=0),
+        0.95,
+    )
+
+    theta = np.sqrt((sds ** 2).sum())
+    alpha = (nonpecs[0] - nonpecs[1]) / theta
+    expected = (
+        nonpecs[0] * stats.norm.cdf(alpha)
+        + nonpecs[1] * stats.norm.cdf(-alpha)
+        + theta * stats.norm.pdf(alpha)
+    )
+
+    np.testing.assert_allclose(expected_value_function, expected, rtol=1e-3)
+
+
+@pytest.mark.end_to_end
+@pytest.mark.parametrize("rule", ["gauss_hermite", "smolyak"])
+def test_check_solution_with_quadrature_rules(rule):
+    params, options = process_model_or_seed("kw_94_one")
+    options["solution_integration"] = rule
+
+    solve = get_solve_func(params, options)
+    state_space = solve(params)
+
+    optim_paras, options = process_params_and_options(params, options)
+
+    check_model_solution(optim_paras, options, state_space)
+
+
+@pytest.mark.unit
+@pytest.mark.precise
+def test_closed_form_emax_of_two_normals():
+    """The analytic kernel is exact for two normal variables."""
+    nonpecs = np.array([100.0, 101.0])
+    sds = np.array([2.0, 3.0])
+
+    expected_value_function = calculate_expected_value_functions_with_normal_shocks(
+        nonpecs, np.zeros(2), np.diag(sds ** 2), 0.95
+    )
+
+    theta = np.sqrt((sds ** 2).sum())
+    alpha = (nonpecs[0] - nonpecs[1]) / theta
+    expected = (
+        nonpecs[0] * stats.norm.cdf(alpha)
+        + nonpecs[1] * stats.norm.cdf(-alpha)
+        + theta * stats.norm.pdf(alpha)
+    )
+
+    np.testing.assert_allclose(expected_value_function, expected)
+
+
+@pytest.mark.unit
+def test_closed_form_emax_against_monte_carlo_integration(seed):
+    """The approximation for more than two correlated choices is close."""
+    np.random.seed(seed)
+    n_choices = np.random.randint(1, 5)
+
+    nonpecs = np.random.normal(1, 1, n_choices)
+    continuation_values = np.random.normal(1, 1, n_choices)
+    cholesky = np.tril(np.random.normal(0, 0.5, (n_choices, n_choices)))
+    cholesky[np.diag_indices(n_choices)] = np.abs(cholesky.diagonal()) + 1
+    draws = np.random.standard_normal((1_000_000, n_choices)).dot(cholesky.T)
+
+    closed_form = calculate_expected_value_functions_with_normal_shocks(
+        nonpecs, continuation_values, cholesky.dot(cholesky.T), 0.95
+    )
+    monte_carlo = calculate_expected_value_functions(
+        np.ones(n_choices),
+        nonpecs,
+        continuation_values,
+        draws,
+        np.ones(draws.shape[0]),
+        draws.min(axis=0),
+        draws.max(axis=0),
+        0.95,
+    )
+
+    np.testing.assert_allclose(closed_form, monte_carlo, rtol=2e-2)
+
+
+@pytest.mark.end_to_end
+def test_check_solution_with_closed_form_emax():
+    """Choice sets without wages are solved analytically."""
+    params, options = process_model_or_seed("robinson_crusoe_extended")
+    options["negative_choice_set"]["fishing"] = ["period >= 5"]
+    options["solution_closed_form_emax"] = True
+
+    solve = get_solve_func(params, options)
+    state_space = solve(params)
+
+    optim_paras, options = process_params_and_options(params, options)
+
+    check_model_solution(optim_paras, options, state_space)
+
+    options["solution_closed_form_emax"] = False
+    state_space_mc = get_solve_func(params, options)(params)
+
+    for key, evf in state_space.expected_value_functions.items():
+        np.testing.assert_allclose(
+            evf, state_space_mc.expected_value_functions[key], rtol=0.05
+        )
+
+
+@pytest.mark.unit
+@pytest.mark.precise
+def test_error_control_without_tolerance_uses_all_draws():
+    np.random.seed(0)
+    n_states, n_draws, n_choices = 5, 1_000, 3
+
+    wages = np.exp(np.random.normal(size=(n_states, n_choices)))
+    nonpecs = np.random.normal(size=(n_states, n_choices))
+    continuation_values = np.random.normal(size=(n_states, n_choices))
+    draws = np.random.normal(size=(n_states, n_draws, n_choices))
+
+    expected = calculate_expected_value_functions(
+        wages,
+        nonpecs,
+        continuation_values,
+        draws,
+        np.ones((n_states, n_draws)),
+        draws.min(axis=1),
+        draws.max(axis=1),
+        0.95,
+    )
+    evfs, _, n_draws_used = calculate_expected_value_functions_with_error_control(
+        wages,
+        nonpecs,
+        continuation_values,
+        draws,
+        draws.min(axis=1),
+        draws.max(axis=1),
+        0.95,
+        0.0,
+        100,
+    )
+
+    np.testing.assert_allclose(evfs, expected)
+    assert (n_draws_used == n_draws).all()
+
+
+@pytest.mark.end_to_end
+def test_solution_with_error_control():
+    params, options = process_model_or_seed("kw_94_one")
+    options["solution_emax_tolerance"] = 0.5
+    options["solution_emax_block_size"] = 50
+
+    solve = get_solve_func(params, options)
+    state_space = solve(params)
+
+    optim_paras, options = process_params_and_options(params, options)
+
+    check_model_solution(optim_paras, options, state_space)
+
+    for key in state_space.emax_n_draws:
+        standard_errors = state_space.emax_standard_errors[key]
+        n_draws = state_space.emax_n_draws[key]
+
+        is_solved = n_draws > 0
+        assert (
+            (standard_errors[is_solved] <= 0.5)
+            | (n_draws[is_solved] == options["solution_draws"])
+        ).all()
+        assert (n_draws[is_solved] % 50 == 0).all()
+
+
+@pytest.mark.unit
+@pytest.mark.precise
+def test_pruning_of_dominated_choices_does_not_change_emax(seed):
+    np.random.seed(seed)
+    n_states, n_draws, n_choices = 100, 200, 4
+
+    wages = np.exp(np.random.normal(2, 1, size=(n_states, n_choices)))
+    wages[:, 2:] = 1
+    nonpecs = np.random.normal(0, 20, size=(n_states, n_choices))
+    continuation_values = np.random.normal(5, 20, size=(n_states, n_choices))
+    draws = np.random.normal(size=(n_draws, n_choices))
+    draws[:, :2] = np.exp(0.2 * draws[:, :2])
+    weights = np.ones(n_draws)
+
+    pruned = calculate_expected_value_functions(
+        wages,
+        nonpecs,
+        continuation_values,
+        draws,
+        weights,
+        draws.min(axis=0),
+        draws.max(axis=0),
+        0.95,
+    )
+    not_pruned = calculate_expected_value_functions(
+        wages,
+        nonpecs,
+        continuation_values,
+        draws,
+        weights,
+        np.full(n_choices, -np.inf),
+        np.full(n_choices, np.inf),
+        0.95,
+    )
+
+    np.testing.assert_array_equal(pruned, not_pruned)
+
+
+@pytest.mark.unit
+@pytest.mark.edge_case
+def test_pruning_keeps_best_choice_if_its_draws_are_equal():
+    draws = np.array([[0.5, 0], [0.5, 1]])
+
+    emax = calculate_expected_value_functions(
+        np.ones((1, 2)),
+        np.array([[5, 0]]),
+        np.zeros((1, 2)),
+        draws,
+        np.ones(2),
+        draws.min(axis=0),
+        draws.max(axis=0),
+        0.95,
+    )
+
+    np.testing.assert_allclose(emax, 5.5)
+
+
+@pytest.mark.end_to_end
+@pytest.mark.edge_case
+@pytest.mark.parametrize(
+    "options_",
+    [
+        {"solution_draws": 1},
+        {"solution_integration": "gauss_hermite", "solution_quadrature_level": 1},
+    ],
+)
+def test_solution_with_a_single_draw_or_node(options_):
+    """With a single draw, the bounds of all choices coincide and none is pruned."""
+    params, options = process_model_or_seed("robinson_crusoe_basic")
+    options = {**options, **options_}
+
+    state_space = get_solve_func(params, options)(params)
+
+    for expected_value_functions in state_space.expected_value_functions.values():
+        assert (expected_value_functions[:-1] > 0).all()
+
+
+@pytest.mark.end_to_end
+@pytest.mark.parametrize("model", ["kw_94_one", "robinson_crusoe_extended"])
+def test_solution_with_single_precision(model):
+    params, options = process_model_or_seed(model)
+
+    state_space = get_solve_func(params, options)(params)
+
+    options["floating_point_dtype"] = "float32"
+    state_space_single = get_solve_func(params, options)(params)
+
+    for key, wages in state_space_single.wages.items():
+        assert wages.dtype == np.float32
+        np.testing.assert_allclose(
+            state_space_single.expected_value_functions[key],
+            state_space.expected_value_functions[key],
+            rtol=1e-4,
+        )
+
+
+@pytest.mark.end_to_end
+@pytest.mark.parametrize(
+    "model", ["kw_94_one", "robinson_crusoe_with_observed_characteristics"]
+)
+def test_saved_solution_can_be_loaded_and_reused(model, tmp_path):
+    params, options = process_model_or_seed(model)
+    options["n_periods"] = min(options["n_periods"], 5)
+    path = tmp_path / "solution.npz"
+
+    state_space = get_solve_func(params, options)(params)
+    save_solution(state_space, path)
+    expected = get_simulate_func(params, options)(params)
+
+    solution = load_solution(path, params, options)
+    simulated = get_simulate_func(params, options, solution=solution)(params)
+
+    apply_to_attributes_of_two_state_spaces(
+        state_space.expected_value_functions,
+        solution.expected_value_functions,
+        np.testing.assert_array_equal,
+    )
+    apply_to_attributes_of_two_state_spaces(
+        state_space.wages, solution.wages, np.testing.assert_array_equal
+    )
+    pd.testing.assert_frame_equal(simulated, expected)
+
+    with pytest.raises(ValueError, match="solution_emax_block_size"):
+        load_solution(path, params, {**options, "solution_emax_block_size": 50})
+
+    params.loc[("delta", "delta"), "value"] -= 0.01
+    with pytest.raises(ValueError, match="different parameters"):
+        load_solution(path, params, options)
+
+
+@pytest.mark.end_to_end
+def test_memoized_solutions_are_restored_in_the_state_space():
+    params, options = process_model_or_seed("kw_94_one")
+    options["n_periods"] = 5
+    options["memoization_maxsize"] = 2
+    other_params = params.copy()
+    other_params.loc[("wage_a", "constant"), "value"] += 0.1
+    third_params = params.copy()
+    third_params.loc[("delta", "delta"), "value"] -= 0.05
+
+    solve = get_solve_func(params, options)
+    memo = solve.keywords["memo"]
+
+    state_space = solve(params)
+    expected = {
+        key: value.copy() for key, value in state_space.expected_value_functions.items()
+    }
+    solve(other_params)
+    state_space = solve(params)
+
+    apply_to_attributes_of_two_state_spaces(
+        state_space.expected_value_functions, expected, np.testing.assert_array_equal
+    )
+
+    state_space = solve(third_params)
+    assert len(memo) == 2
+    assert compute_params_hash(other_params) not in memo
+
+    options["memoization_maxsize"] = 0
+    expected_state_space = get_solve_func(params, options)(third_params)
+    apply_to_attributes_of_two_state_spaces(
+        state_space.expected_value_functions,
+        expected_state_space.expected_value_functions,
+        np.testing.assert_array_equal,
+    )
+
+
+@pytest.mark.end_to_end
+def test_solved_state_space_is_not_reused_for_options_affecting_the_solution():
+    params, options = process_model_or_seed("kw_94_one")
+    options["n_periods"] = 5
+
+    solve_func = get_solve_func(params, options)
+    state_space = solve_func(params)
+    options = {**solve_func.keywords["options"], "solution_control_variate": True}
+
+    assert solve_func.func(params, options, state_space) is state_space
+    assert state_space.solution_options["solution_control_variate"]
+
+    expected = get_solve_func(params, options)(params)
+    apply_to_attributes_of_two_state_spaces(
+        state_space.expected_value_functions,
+        expected.expected_value_functions,
+        np.testing.assert_array_equal,
+    )
+
+
+@pytest.mark.end_to_end
+@pytest.mark.parametrize("model", ["kw_94_one", "robinson_crusoe_extended"])
+def test_solution_of_stack_of_params_equals_sequential_solutions(model):
+    params, options = process_model_or_seed(model)
+    options["n_periods"] = min(options["n_periods"], 5)
+
+    myopic_params = params.copy()
+    myopic_params.loc[("delta", "delta"), "value"] = 0
+    other_params = params.copy()
+    other_params["value"] *= 1.01
+    stack = [params, myopic_params, other_params]
+
+    solve = get_solve_func(params, options)
+    state_spaces = solve(stack)
+
+    for params_, state_space_of_stack in zip(stack, state_spaces):
+        state_space = solve(params_)
+        for attribute in ["wages", "nonpecs", "expected_value_functions"]:
+            apply_to_attributes_of_two_state_spaces(
+                getattr(state_space_of_stack, attribute),
+                getattr(state_space, attribute),
+                np.testing.assert_array_equal,
+            )
+
+
+@pytest.mark.end_to_end
+def test_sequential_solution_of_stack_of_params_does_not_modify_state_space():
+    params, options = process_model_or_seed("kw_94_one")
+    options["n_periods"] = 5
+    options["solution_control_variate"] = True
+    other_params = params.copy()
+    other_params["value"] *= 1.01
+
+    solve = get_solve_func(params, options)
+    state_space = solve(params)
+    expected = {
+        key: value.copy() for key, value in state_space.expected_value_functions.items()
+    }
+
+    state_spaces = solve([params, other_params])
+
+    apply_to_attributes_of_two_state_spaces(
+        state_space.expected_value_functions, expected, np.testing.assert_array_equal
+    )
+    assert state_space.params_hash == compute_params_hash(params)
+    apply_to_attributes_of_two_state_spaces(
+        state_spaces[1].expected_value_functions,
+        get_solve_func(params, options)(other_params).expected_value_functions,
+        np.testing.assert_array_equal,
+    )
+
+
+@pytest.mark.integration
+def test_child_states_of_myopic_model_are_created_for_positive_discount_factor(seed):
+    params, options = process_model_or_seed(
+        seed, myopic=True, point_constr={"n_periods": 3}
+    )
+
+    solve = get_solve_func(params, options)
+    state_space = solve(params)
+
+    assert not hasattr(state_space, "child_indices")
+    for period in range(options["n_periods"]):
+        for value in state_space.get_continuation_values(period).values():
+            assert (value == 0).all()
+
+    params.loc["delta", "value"] = 0.95
+    state_space = solve(params)
+    expected = get_solve_func(params, options)(params)
+
+    assert hasattr(state_space, "child_indices")
+    apply_to_attributes_of_two_state_spaces(
+        state_space.expected_value_functions,
+        expected.expected_value_functions,
+        np.testing.assert_array_equal,
+    )
+
+
+@pytest.mark.integration
+def test_transformed_draws_are_shared_by_dense_keys_with_same_choice_set(seed):
+    params, options = process_model_or_seed(
+        seed, n_types=2, point_constr={"n_periods": 3}
+    )
+    optim_paras, options = process_params_and_options(params, options)
+    state_space = create_state_space_class(optim_paras, options)
+
+    draws = transform_base_draws_of_choice_sets(
+        state_space.base_draws_sol,
+        state_space.dense_key_to_complex,
+        optim_paras["shocks_cholesky"],
+        optim_paras,
+    )
+    expected = transform_base_draws_with_cholesky_factor(
+        state_space.base_draws_sol,
+        state_space.dense_key_to_choice_set,
+        optim_paras["shocks_cholesky"],
+        optim_paras,
+    )
+
+    complex_to_draws = {}
+    for dense_key, complex_ in state_space.dense_key_to_complex.items():
+        np.testing.assert_array_equal(draws[dense_key], expected[dense_key])
+        assert not draws[dense_key].flags.writeable
+        assert complex_to_draws.setdefault(complex_[:2], draws[dense_key]) is (
+            draws[dense_key]
+        )
+
+
+@pytest.mark.integration
+def test_period_kernel_equals_solution_per_dense_key(seed):
+    params, options = process_model_or_seed(
+        seed, n_types=2, point_constr={"n_periods": 4}
+    )
+
+    for solution_integration in ["monte_carlo", "gauss_hermite"]:
+        options["solution_integration"] = solution_integration
+        options["solution_period_kernel"] = False
+        state_space = get_solve_func(params, options)(params)
+        options["solution_period_kernel"] = True
+        state_space_period_kernel = get_solve_func(params, options)(params)
+
+        apply_to_attributes_of_two_state_spaces(
+            state_space.expected_value_functions,
+            state_space_period_kernel.expected_value_functions,
+            np.testing.assert_array_equal,
+        )
+
+
+@pytest.mark.unit
+@pytest.mark.parametrize("monte_carlo_sequence", ["random", "sobol"])
+def test_antithetic_draws_are_pairs_of_negatives(monte_carlo_sequence):
+    draws = create_base_draws((3, 7, 2), 0, monte_carlo_sequence, antithetic=True)
+
+    assert draws.shape == (3, 7, 2)
+    np.testing.assert_array_equal(draws[:, 4:], -draws[:, :3])
+
+
+@pytest.mark.unit
+@pytest.mark.parametrize(
+    "monte_carlo_sequence, rule", [("halton", "H"), ("sobol", "S")]
+)
+def test_quasi_random_draws_are_equal_to_chaospy(monte_carlo_sequence, rule):
+    cp = pytest.importorskip("chaospy")
+
+    for n_choices in [1, 4, 12]:
+        distribution = cp.MvNormal(loc=np.zeros(n_choices), scale=np.eye(n_choices))
+        expected = distribution.sample(300, rule=rule).T.reshape(3, 100, n_choices)
+
+        draws = create_base_draws((3, 100, n_choices), 0, monte_carlo_sequence)
+
+        np.testing.assert_array_equal(draws, expected)
+
+
+@pytest.mark.unit
+@pytest.mark.parametrize("monte_carlo_sequence", ["halton", "sobol"])
+def test_scrambled_draws_are_randomized_by_the_seed(monte_carlo_sequence):
+    draws = create_base_draws((2, 512, 3), 0, monte_carlo_sequence, scramble=True)
+    draws_same_seed = create_base_draws(
+        (2, 512, 3), 0, monte_carlo_sequence, scramble=True
+    )
+    draws_other_seed = create_base_draws(
+        (2, 512, 3), 1, monte_carlo_sequence, scramble=True
+    )
+
+    np.testing.assert_array_equal(draws, draws_same_seed)
+    assert not np.allclose(draws, draws_other_seed)
+    assert np.isfinite(draws).all()
+    np.testing.assert_allclose(draws.mean(axis=(0, 1)), 0, atol=0.05)
+    np.testing.assert_allclose(draws.std(axis=(0, 1)), 1, atol=0.05)
+
+
+@pytest.mark.unit
+@pytest.mark.edge_case
+def test_control_variate_is_exact_if_one_choice_dominates():
+    """If one choice is always maximal, it is the control variate and the estimate is
+    its expected value function."""
+    draws = np.random.RandomState(0).normal(size=(10, 2))
+    expected_value_function = calculate_expected_value_functions_with_control_variate(
+        np.ones(2),
+        np.array([100.0, 0.0]),
+        np.array([10.0, 5.0]),
+        draws,
+        np.ones(10),
+        np.zeros(2),
+        0.95,
+    )
+
+    np.testing.assert_allclose(expected_value_function, 100 + 0.95 * 10)
+
+
+@pytest.mark.unit
+@pytest.mark.precise
+def test_control_variate_is_unbiased_for_restricted_choice_set_with_correlated_wages():
+    """The shock of the excluded first choice is correlated with the second wage."""
+    optim_paras = {"choices_w_wage": ["a", "b"], "choices": ["a", "b", "c"]}
+    shocks_cholesky = np.array([[0.5, 0, 0], [0.8, 0.3, 0], [0, 0, 1]])
+    choice_set = (False, True, True)
+    wages = np.array([[10.0, 1.0]])
+    nonpecs = np.array([[0.0, 10.0]])
+    continuation_values = np.zeros((1, 2))
+
+    draws = transform_base_draws_with_cholesky_factor(
+        np.random.RandomState(0).normal(size=(1_000_000, 2)),
+        choice_set,
+        shocks_cholesky,
+        optim_paras,
+    )
+    expected = calculate_expected_value_functions(
+        wages,
+        nonpecs,
+        continuation_values,
+        draws,
+        np.ones(1_000_000),
+        draws.min(axis=0),
+        draws.max(axis=0),
+        0.95,
+    )
+
+    draws = draws[:10_000]
+    expected_value_function = calculate_expected_value_functions_with_control_variate(
+        wages,
+        nonpecs,
+        continuation_values,
+        draws,
+        np.ones(10_000),
+        compute_expected_draws(choice_set, shocks_cholesky, optim_paras),
+        0.95,
+    )
+
+    np.testing.assert_allclose(expected_value_function, expected, rtol=5e-3)
+
+
+@pytest.mark.integration
+def test_solution_with_variance_reduction_is_close_to_plain_solution(seed):
+    params, options = process_model_or_seed(seed, point_constr={"n_periods": 4})
+    options["solution_draws"] = 500
+
+    state_space = get_solve_func(params, options)(params)
+    options["monte_carlo_antithetic"] = True
+    options["solution_control_variate"] = True
+    state_space_ = get_solve_func(params, options)(params)
+
+    apply_to_attributes_of_two_state_spaces(
+        state_space.expected_value_functions,
+        state_space_.expected_value_functions,
+        lambda x, y: np.testing.assert_allclose(x, y, rtol=0.05),
+    )